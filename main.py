@@ -1,12 +1,37 @@
 """Main entry point of the program.
+Options:
+    --record FILE: record the seed, the setup and the decisions of each game in FILE (the last game is kept)
+    --replay FILE: replay a recorded game without output, then continue it in the command line
+                   (not allowed with --hints or --profile: the replayed game is continued without hints nor profiling)
+    --turn N: with --replay, replay only the first N turns
+    --hard: the ennemies decide with a search-based AI (ExpectimaxAI) instead of the rule-based EnnemyAI.
+            Not allowed with --record or --replay: the recordings replay the rule-based EnnemyAI only.
+    --hints: show the best action before each choice (optimal policy of the setup, cached in policy_solver.DEFAULT_CACHE_DIR)
+    --batch-input: read the answers from stdin by blocks (StdinBatchInputProvider), for piped or file input: faster than input()
+    --profile FILE: run the session with cProfile and dump the stats in FILE (read them with pstats);
+                    the turns of each game are also measured by phase (TurnProfiler) and the table is printed after the game
+
+Startup time: the modules of the options (expectimax, policy solver, replay, cProfile) are imported when the option is used,
+the manual setup wizard when it is chosen in the menu. src/tests/bench_startup.py checks the cold start against a fixed budget.
 """
+import argparse
+import contextlib
 
+from src.game import CliPlayerController, RoleplayGame
+from src.profiling import TurnProfiler
 from src.setup_game import SetupGame
-from src.utils import get_valid_user_input
+from src.utils import StdinBatchInputProvider, get_valid_user_input, use_input_provider
 
-def main():
+def main(record_path: str | None = None, hard: bool = False, hints: bool = False, profile: bool = False):
     """Let the user choose or create a setup game and play this game. 
-    Loop until user choose to stop the program. The user can choose to use the same previous setup or a new setup."""
+    Loop until user choose to stop the program. The user can choose to use the same previous setup or a new setup.
+
+    Args:
+        record_path (str, optional): File where each game is recorded. Defaults to None (no recording).
+        hard (bool, optional): If True, the ennemies use the ExpectimaxAI. Defaults to False.
+        hints (bool, optional): If True, show the best action before each choice of the user. Defaults to False.
+        profile (bool, optional): If True, measure the turns of each game by phase and print the table after the game. Defaults to False.
+    """
     
     print("BIENVENUE - JEU DE RÔLE EN LIGNE DE COMMANDE")
     
@@ -21,7 +46,7 @@ def main():
             setup.create()
             user_create_a_new_setup = True
 
-        play_game(setup, user_create_a_new_setup)
+        play_game(setup, user_create_a_new_setup, record_path, hard, hints, profile)
     
         user_want_to_play = get_valid_user_input("Souhaitez-vous continuer à jouer (o/n)? ", ('o', 'n')) == 'o'
         print() #just a line to put some space between sections
@@ -36,27 +61,120 @@ def main():
     print("Aurevoir!")
 
 
-def play_game(setup: SetupGame, is_new_setup: bool):
+def play_game(setup: SetupGame, is_new_setup: bool, record_path: str | None = None, hard: bool = False, hints: bool = False,
+              profile: bool = False):
     if not setup.is_valid:
         print("La configuration du jeu est invalide. Cette partie ne peut pas démarrer.")
         return
     
     game = setup.get_game()
+    if hard:
+        from src.expectimax_ai import ExpectimaxAI
+        game.ennemy_ai_factory = ExpectimaxAI
 
-    if not is_new_setup:
-        game.play(print_settings=True)
+    if is_new_setup:
+        print(game.settings_info + "\n")
+        if get_valid_user_input("Souhaitez-vous jouer avec ces paramètres (o/n)? ", ('o', 'n')) == 'n':
+            print("Partie annulée.")
+            return
+
+    if hints:
+        from src.policy_solver import DEFAULT_CACHE_DIR, PolicyTooLargeError, policy_table_for
+        print("Calcul des conseils...")
+        try:
+            game.hints = policy_table_for(game, DEFAULT_CACHE_DIR)
+        except PolicyTooLargeError:
+            print("Cette configuration est trop grande pour calculer des conseils: la partie continue sans conseil.")
+
+    if profile:
+        game.profiler = TurnProfiler()
+    play_and_record(game, not is_new_setup, record_path)
+    if profile:
+        print("Temps par phase des tours:", game.profiler.report(), sep="\n")
+
+
+def play_and_record(game: RoleplayGame, print_settings: bool, record_path: str | None):
+    """Play the game. If record_path is given, the recording is saved even if the game is interrupted."""
+    if record_path is None:
+        game.play(print_settings=print_settings)
         return
-    
-    print(game.settings_info + "\n")
-    if get_valid_user_input("Souhaitez-vous jouer avec ces paramètres (o/n)? ", ('o', 'n')) == 'n':
-        print("Partie annulée.")
+
+    from src.replay import GameRecording
+    recording = GameRecording.of(game)
+    try:
+        game.play(print_settings=print_settings, player_controller=recording.recording_controller(CliPlayerController(game)))
+    finally:
+        recording.save(record_path)
+        print(f"Partie enregistrée dans {record_path}.")
+
+
+def replay_game(replay_path: str, turn_nb: int | None, record_path: str | None = None):
+    """Replay a recorded game without output (all of it or its first turn_nb turns), then continue it in the command line"""
+    from src.replay import GameRecording
+    recording = GameRecording.load(replay_path)
+    game, nb_replayed = recording.replay(turn_nb)
+    print(f"Partie rejouée jusqu'au tour {game._tour_nb}.")
+
+    if record_path is None:
+        game.play(print_settings=True)
         return
-        
-    game.play(print_settings=False)
-        
-    
+
+    #The new recording keeps the replayed decisions
+    new_recording = GameRecording(recording.seed, recording.setup, recording.decisions[:nb_replayed])
+    try:
+        game.play(print_settings=True, player_controller=new_recording.recording_controller(CliPlayerController(game)))
+    finally:
+        new_recording.save(record_path)
+        print(f"Partie enregistrée dans {record_path}.")
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Jeu de rôle en ligne de commande.")
+    parser.add_argument("--record", metavar="FICHIER", help="Enregistrer la graine, la configuration et les choix de chaque partie (la dernière partie est conservée)")
+    parser.add_argument("--replay", metavar="FICHIER", help="Rejouer une partie enregistrée sans affichage, puis la continuer")
+    parser.add_argument("--turn", type=int, default=None, help="Avec --replay: rejouer seulement les N premiers tours")
+    parser.add_argument("--hard", action="store_true", help="Adversaires difficiles: les ennemis décident par recherche (expectimax)")
+    parser.add_argument("--hints", action="store_true", help="Afficher la meilleure action avant chaque choix")
+    parser.add_argument("--batch-input", action="store_true", help="Lire les réponses par blocs sur l'entrée standard (fichier ou pipe)")
+    parser.add_argument("--profile", metavar="FICHIER", help="Profiler la session (cProfile, statistiques enregistrées dans FICHIER) et les phases des tours")
+    arguments = parser.parse_args(args)
+    #A recording keeps the setup and the player choices, not the ennemy AI: the decisions of ExpectimaxAI depend on a time budget,
+    #so a hard game cannot be replayed identically
+    if arguments.hard and (arguments.record or arguments.replay):
+        parser.error("--hard ne peut pas être utilisé avec --record ou --replay (les décisions des ennemis ne sont pas rejouables).")
+    if arguments.turn is not None and not arguments.replay:
+        parser.error("--turn ne peut être utilisé qu'avec --replay.")
+    if arguments.replay and (arguments.hints or arguments.profile):
+        parser.error("--hints et --profile ne peuvent pas être utilisés avec --replay.")
+    return arguments
+
+
+def run_profiled(stats_path: str, function, *args):
+    """Run function(*args) with cProfile, dump the stats in stats_path and print the most expensive functions.
+    The stats are dumped even if the session is interrupted.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(function, *args)
+    finally:
+        profiler.dump_stats(stats_path)
+        print(f"Profil enregistré dans {stats_path} (python -m pstats {stats_path}). Fonctions les plus coûteuses:")
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(15)
 
 
 if __name__ == "__main__":
-    main()
+    arguments = parse_args()
+    if arguments.replay:
+        session, session_args = replay_game, (arguments.replay, arguments.turn, arguments.record)
+    else:
+        session, session_args = main, (arguments.record, arguments.hard, arguments.hints, arguments.profile is not None)
+
+    with use_input_provider(StdinBatchInputProvider()) if arguments.batch_input else contextlib.nullcontext():
+        if arguments.profile:
+            run_profiled(arguments.profile, session, *session_args)
+        else:
+            session(*session_args)
     
@@ -0,0 +1,353 @@
+"""Balance sweep: the player win rate and the expected number of turns at every point of a grid of
+CharacterStats and potion parameters, instead of hand-editing constants.py and playing.
+
+A parameter is named <character>.<field>:
+- character: player, ennemy (every ennemy) or ennemyN (the N-th ennemy, from 1)
+- field: max_life, attack_min, attack_max, can_drink_potion (CharacterStats), nb_potions, potion_min_recup, potion_max_recup
+The points of the grid are evaluated in parallel (processes), with a BatchSimulator (Monte Carlo, the fast default)
+or a WinSolver (exact, for small setups). The results are cached on disk, keyed by the setup of the point and the
+evaluation settings: a sweep stopped or extended later only evaluates the new points. Each point has its own seed,
+derived from the sweep seed and the point, so the results never depend on the number of workers or on the cache.
+
+Example:
+    python -m src.balance_sweep --param ennemy.attack_max=10:20 --param player.nb_potions=0:5 --output sweep.csv
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import csv
+from dataclasses import dataclass, fields
+import hashlib
+import itertools
+import json
+import math
+import os
+from typing import Callable, Iterator
+
+from src.batch_simulator import BatchSimulator
+from src.battle_engine import PotionThresholdController
+from src.character import CharacterStats
+from src.exceptions import InvalidStatsError, PoisonPotionError
+from src.game import RoleplayGame
+from src.win_solver import WinSolver
+import src.constants as c
+
+STAT_FIELDS = tuple(field.name for field in fields(CharacterStats))
+POTION_FIELDS = ("nb_potions", "potion_min_recup", "potion_max_recup")
+
+METHOD_BATCH = "batch"
+METHOD_EXACT = "exact"
+
+
+@dataclass
+class SweepResult:
+    """Results of one point of the grid. unfinished_rate is the ratio of battles stopped at max_turns (0 with the exact method)."""
+    parameters: dict[str, int]
+    win_rate: float
+    expected_turns: float
+    unfinished_rate: float
+
+
+def parse_range(text: str) -> list[int]:
+    """Values of a parameter: "5" , "5:15" (5 to 15), "5:15:2" (5, 7, ..., 15) or "1,3,7"
+
+    Raises:
+        ValueError: invalid range
+    """
+    if "," in text:
+        return [int(value) for value in text.split(",")]
+    bounds = [int(value) for value in text.split(":")]
+    if len(bounds) == 1:
+        return bounds
+    if len(bounds) > 3 or (len(bounds) == 3 and bounds[2] <= 0):
+        raise ValueError(f"Invalid range: {text!r}")
+    start, stop, step = bounds[0], bounds[1], bounds[2] if len(bounds) == 3 else 1
+    return list(range(start, stop + 1, step))
+
+
+def _characters_of(setup: dict, character: str) -> list[dict]:
+    if character == "player":
+        return [setup["player"]]
+    if character == "ennemy":
+        return setup["ennemies"]
+    if character.startswith("ennemy") and character[len("ennemy"):].isdigit():
+        index = int(character[len("ennemy"):]) - 1
+        if 0 <= index < len(setup["ennemies"]):
+            return [setup["ennemies"][index]]
+    raise ValueError(f"Unknown character: {character!r}")
+
+
+def _set_potions(character: dict, field: str, value: int):
+    """Replace the potions of the character by one stack with the new field value (the other objects are kept)"""
+    items = character["inventory"]["items"]
+    potions = [item for item in items if item["type"] in ("potion", "potion_stack") and not item.get("is_empty", False)]
+    count = sum(item.get("count", 1) for item in potions)
+    min_recup = potions[0]["min_recup"] if potions else c.DEFAULT_POTION_RECUP_MIN
+    max_recup = potions[0]["max_recup"] if potions else c.DEFAULT_POTION_RECUP_MAX
+    match field:
+        case "nb_potions":
+            count = value
+        case "potion_min_recup":
+            min_recup = value
+        case "potion_max_recup":
+            max_recup = value
+
+    items[:] = [item for item in items if item["type"] == "object"]
+    if count > 0:
+        items.append({"type": "potion_stack", "count": count, "min_recup": min_recup, "max_recup": max_recup})
+
+
+def apply_parameters(setup: dict, parameters: dict[str, int]) -> dict:
+    """A copy of a setup (RoleplayGame.to_dict) with new parameter values
+
+    Args:
+        setup (dict): The base setup
+        parameters (dict[str, int]): {parameter name: value}
+
+    Raises:
+        ValueError: unknown parameter
+
+    Returns:
+        dict: The new setup. The characters start with their max life.
+    """
+    setup = copy.deepcopy(setup)
+    for name, value in parameters.items():
+        character, _, field = name.partition(".")
+        for character_data in _characters_of(setup, character):
+            if field in STAT_FIELDS:
+                character_data["stats"][field] = bool(value) if field == "can_drink_potion" else value
+                if field == "max_life":
+                    character_data["current_life"] = value
+            elif field in POTION_FIELDS:
+                _set_potions(character_data, field, value)
+            else:
+                raise ValueError(f"Unknown parameter: {name!r}")
+    return setup
+
+
+def evaluate_setup(setup: dict, method: str, nb_battles: int, seed: int, drink_below_pct: float, max_turns: int) -> tuple[float, float, float]:
+    """Evaluate one setup, in the current process
+
+    Returns:
+        tuple[float, float, float]: (win rate, expected turns, unfinished rate)
+    """
+    game = RoleplayGame.from_dict(setup)
+    controller = PotionThresholdController(drink_below_pct)
+    if method == METHOD_EXACT:
+        result = WinSolver(game, controller).solve()
+        return result.win_probability, result.expected_turns, 0.0
+
+    summary = BatchSimulator(game, controller, max_turns).run(nb_battles, seed)
+    return summary.win_rate, summary.mean_turns, summary.nb_unfinished / summary.nb_battles
+
+
+def _evaluate_setups(tasks: list[tuple[dict, int]], method: str, nb_battles: int, drink_below_pct: float, max_turns: int) -> list[tuple[float, float, float]]:
+    """Evaluate a chunk of (setup, seed) in a worker process"""
+    return [evaluate_setup(setup, method, nb_battles, seed, drink_below_pct, max_turns) for setup, seed in tasks]
+
+
+class BalanceSweep:
+    """Evaluate a base setup at every point of a parameter grid"""
+    CACHE_FILE = "sweep-cache.jsonl"
+    CHUNK_SIZE = 50     #Points sent at once to a worker
+
+    def __init__(self, game: RoleplayGame, grid: dict[str, list[int]], method: str = METHOD_BATCH, nb_battles: int = 10_000,
+                 seed: int = 0, drink_below_pct: float = PotionThresholdController.DEFAULT_DRINK_BELOW_PCT,
+                 max_turns: int = BatchSimulator.DEFAULT_MAX_TURNS, cache_dir: str | os.PathLike | None = None):
+        """Prepare the sweep
+
+        Args:
+            game (RoleplayGame): The base setup. Not modified.
+            grid (dict[str, list[int]]): {parameter name: values} (see parse_range)
+            method (str, optional): METHOD_BATCH (Monte Carlo) or METHOD_EXACT (WinSolver). Defaults to METHOD_BATCH.
+            nb_battles (int, optional): Battles simulated by point with METHOD_BATCH. Defaults to 10_000.
+            seed (int, optional): Seed of the sweep. Defaults to 0.
+            drink_below_pct (float, optional): Player policy (see PotionThresholdController). Defaults to its default threshold.
+            max_turns (int, optional): A battle not over after this number of turns is unfinished. Defaults to BatchSimulator.DEFAULT_MAX_TURNS.
+            cache_dir (str | os.PathLike, optional): Directory of the results cache. Defaults to None (no cache).
+
+        Raises:
+            ValueError: unknown method or parameter
+        """
+        if method not in (METHOD_BATCH, METHOD_EXACT):
+            raise ValueError(f"Unknown method: {method!r}")
+        self.setup = game.to_dict()
+        self.grid = grid
+        self.method = method
+        self.nb_battles = nb_battles
+        self.seed = seed
+        self.drink_below_pct = drink_below_pct
+        self.max_turns = max_turns
+        self.cache_dir = cache_dir
+        self.nb_invalid_points = 0
+        apply_parameters(self.setup, {name: values[0] for name, values in grid.items() if values})    #Check the names now
+
+
+    @property
+    def nb_points(self) -> int:
+        return math.prod(len(values) for values in self.grid.values())
+
+
+    def points(self) -> Iterator[dict[str, int]]:
+        """The points of the grid, the last parameter varying the fastest"""
+        names = list(self.grid)
+        for values in itertools.product(*self.grid.values()):
+            yield dict(zip(names, values))
+
+
+    def point_key(self, setup: dict) -> str:
+        """Key of a point in the cache: the setup (without the names) and the evaluation settings"""
+        characters = [setup["player"]] + setup["ennemies"]
+        data = [[{key: value for key, value in character.items() if key != "name"} for character in characters], self.method,
+                self.nb_battles if self.method == METHOD_BATCH else None, self.seed, self.drink_below_pct, self.max_turns]
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+    @staticmethod
+    def point_seed(seed: int, key: str) -> int:
+        """Seed of the simulations of a point: the same for the same point, whatever the order of evaluation"""
+        return int.from_bytes(hashlib.sha256(f"{seed}:{key}".encode()).digest()[:8], "little")
+
+
+    def run(self, nb_workers: int | None = None, progress: Callable[[int, int], None] | None = None) -> list[SweepResult]:
+        """Evaluate every valid point of the grid (the points with invalid stats or potions are skipped: see nb_invalid_points)
+
+        Args:
+            nb_workers (int, optional): Number of processes. Defaults to None (number of processors).
+            progress (Callable[[int, int], None], optional): Called with (points done, points to evaluate) after each chunk. Defaults to None.
+
+        Returns:
+            list[SweepResult]: The results, in the order of points()
+        """
+        cache = self._load_cache()
+        self.nb_invalid_points = 0
+
+        points = []         #(parameters, key)
+        missing = {}        #key: setup, the points to evaluate (the same setup can appear twice in the grid)
+        for parameters in self.points():
+            setup = apply_parameters(self.setup, parameters)
+            try:
+                RoleplayGame.from_dict(setup)
+            except (InvalidStatsError, PoisonPotionError):
+                self.nb_invalid_points += 1
+                continue
+            key = self.point_key(setup)
+            points.append((parameters, key))
+            if key not in cache:
+                missing[key] = setup
+
+        if missing:
+            self._evaluate(missing, cache, nb_workers, progress)
+
+        return [SweepResult(parameters, *cache[key]) for parameters, key in points]
+
+
+    def _evaluate(self, missing: dict[str, dict], cache: dict[str, tuple[float, float, float]], nb_workers: int | None,
+                  progress: Callable[[int, int], None] | None):
+        keys = list(missing)
+        chunks = [keys[start:start + BalanceSweep.CHUNK_SIZE] for start in range(0, len(keys), BalanceSweep.CHUNK_SIZE)]
+        tasks = [[(missing[key], BalanceSweep.point_seed(self.seed, key)) for key in chunk] for chunk in chunks]
+
+        cache_file = None
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_file = open(os.path.join(self.cache_dir, BalanceSweep.CACHE_FILE), "a", encoding="utf-8")
+        try:
+            with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+                nb_done = 0
+                results = executor.map(_evaluate_setups, tasks, itertools.repeat(self.method), itertools.repeat(self.nb_battles),
+                                       itertools.repeat(self.drink_below_pct), itertools.repeat(self.max_turns))
+                for chunk, chunk_results in zip(chunks, results):
+                    for key, result in zip(chunk, chunk_results):
+                        cache[key] = result
+                        if cache_file is not None:
+                            cache_file.write(json.dumps({"key": key, "result": list(result)}) + "\n")
+                    if cache_file is not None:
+                        cache_file.flush()      #The points done are kept if the sweep is interrupted
+                    nb_done += len(chunk)
+                    if progress is not None:
+                        progress(nb_done, len(keys))
+        finally:
+            if cache_file is not None:
+                cache_file.close()
+
+
+    def _load_cache(self) -> dict[str, tuple[float, float, float]]:
+        cache = {}
+        path = os.path.join(self.cache_dir, BalanceSweep.CACHE_FILE) if self.cache_dir is not None else None
+        if path is None or not os.path.exists(path):
+            return cache
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue    #Last line of an interrupted sweep
+                cache[entry["key"]] = tuple(entry["result"])
+        return cache
+
+
+def write_csv(results: list[SweepResult], path: str | os.PathLike):
+    """Write one line by point: the parameters, then win_rate, expected_turns and unfinished_rate"""
+    names = list(results[0].parameters) if results else []
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(names + ["win_rate", "expected_turns", "unfinished_rate"])
+        for result in results:
+            writer.writerow([result.parameters[name] for name in names] + [result.win_rate, result.expected_turns, result.unfinished_rate])
+
+
+def write_heatmap(results: list[SweepResult], row_parameter: str, column_parameter: str, path: str | os.PathLike, value: str = "win_rate"):
+    """Write a matrix of one result (rows: values of row_parameter, columns: values of column_parameter)
+
+    Raises:
+        ValueError: another parameter varies (2 results for the same cell)
+    """
+    cells = {}
+    for result in results:
+        cell = (result.parameters[row_parameter], result.parameters[column_parameter])
+        if cell in cells:
+            raise ValueError(f"Many results for {row_parameter}={cell[0]}, {column_parameter}={cell[1]}: only 2 parameters can vary.")
+        cells[cell] = getattr(result, value)
+
+    rows = sorted({row for row, _ in cells})
+    columns = sorted({column for _, column in cells})
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow([f"{row_parameter}\\{column_parameter}"] + columns)
+        for row in rows:
+            writer.writerow([row] + [cells.get((row, column), "") for column in columns])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Balayage de paramètres d'équilibrage (taux de victoire et nombre de tours).")
+    parser.add_argument("--param", action="append", required=True, metavar="NOM=VALEURS",
+                        help="Paramètre et valeurs, ex: ennemy.attack_max=10:20 ou player.nb_potions=0,1,3 (répétable)")
+    parser.add_argument("--method", choices=(METHOD_BATCH, METHOD_EXACT), default=METHOD_BATCH, help="Simulation (batch) ou calcul exact (exact)")
+    parser.add_argument("--battles", type=int, default=10_000, help="Parties simulées par point (méthode batch)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du balayage")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nombre de processeurs)")
+    parser.add_argument("--cache-dir", default=".sweep_cache", help="Dossier du cache des résultats")
+    parser.add_argument("--output", default="sweep.csv", help="Fichier CSV des résultats (une ligne par point)")
+    parser.add_argument("--heatmap", metavar="FICHIER", help="Avec 2 paramètres: matrice CSV du taux de victoire")
+    parser.add_argument("--two-weak-ennemies", action="store_true", help="Jeu avec deux adversaires faibles au lieu du jeu par défaut")
+    args = parser.parse_args()
+
+    if args.heatmap and len(args.param) != 2:
+        parser.error("--heatmap demande exactement 2 paramètres.")
+
+    grid = {}
+    for parameter in args.param:
+        name, _, values = parameter.partition("=")
+        grid[name] = parse_range(values)
+
+    game = RoleplayGame.settings_with_two_weak_ennemies() if args.two_weak_ennemies else RoleplayGame.default_settings()
+    sweep = BalanceSweep(game, grid, args.method, args.battles, args.seed, cache_dir=args.cache_dir)
+    results = sweep.run(args.workers, lambda done, total: print(f"\r{done}/{total} points", end="", flush=True))
+    print(f"\n{len(results)} points ({sweep.nb_invalid_points} invalides ignorés).")
+
+    write_csv(results, args.output)
+    print(f"Résultats écrits dans {args.output}.")
+    if args.heatmap:
+        write_heatmap(results, *grid, args.heatmap)
+        print(f"Matrice écrite dans {args.heatmap}.")
@@ -0,0 +1,177 @@
+"""Monte Carlo simulation of thousands of battles at once with NumPy.
+The state of N independent battles of the same RoleplayGame setup is kept in arrays (one row per battle,
+one column per character: column 0 is the player, columns 1.. are the ennemies). Each step plays one turn
+of every battle still in progress, with the same rules as BattleEngine:
+- Character.attacks: uniform damage between attack_min and attack_max, life cannot go under 0
+- Character.drink_a_potion: the bag is searched (the next turn is skipped) and the first potion is drunk if any,
+  life cannot go over max life
+- EnnemyAI.decide_action: <5% life: drink, <25% life with a potion: drink 50/50, attack otherwise
+"""
+import numpy as np
+
+from src.battle_engine import PlayerController, AttackController, PotionThresholdController, drink_threshold_of
+from src.game import RoleplayGame
+from src.potion import Potion
+from src.simulation_summary import SimulationSummary
+
+
+class BatchSimulator:
+    """Simulate many battles of one RoleplayGame setup with vectorized turns.
+
+    The player policy mirrors a PotionThresholdController: drink a potion when the life is lower than drink_below_pct
+    (and a potion is available), otherwise attack the first ennemy still alive. An AttackController is a threshold of 0.
+
+    Raises:
+        ValueError: the player controller cannot be vectorized
+    """
+    DEFAULT_MAX_TURNS = 1000
+    DEFAULT_BATCH_SIZE = 100_000
+
+    def __init__(self, game: RoleplayGame, player_controller: PlayerController | None = None, max_turns: int = DEFAULT_MAX_TURNS):
+        """Read the setup of the game. The game itself is not modified by the simulation.
+
+        Args:
+            game (RoleplayGame): The setup to simulate (ex: SetupGame.get_game() or RoleplayGame.default_settings())
+            player_controller (PlayerController, optional): AttackController or PotionThresholdController. Defaults to AttackController.
+            max_turns (int, optional): A battle not over after this number of turns is unfinished. Defaults to DEFAULT_MAX_TURNS.
+        """
+        self.drink_below_pct = drink_threshold_of(player_controller if player_controller is not None else AttackController())
+
+        self.max_turns = max_turns
+
+        characters = [game.player] + list(game.ennemies)
+        potions = [[obj for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty] for character in characters]
+        max_nb_potions = max(1, max(len(character_potions) for character_potions in potions))
+
+        self._initial_life = np.array([character.current_life for character in characters], dtype=np.int64)
+        self._initial_took = np.array([character.took_a_potion for character in characters], dtype=bool)
+        self._max_life = np.array([character.stats.max_life for character in characters], dtype=np.int64)
+        self._attack_min = np.array([character.stats.attack_min for character in characters], dtype=np.int64)
+        self._attack_max = np.array([character.stats.attack_max for character in characters], dtype=np.int64)
+        self._can_drink = np.array([character.stats.can_drink_potion for character in characters], dtype=bool)
+        self._nb_potions = np.array([len(character_potions) for character_potions in potions], dtype=np.int64)
+
+        #Recovery range of the potions, in inventory order. Padded with 0 for characters with less potions.
+        self._potion_min = np.zeros((len(characters), max_nb_potions), dtype=np.int64)
+        self._potion_max = np.zeros((len(characters), max_nb_potions), dtype=np.int64)
+        for index, character_potions in enumerate(potions):
+            for potion_index, potion in enumerate(character_potions):
+                self._potion_min[index, potion_index] = potion.min_recup
+                self._potion_max[index, potion_index] = potion.max_recup
+
+
+    def run(self, nb_battles: int, seed: int | None = None, batch_size: int = DEFAULT_BATCH_SIZE) -> SimulationSummary:
+        """Simulate battles
+
+        Args:
+            nb_battles (int): Number of battles to simulate
+            seed (int, optional): Seed of the random generator, for reproducible results. Defaults to None.
+            batch_size (int, optional): Maximum number of battles simulated at once (limits the memory used). Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            SimulationSummary: Win rate and turns statistics
+        """
+        rng = np.random.default_rng(seed)
+        summary = SimulationSummary()
+
+        remaining = nb_battles
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            summary.merge(self._run_batch(size, rng))
+            remaining -= size
+
+        return summary
+
+
+    def _run_batch(self, nb_battles: int, rng: np.random.Generator) -> SimulationSummary:
+        """Simulate nb_battles battles together. Finished battles are removed from the arrays after each turn."""
+        summary = SimulationSummary()
+
+        life = np.tile(self._initial_life, (nb_battles, 1))
+        took = np.tile(self._initial_took, (nb_battles, 1))
+        drunk = np.zeros(life.shape, dtype=np.int64)   #Number of potions drunk: index of the next potion in inventory
+
+        turn_nb = 0
+        while len(life) and turn_nb < self.max_turns:
+            turn_nb += 1
+            self._player_turn(life, took, drunk, rng)
+            for ennemy_index in range(1, life.shape[1]):
+                self._ennemy_turn(ennemy_index, life, took, drunk, rng)
+
+            #Gameover check
+            player_dead = life[:, 0] <= 0
+            finished = player_dead | np.all(life[:, 1:] <= 0, axis=1)
+            nb_finished = int(np.count_nonzero(finished))
+            if nb_finished:
+                nb_losses = int(np.count_nonzero(player_dead))
+                if nb_finished - nb_losses:
+                    summary.add_battle(True, turn_nb, nb_finished - nb_losses)
+                if nb_losses:
+                    summary.add_battle(False, turn_nb, nb_losses)
+
+                in_progress = ~finished
+                life, took, drunk = life[in_progress], took[in_progress], drunk[in_progress]
+
+        if len(life):
+            summary.add_battle(None, turn_nb, len(life))
+
+        return summary
+
+
+    def _player_turn(self, life: np.ndarray, took: np.ndarray, drunk: np.ndarray, rng: np.random.Generator):
+        skip = took[:, 0].copy()
+        took[skip, 0] = False
+
+        pourcent_life_remains = life[:, 0] / self._max_life[0] * 100
+        has_potion = drunk[:, 0] < self._nb_potions[0]
+        drink = ~skip & (pourcent_life_remains < self.drink_below_pct) & has_potion
+        attack = ~skip & ~drink
+
+        self._drink_a_potion(0, drink, life, took, drunk, rng)
+
+        #Attack the first ennemy still alive
+        rows = np.flatnonzero(attack)
+        if len(rows):
+            targets = 1 + np.argmax(life[rows, 1:] > 0, axis=1)
+            damage = rng.integers(self._attack_min[0], self._attack_max[0] + 1, size=len(rows))
+            life[rows, targets] = np.maximum(life[rows, targets] - damage, 0)
+
+
+    def _ennemy_turn(self, index: int, life: np.ndarray, took: np.ndarray, drunk: np.ndarray, rng: np.random.Generator):
+        alive = life[:, index] > 0
+        skip = alive & took[:, index]
+        took[skip, index] = False
+        acting = alive & ~skip
+
+        if self._can_drink[index]:
+            #Same decision as EnnemyAI.decide_action
+            pourcent_life_remains = life[:, index] / self._max_life[index] * 100
+            has_potion = drunk[:, index] < self._nb_potions[index]
+            coin_flip = rng.integers(0, 2, size=len(life)).astype(bool)
+            drink = acting & ((pourcent_life_remains < 5) | ((pourcent_life_remains < 25) & has_potion & coin_flip))
+            self._drink_a_potion(index, drink, life, took, drunk, rng)
+            attack = acting & ~drink
+        else:
+            attack = acting
+
+        nb_attacks = int(np.count_nonzero(attack))
+        if nb_attacks:
+            damage = rng.integers(self._attack_min[index], self._attack_max[index] + 1, size=nb_attacks)
+            life[attack, 0] = np.maximum(life[attack, 0] - damage, 0)
+
+
+    def _drink_a_potion(self, index: int, drink: np.ndarray, life: np.ndarray, took: np.ndarray, drunk: np.ndarray, rng: np.random.Generator):
+        """The characters at column index search their bag and drink the next potion in the battles where drink is True"""
+        took[drink, index] = True   #Even if there is no potion: the bag has been searched
+
+        rows = np.flatnonzero(drink & (drunk[:, index] < self._nb_potions[index]))
+        if len(rows):
+            potion_index = drunk[rows, index]
+            gain = rng.integers(self._potion_min[index, potion_index], self._potion_max[index, potion_index] + 1)
+            life[rows, index] = np.minimum(life[rows, index] + gain, self._max_life[index])
+            drunk[rows, index] += 1
+
+
+if __name__ == "__main__":
+    print(BatchSimulator(RoleplayGame.default_settings()).run(100_000))
+    print(BatchSimulator(RoleplayGame.settings_with_two_weak_ennemies(), PotionThresholdController()).run(100_000))
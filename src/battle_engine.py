@@ -0,0 +1,448 @@
+"""Headless battle engine: apply the combat rules of a RoleplayGame without any console input or output.
+- The player actions are decided by a PlayerController (scripted, random, or the CLI in RoleplayGame).
+- The ennemy actions are decided by EnnemyAI (one AI by ennemy, kept for the whole battle).
+- Each action returns an ActionResult that a front end can display (or ignore, for simulation).
+- An optional CombatEventListener receives the structured events of the battle (see combat_events).
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from src.character import Character
+from src.combat_events import CombatEvent, CombatEventListener
+from src.ennemy_ai import EnnemyAI
+from src.random_source import RandomSource, GLOBAL_RANDOM_SOURCE
+
+
+@dataclass
+class ActionResult:
+    """What a Character did during his turn.
+
+    action is Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION, SKIP_TURN or IS_DEAD.
+    value is the damage made (attack) or the life points gain (potion, Character.POTION_NOT_FOUND if no potion).
+    """
+    SKIP_TURN = 0       #The character searched his bag for a potion at the previous turn
+    IS_DEAD = -1        #A dead character cannot do anything
+
+    actor: Character
+    action: int
+    target: Character | None = None
+    value: int = 0
+
+
+#Create the AI of an ennemy for a battle: factory(ennemy, player) -> EnnemyAI
+EnnemyAIFactory = Callable[[Character, Character], EnnemyAI]
+
+
+class PlayerController:
+    """Decide the action of the player in a BattleEngine. Subclasses must override choose_action."""
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        """Decide the player action
+
+        Args:
+            engine (BattleEngine): The battle in progress
+
+        Returns:
+            tuple[int, int]: (Character.ACTION_ATTACK or Character.ACTION_DRINKPOTION, index of the ennemy to attack).
+                             The index is ignored when the player drinks a potion.
+        """
+        raise NotImplementedError
+
+
+class AttackController(PlayerController):
+    """Always attack the first ennemy still alive"""
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        return Character.ACTION_ATTACK, engine.first_alive_ennemy_index
+
+
+class PotionThresholdController(AttackController):
+    """Drink a potion when the life is lower than a percentage of the max life (and a potion is available).
+    Otherwise, attack the first ennemy still alive."""
+    DEFAULT_DRINK_BELOW_PCT = 25
+
+    def __init__(self, drink_below_pct: float = DEFAULT_DRINK_BELOW_PCT):
+        self.drink_below_pct = drink_below_pct
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        player = engine.player
+        pourcent_life_remains = player.current_life / player.stats.max_life * 100
+        if pourcent_life_remains < self.drink_below_pct and player.inventory.has_potion():
+            return Character.ACTION_DRINKPOTION, 0
+        return super().choose_action(engine)
+
+
+def drink_threshold_of(player_controller: PlayerController) -> float:
+    """The potion threshold of a controller, for the simulators and solvers that only know the threshold policy
+
+    Args:
+        player_controller (PlayerController): AttackController (threshold 0) or PotionThresholdController
+
+    Raises:
+        ValueError: the controller is not a threshold policy
+
+    Returns:
+        float: Percentage of life under which the player drinks a potion
+    """
+    if isinstance(player_controller, PotionThresholdController):
+        return player_controller.drink_below_pct
+    if type(player_controller) is AttackController:
+        return 0
+    raise ValueError(f"The player controller {type(player_controller).__name__} is not a threshold policy.")
+
+
+class RandomController(PlayerController):
+    """Randomly attack an ennemy still alive or drink a potion"""
+
+    def __init__(self, rng: RandomSource = GLOBAL_RANDOM_SOURCE):
+        self.rng = rng
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        action = self.rng.choice((Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION))
+        return action, self.rng.choice(list(engine.alive_ennemy_indexes))
+
+
+class RecordingController(PlayerController):
+    """Let another controller decide and keep every decision, so the battle can be replayed with a ReplayController"""
+
+    def __init__(self, player_controller: PlayerController, decisions: list[tuple[int, int]] | None = None):
+        """Create the controller
+
+        Args:
+            player_controller (PlayerController): Decide the player actions (ex: the CLI)
+            decisions (list[tuple[int, int]], optional): List where the decisions are appended. Defaults to None (a new list).
+        """
+        self.player_controller = player_controller
+        self.decisions = decisions if decisions is not None else []
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        decision = self.player_controller.choose_action(engine)
+        self.decisions.append(decision)
+        return decision
+
+
+class ReplayController(PlayerController):
+    """Play recorded decisions in order, then let another controller decide (if any)"""
+
+    def __init__(self, decisions: list[tuple[int, int]], player_controller: PlayerController | None = None):
+        """Create the controller
+
+        Args:
+            decisions (list[tuple[int, int]]): The decisions to replay, as returned by choose_action
+            player_controller (PlayerController, optional): Decide after the last recorded decision. Defaults to None.
+        """
+        self.decisions = decisions
+        self.player_controller = player_controller
+        self.nb_replayed = 0
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded decisions not replayed yet"""
+        return len(self.decisions) - self.nb_replayed
+
+    def choose_action(self, engine: "BattleEngine") -> tuple[int, int]:
+        """The next recorded decision
+
+        Raises:
+            ValueError: there is no decision left and no other controller
+        """
+        if self.nb_replayed < len(self.decisions):
+            action, ennemy_index = self.decisions[self.nb_replayed]
+            self.nb_replayed += 1
+            return action, ennemy_index
+        if self.player_controller is None:
+            raise ValueError("All the recorded decisions have been replayed.")
+        return self.player_controller.choose_action(engine)
+
+
+class BattleEngine:
+    """The combat rules of a RoleplayGame, without console I/O.
+
+    Rules:
+        - The player plays first, then every ennemy in order.
+        - A character who searched his bag for a potion skips his next turn.
+        - The game is over at the end of a turn if the player is dead or if all the ennemies are dead.
+
+    The engine keeps the index of the ennemies still alive: a turn only visits the ennemies alive at its start,
+    so its cost depends on the living ennemies, not on all the ennemies of the game.
+
+    Raises:
+        ValueError: invalid settings or invalid player action
+    """
+
+    def __init__(self, player: Character, ennemies: list[Character], player_controller: PlayerController | None = None,
+                 listener: CombatEventListener | None = None, ennemy_ai_factory: EnnemyAIFactory | None = None):
+        """Create the engine
+
+        Args:
+            player (Character): The player
+            ennemies (list[Character]): The ennemies. Must contains at least one ennemy
+            player_controller (PlayerController, optional): Decide the player actions. Mandatory to call player_turn(). Defaults to None.
+            listener (CombatEventListener, optional): Receive the events of the battle. Defaults to None (no event).
+            ennemy_ai_factory (EnnemyAIFactory, optional): Create the AI of an ennemy, called with (ennemy, player)
+                                                          (ex: ExpectimaxAI). Defaults to None: the rule-based EnnemyAI.
+        """
+        if not player or len(ennemies) <= 0:
+            raise ValueError("Game cannot be start because the settings are invalids (player is missing or there is no ennemy). ")
+
+        self.player = player
+        self.ennemies = ennemies
+        self.player_controller = player_controller
+        self.listener = listener
+        self.turn_nb = 0
+        self._index_of = {id(ennemy): index for index, ennemy in enumerate(ennemies)}
+        self._alive = {index: ennemy for index, ennemy in enumerate(ennemies) if not ennemy.is_dead}     #Index order
+        self._turn_ennemies: list[Character] = []
+        #One AI by ennemy that can drink a potion, kept for the whole battle
+        self._ennemy_ais = [(EnnemyAI(ennemy) if ennemy_ai_factory is None else ennemy_ai_factory(ennemy, player))
+                            if ennemy.stats.can_drink_potion else None for ennemy in ennemies]
+
+
+    @property
+    def first_alive_ennemy_index(self) -> int:
+        return next(iter(self._alive), 0)
+
+
+    @property
+    def alive_ennemy_indexes(self):
+        """Indexes of the ennemies still alive, in order (a view: do not modify the engine while iterating it)"""
+        return self._alive.keys()
+
+
+    @property
+    def nb_alive_ennemies(self) -> int:
+        return len(self._alive)
+
+
+    @property
+    def turn_ennemies(self) -> list[Character]:
+        """The ennemies that play during the current turn: the ennemies alive at its start"""
+        return self._turn_ennemies
+
+
+    @property
+    def all_ennemies_are_dead(self) -> bool:
+        return not self._alive
+
+
+    @property
+    def gameover(self) -> bool:
+        return not self._alive or self.player.is_dead
+
+
+    @property
+    def player_won(self) -> bool:
+        """True if the game is over and the player is still alive"""
+        return self.gameover and not self.player.is_dead
+
+
+    def start_turn(self) -> int:
+        """Begin a new turn
+
+        Returns:
+            int: The number of the new turn
+        """
+        if self.listener is not None and self.turn_nb == 0:
+            self._emit_battle_start()
+        self.turn_nb += 1
+        self._turn_ennemies = list(self._alive.values())
+        if self.listener is not None:
+            self.listener.emit(CombatEvent.TURN_START, self.turn_nb)
+        return self.turn_nb
+
+
+    def end_turn(self) -> bool:
+        """End the turn: check if the game is over
+
+        Returns:
+            bool: True if the game is over
+        """
+        gameover = self.gameover
+        if gameover and self.listener is not None:
+            self.listener.emit(CombatEvent.GAMEOVER, self.turn_nb, value=CombatEvent.WON if self.player_won else CombatEvent.LOST)
+        return gameover
+
+
+    def player_turn(self) -> ActionResult:
+        """Play the player turn: skip it if the player searched his bag at the previous turn, otherwise ask the controller.
+
+        Raises:
+            ValueError: there is no player controller
+
+        Returns:
+            ActionResult: What the player did
+        """
+        if self.player.took_a_potion:
+            self.player.reset_took_a_potion()
+            return self._emitted(ActionResult(self.player, ActionResult.SKIP_TURN))
+
+        if self.player_controller is None:
+            raise ValueError("A player controller is needed to decide the player action.")
+
+        action, ennemy_index = self.player_controller.choose_action(self)
+        return self.player_action(action, ennemy_index)
+
+
+    def player_action(self, action: int, ennemy_index: int = 0) -> ActionResult:
+        """Apply a player action
+
+        Args:
+            action (int): Character.ACTION_ATTACK or Character.ACTION_DRINKPOTION
+            ennemy_index (int, optional): Index of the attacked ennemy. Defaults to 0.
+
+        Raises:
+            ValueError: the action is unknown
+
+        Returns:
+            ActionResult: What the player did
+        """
+        if action == Character.ACTION_ATTACK:
+            ennemy = self.ennemies[ennemy_index]
+            was_dead = ennemy.is_dead
+            result = ActionResult(self.player, action, ennemy, self.player.attacks(ennemy))
+            if ennemy.is_dead:
+                self._alive.pop(ennemy_index, None)
+            return self._emitted(result, killed=not was_dead and ennemy.is_dead)
+
+        if action == Character.ACTION_DRINKPOTION:
+            return self._emitted(ActionResult(self.player, action, value=self.player.drink_a_potion()))
+
+        raise ValueError(f"Unknown player action: {action}")
+
+
+    def ennemy_turn(self, ennemy: Character, action: int | None = None) -> ActionResult:
+        """Play the turn of an ennemy. EnnemyAI decides between Attack and Drink potion if the ennemy can drink potion.
+
+        Args:
+            ennemy (Character): The ennemy who plays
+            action (int, optional): The action already decided by the AI (see ennemies_turn). Defaults to None: the AI decides now.
+
+        Returns:
+            ActionResult: What the ennemy did
+        """
+        if ennemy.is_dead:
+            self._alive.pop(self._index_of[id(ennemy)], None)  #Also removes an ennemy killed outside the engine
+            return ActionResult(ennemy, ActionResult.IS_DEAD)
+
+        if ennemy.took_a_potion:
+            ennemy.reset_took_a_potion()
+            return self._emitted(ActionResult(ennemy, ActionResult.SKIP_TURN))
+
+        # Action choice: Attack or Drink a potion
+        if action is not None:
+            action_to_do = action
+        elif ennemy.stats.can_drink_potion:
+            action_to_do = self._ennemy_ais[self._index_of[id(ennemy)]].decide_action()
+        else:
+            action_to_do = Character.ACTION_ATTACK
+
+        if action_to_do == Character.ACTION_DRINKPOTION:
+            return self._emitted(ActionResult(ennemy, action_to_do, value=ennemy.drink_a_potion()))
+
+        was_dead = self.player.is_dead     #The next ennemies of the turn still attack a dead player
+        result = ActionResult(ennemy, Character.ACTION_ATTACK, self.player, ennemy.attacks(self.player))
+        return self._emitted(result, killed=not was_dead and self.player.is_dead)
+
+
+    def decide_ennemy_actions(self) -> dict[int, int]:
+        """Decide together the actions of the ennemies of the turn that use the rule-based EnnemyAI and can drink a potion
+        (EnnemyAI.decide_actions). EnnemyAI only looks at the life of its own character, which the other ennemies do not change,
+        so these decisions can be made before any ennemy plays. The other AIs (ex: ExpectimaxAI) look at the player life:
+        they are not decided here, ennemy_turn decides them just before their ennemy plays.
+
+        Returns:
+            dict[int, int]: {id of the ennemy: action}. The ennemies that cannot decide (dead, skip their turn, cannot drink)
+                            or use another AI are missing.
+        """
+        deciding = [ennemy for ennemy in self._turn_ennemies
+                    if ennemy.stats.can_drink_potion and not ennemy.is_dead and not ennemy.took_a_potion
+                    and type(self._ennemy_ais[self._index_of[id(ennemy)]]) is EnnemyAI]
+        return dict(zip(map(id, deciding), EnnemyAI.decide_actions([self._ennemy_ais[self._index_of[id(ennemy)]] for ennemy in deciding])))
+
+
+    def ennemies_turn(self) -> list[ActionResult]:
+        """Play the turn of every ennemy alive at the start of the turn, in order: the actions of the rule-based AIs are decided
+        first (decide_ennemy_actions), the other AIs decide when their ennemy plays.
+
+        Returns:
+            list[ActionResult]: What every ennemy did, in order
+        """
+        actions = self.decide_ennemy_actions()
+        return [self.ennemy_turn(ennemy, actions.get(id(ennemy))) for ennemy in self._turn_ennemies]
+
+
+    def play_turn(self) -> list[ActionResult]:
+        """Play a complete turn: the player, then every ennemy
+
+        Returns:
+            list[ActionResult]: What every character alive at the start of the turn did, in order
+        """
+        self.start_turn()
+        results = [self.player_turn()]
+        results.extend(self.ennemies_turn())
+        self.end_turn()
+        return results
+
+
+    def run(self, max_turns: int | None = None) -> bool:
+        """Play turns until the game is over
+
+        Args:
+            max_turns (int, optional): Stop after this number of turns even if the game is not over. Defaults to None (no limit).
+
+        Returns:
+            bool: True if the player won
+        """
+        while not self.gameover and (max_turns is None or self.turn_nb < max_turns):
+            self.play_turn()
+        if self.listener is not None and not self.gameover:
+            self.listener.emit(CombatEvent.GAMEOVER, self.turn_nb, value=CombatEvent.UNFINISHED)
+        return self.player_won
+
+
+    def _emit_battle_start(self):
+        """Send the BATTLE_START event and the CHARACTER event of each character"""
+        self.listener.battle_start(len(self.ennemies))
+        for index, character in enumerate([self.player] + self.ennemies):
+            self.listener.emit(CombatEvent.CHARACTER, 0, index, value=character.stats.max_life, life=character.current_life)
+
+
+    def _event_index(self, character: Character) -> int:
+        """Index of a character in the events: 0 for the player, 1.. for the ennemies"""
+        return 0 if character is self.player else self._index_of[id(character)] + 1
+
+
+    def _emitted(self, result: ActionResult, killed: bool = False) -> ActionResult:
+        """Send the events of an action to the listener (if any)
+
+        Args:
+            result (ActionResult): The action
+            killed (bool, optional): The attack killed its target (alive before the attack, dead after): DEATH is sent.
+                                     Defaults to False.
+
+        Returns:
+            ActionResult: result, unchanged
+        """
+        if self.listener is None:
+            return result
+
+        actor = self._event_index(result.actor)
+        if result.action == ActionResult.SKIP_TURN:
+            self.listener.emit(CombatEvent.SKIP_TURN, self.turn_nb, actor)
+
+        elif result.action == Character.ACTION_ATTACK:
+            target = result.target
+            self.listener.emit(CombatEvent.ATTACK, self.turn_nb, actor, self._event_index(target), result.value, target.current_life)
+            if killed:
+                self.listener.emit(CombatEvent.DEATH, self.turn_nb, self._event_index(target))
+
+        elif result.value == Character.POTION_NOT_FOUND:
+            self.listener.emit(CombatEvent.POTION_NOT_FOUND, self.turn_nb, actor, life=result.actor.current_life)
+
+        else:
+            self.listener.emit(CombatEvent.POTION, self.turn_nb, actor, value=result.value, life=result.actor.current_life)
+        return result
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_battle_engine.py"""
@@ -0,0 +1,300 @@
+"""Catalog of the predefined setups and ennemy archetypes, read from a JSON or TOML file (default: src/catalog.json).
+The menus of SetupGame and SetupGameManually list the entries of the catalog.
+
+File format (JSON shown, TOML uses the same keys):
+    {"version": 1,
+     "archetypes": [{"key": "gobelin", "label": "Créer un gobelin", "name": "Gobelin", "max_life": 35, "attack_min": 2,
+                     "attack_max": 10, "can_drink_potion": true, "potions": [{"count": 2, "min_recup": 10, "max_recup": 35}]}, ...],
+     "setups": [{"key": "default", "label": "Jeu par défaut", "player": character, "ennemies": [character, ...]}, ...]}
+    A character of a setup has the fields of an archetype (without key and label), or {"archetype": key} with an optional "name".
+
+Parsing is cached, keyed by the path and the mtime (and size) of the file:
+- in memory: load_catalog returns the same Catalog while the file is not modified;
+- on disk (cache_dir): the validated catalog in a compiled form (marshal of plain tuples), read instead of the source file
+  at the next start. A catalog of thousands of archetypes then loads in a few milliseconds, and the JSON and TOML parsers
+  are not even imported (startup time of main.py).
+"""
+from dataclasses import dataclass
+import marshal
+import os
+import zlib
+
+from src.character import Character, CharacterStats
+from src.exceptions import InvalidCatalogError, InvalidStatsError, PoisonPotionError
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.potion import PotionStack
+from src.random_source import RandomSource
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(__file__), "catalog.json")
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jeu_de_role", "catalogs")
+VERSION = 1
+_COMPILED_FORMAT = 2    #Change it when the compiled tuples change: the old cache files are ignored
+
+_STAT_FIELDS = ("max_life", "attack_min", "attack_max", "can_drink_potion")
+_POTION_FIELDS = ("count", "min_recup", "max_recup")
+
+
+@dataclass(frozen=True, slots=True)
+class Archetype:
+    """A kind of character: its default name, its stats and the potions of its inventory.
+
+    potions are (count, min_recup, max_recup) stacks of identical potions.
+    """
+    key: str
+    label: str
+    name: str
+    stats: CharacterStats
+    potions: tuple[tuple[int, int, int], ...] = ()
+
+
+    def create(self, name: str | None = None) -> Character:
+        """A new character of this archetype
+
+        Args:
+            name (str, optional): Name of the character. Defaults to None: the name of the archetype.
+
+        Returns:
+            Character: The character, with a new inventory
+        """
+        inventory = Inventory()
+        for count, min_recup, max_recup in self.potions:
+            if count:
+                inventory.add(PotionStack(count, min_recup, max_recup))
+        return Character(name if name is not None else self.name, self.stats, inventory)
+
+
+@dataclass(frozen=True, slots=True)
+class SetupEntry:
+    """A predefined setup: the player and the ennemies (each one described by an Archetype)"""
+    key: str
+    label: str
+    player: Archetype
+    ennemies: tuple[Archetype, ...]
+
+
+    def create_game(self, rng: RandomSource | None = None) -> RoleplayGame:
+        """A new game of this setup
+
+        Args:
+            rng (RandomSource, optional): Source of the random draws of the game. Defaults to None (a new seed).
+
+        Returns:
+            RoleplayGame: A RoleplayGame ready to be play.
+        """
+        return RoleplayGame(self.player.create(), [ennemy.create() for ennemy in self.ennemies], rng)
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """The archetypes and setups of a catalog file, in the order of the file"""
+    archetypes: tuple[Archetype, ...]
+    setups: tuple[SetupEntry, ...]
+
+
+    def archetype(self, key: str) -> Archetype:
+        """The archetype with this key
+
+        Raises:
+            KeyError: no archetype has this key
+        """
+        for archetype in self.archetypes:
+            if archetype.key == key:
+                return archetype
+        raise KeyError(key)
+
+
+    def setup(self, key: str) -> SetupEntry:
+        """The setup with this key
+
+        Raises:
+            KeyError: no setup has this key
+        """
+        for setup in self.setups:
+            if setup.key == key:
+                return setup
+        raise KeyError(key)
+
+
+def _compile_character(data: dict, archetypes: dict[str, tuple], where: str) -> tuple:
+    """The character of data as (name, max_life, attack_min, attack_max, can_drink_potion, potions), checked"""
+    if "archetype" in data:
+        if data["archetype"] not in archetypes:
+            raise InvalidCatalogError(f"{where}: unknown archetype {data['archetype']!r}.")
+        character = archetypes[data["archetype"]][2:]
+        name = data.get("name", character[0])
+        if not isinstance(name, str) or not name:
+            raise InvalidCatalogError(f"{where}: the name must be a non-empty string.")
+        return (name,) + character[1:]
+
+    try:
+        name = data["name"]
+        stats = tuple(data[field] for field in _STAT_FIELDS)
+        potions = tuple(tuple(potion[field] for field in _POTION_FIELDS) for potion in data.get("potions", ()))
+    except (KeyError, TypeError) as error:
+        raise InvalidCatalogError(f"{where}: missing or invalid field {error}.") from error
+
+    if not isinstance(name, str) or not name:
+        raise InvalidCatalogError(f"{where}: the name must be a non-empty string.")
+    #type() and not isinstance(): a bool is an int
+    if not all(type(value) is int for value in stats[:3] + sum(potions, ())) or not isinstance(stats[3], bool):
+        raise InvalidCatalogError(f"{where}: the stats and potions must be integers (can_drink_potion a boolean).")
+    #Same checks as the game objects
+    try:
+        CharacterStats(*stats)
+        for count, min_recup, max_recup in potions:
+            if count < 0:
+                raise InvalidCatalogError(f"{where}: the number of potions cannot be negative.")
+            PotionStack(0, min_recup, max_recup)
+    except (InvalidStatsError, PoisonPotionError) as error:
+        raise InvalidCatalogError(f"{where}: {error}") from error
+    return (name,) + stats + (potions,)
+
+
+def compile_catalog(data: dict) -> tuple:
+    """Check the data of a catalog file and compile them in plain tuples (see build_catalog)
+
+    Args:
+        data (dict): The parsed file
+
+    Raises:
+        InvalidCatalogError: the catalog is not valid
+
+    Returns:
+        tuple: (archetypes, setups). An archetype is (key, label, name, max_life, attack_min, attack_max, can_drink_potion, potions),
+               a setup is (key, label, player, ennemies) with the characters as (name, max_life, ..., potions).
+    """
+    if not isinstance(data, dict) or data.get("version") != VERSION:
+        raise InvalidCatalogError(f"Unknown catalog version: {data.get('version') if isinstance(data, dict) else None} (supported: {VERSION}).")
+
+    archetypes = {}
+    for i, entry in enumerate(data.get("archetypes", [])):
+        key = entry.get("key") if isinstance(entry, dict) else None
+        if not isinstance(key, str) or key in archetypes:
+            raise InvalidCatalogError(f"Archetype {i + 1}: missing or duplicate key {key!r}.")
+        archetypes[key] = (key, str(entry.get("label", key))) + _compile_character(entry, {}, f"Archetype {key!r}")
+
+    if not archetypes:
+        raise InvalidCatalogError("At least one archetype is needed (menu of the predefined ennemies).")
+
+    setups = []
+    keys = set()
+    for i, entry in enumerate(data.get("setups", [])):
+        key = entry.get("key") if isinstance(entry, dict) else None
+        if not isinstance(key, str) or key in keys:
+            raise InvalidCatalogError(f"Setup {i + 1}: missing or duplicate key {key!r}.")
+        keys.add(key)
+        if not isinstance(entry.get("player"), dict) or not entry.get("ennemies"):
+            raise InvalidCatalogError(f"Setup {key!r}: a player and at least one ennemy are needed.")
+        player = _compile_character(entry["player"], archetypes, f"Setup {key!r}, player")
+        ennemies = tuple(_compile_character(ennemy, archetypes, f"Setup {key!r}, ennemy {j + 1}") for j, ennemy in enumerate(entry["ennemies"]))
+        setups.append((key, str(entry.get("label", key)), player, ennemies))
+
+    return tuple(archetypes.values()), tuple(setups)
+
+
+def build_catalog(compiled: tuple) -> Catalog:
+    """The Catalog of the tuples of compile_catalog. Characters with the same stats share the same CharacterStats."""
+    stats_cache = {}
+    def stats_of(values: tuple) -> CharacterStats:
+        stats = stats_cache.get(values)
+        if stats is None:
+            stats = stats_cache[values] = CharacterStats(*values)
+        return stats
+
+    def archetype_of(key: str, label: str, character: tuple) -> Archetype:
+        return Archetype(key, label, character[0], stats_of(character[1:5]), character[5])
+
+    archetypes, setups = compiled
+    return Catalog(tuple(archetype_of(entry[0], entry[1], entry[2:]) for entry in archetypes),
+                   tuple(SetupEntry(key, label, archetype_of("", "", player), tuple(archetype_of("", "", ennemy) for ennemy in ennemies))
+                         for key, label, player, ennemies in setups))
+
+
+def parse_catalog(path: str | os.PathLike) -> tuple:
+    """Read and compile a catalog file: TOML if its extension is .toml, JSON otherwise
+
+    Raises:
+        InvalidCatalogError: the file is not a valid catalog
+    """
+    import json
+    import tomllib
+
+    try:
+        with open(path, "rb") as file:
+            data = tomllib.load(file) if os.fspath(path).endswith(".toml") else json.load(file)
+    except (json.JSONDecodeError, tomllib.TOMLDecodeError, UnicodeDecodeError) as error:
+        raise InvalidCatalogError(f"{path}: {error}") from error
+    return compile_catalog(data)
+
+
+_catalogs: dict[str, tuple[tuple[int, int], Catalog]] = {}    #Catalogs already loaded, by path: ((mtime_ns, size), catalog)
+
+
+def load_catalog(path: str | os.PathLike | None = None, cache_dir: str | os.PathLike | None = DEFAULT_CACHE_DIR) -> Catalog:
+    """The catalog of a file: from the memory cache, then from the compiled cache in cache_dir, parsed otherwise.
+    The caches are used only while the file has the same mtime and size.
+
+    Args:
+        path (str | os.PathLike, optional): The catalog file. Defaults to None: DEFAULT_CATALOG_PATH.
+        cache_dir (str | os.PathLike, optional): Directory of the compiled catalogs. Defaults to DEFAULT_CACHE_DIR. None: memory only.
+
+    Raises:
+        InvalidCatalogError: the file is not a valid catalog
+        OSError: the file cannot be read
+
+    Returns:
+        Catalog: The catalog
+    """
+    path = os.path.abspath(path if path is not None else DEFAULT_CATALOG_PATH)
+    status = os.stat(path)
+    version = (status.st_mtime_ns, status.st_size)
+    cached = _catalogs.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    compiled = _read_compiled(path, version, cache_dir) if cache_dir is not None else None
+    if compiled is None:
+        compiled = parse_catalog(path)
+        if cache_dir is not None:
+            _write_compiled(path, version, cache_dir, compiled)
+
+    catalog = build_catalog(compiled)
+    _catalogs[path] = (version, catalog)
+    return catalog
+
+
+def _compiled_path(path: str, cache_dir: str | os.PathLike) -> str:
+    #crc32 rather than hashlib (slower to import): two paths with the same crc32 share the file, the path saved in it tells them apart
+    return os.path.join(cache_dir, f"catalog-{zlib.crc32(path.encode()):08x}.bin")
+
+
+def _read_compiled(path: str, version: tuple[int, int], cache_dir: str | os.PathLike) -> tuple | None:
+    """The compiled catalog of the cache, None if it is missing or out of date"""
+    try:
+        with open(_compiled_path(path, cache_dir), "rb") as file:
+            compiled_format, compiled_path, compiled_version, compiled = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if compiled_format != _COMPILED_FORMAT or compiled_path != path or tuple(compiled_version) != version:
+        return None
+    return compiled
+
+
+def _write_compiled(path: str, version: tuple[int, int], cache_dir: str | os.PathLike, compiled: tuple):
+    """Save the compiled catalog in the cache. A cache that cannot be written is ignored: it is only faster."""
+    cache_path = _compiled_path(path, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(marshal.dumps((_COMPILED_FORMAT, path, version, compiled)))
+        os.replace(temporary_path, cache_path)     #Another process never reads a partial file
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    catalog = load_catalog()
+    print("Configurations:", ", ".join(setup.label for setup in catalog.setups))
+    print("Ennemis prédéfinis:", ", ".join(archetype.label for archetype in catalog.archetypes))
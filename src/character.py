@@ -1,18 +1,20 @@
+import dataclasses
 from dataclasses import dataclass
-from random import randint
 import logging
 from typing import Self
 
 from src.inventory import Inventory
 from src.potion import Potion
+from src.random_source import RandomSource, GLOBAL_RANDOM_SOURCE
 from src.exceptions import InvalidNameError, InvalidStatsError, DeadCharacterError, UnabledToDrinkPotionError
 import src.constants as c
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CharacterStats:
-    """Dataclass of Stat's Character
+    """Dataclass of Stat's Character. Immutable: the same stats can be shared by many characters
+    (use dataclasses.replace to get modified stats).
 
     Raises:
         InvalidNameError: A ValueError. Max life must be >0, stat cannot be negative and min must be lower than max
@@ -33,6 +35,14 @@ class CharacterStats:
             raise InvalidStatsError("Minimum attack's points must be lower than the maximum attack's point.")
         
 
+#Stats of the predefined characters: one shared object for all the characters of the same kind
+_DEFAULT_PLAYER_STATS = CharacterStats(max_life=50, attack_min=5, attack_max=10, can_drink_potion=True)
+_DEFAULT_ENNEMY_STATS = CharacterStats(max_life=50, attack_min=5, attack_max=15, can_drink_potion=False)
+_DRAGON_STATS = CharacterStats(max_life=350, attack_min=0, attack_max=60, can_drink_potion=False)
+_GOBELIN_STATS = CharacterStats(max_life=35, attack_min=2, attack_max=10, can_drink_potion=True)
+_THIEF_STATS = CharacterStats(max_life=60, attack_min=0, attack_max=25, can_drink_potion=True)
+
+
 class Character:
     """A Character for the RoleplayGame
 
@@ -41,24 +51,29 @@ class Character:
         DeadCharacterError: Action cannot be done if the character is dead
         UnabledToDrinkPotionError: There is no potion in inventory
     """
+    __slots__ = ('_name', 'stats', 'inventory', 'current_life', 'rng', '_took_a_potion')
+
     POTION_NOT_FOUND:int = -1   #Must be an integer <0 (valid return is >=0)
 
     ACTION_ATTACK = 1
     ACTION_DRINKPOTION = 2
 
-    def __init__(self, name: str, stats: CharacterStats, inventory: Inventory = Inventory()):
+    def __init__(self, name: str, stats: CharacterStats, inventory: Inventory = Inventory(), rng: RandomSource = GLOBAL_RANDOM_SOURCE):
         """Create a Character with his stats and an inventory
 
         Args:
             name (str): Name of the character. Raise an error if it's an empty string.
             stats (CharacterStats): Stats that define the Character. Stats do not change over time
             inventory (Inventory): Inventory of the Character. Default: Empty Inventory
+            rng (RandomSource): Source of the random damages and potion recoveries. Replaced by the game source when the
+                                Character joins a RoleplayGame. Default: GLOBAL_RANDOM_SOURCE
         """
 
         self.name = name
         self.stats = stats
         self.inventory = inventory
         self.current_life = stats.max_life
+        self.rng = rng
         self._took_a_potion = False
 
 
@@ -150,10 +165,11 @@ class Character:
         if self.is_dead:
             raise DeadCharacterError(f"Unable to attack because the character {self.name} is dead.")
         
-        dammage = randint(self.stats.attack_min, self.stats.attack_max)
+        dammage = self.rng.randint(self.stats.attack_min, self.stats.attack_max)
         ennemy._be_attacked(dammage)
         
-        logger.info(f"{self.name} attacks {ennemy.name} and makes {dammage} point{"s" if dammage>1 else ''} of damage.")
+        if logger.isEnabledFor(logging.INFO):   #Hot path of the simulations: nothing is formatted when INFO is filtered
+            logger.info("%s attacks %s and makes %d point%s of damage.", self.name, ennemy.name, dammage, "s" if dammage>1 else '')
         return dammage
 
 
@@ -190,7 +206,7 @@ class Character:
             return Character.POTION_NOT_FOUND
 
         #The character is alive, can drink potion and a potion is found in inventory. Drink it and increase current life
-        nb_pt_life_gain = potion.drink()
+        nb_pt_life_gain = potion.drink(self.rng)
         self.current_life = nb_pt_life_gain + self.current_life if nb_pt_life_gain + self.current_life < self.stats.max_life else self.stats.max_life
         return nb_pt_life_gain
 
@@ -199,6 +215,56 @@ class Character:
         self._took_a_potion = False
 
 
+    def clone(self) -> Self:
+        """A copy of the character that shares the immutable stats and copies the battle state (life, inventory, flag)
+
+        Returns:
+            Character: The copy. It uses the same RandomSource.
+        """
+        character = object.__new__(type(self))
+        character._name = self._name
+        character.stats = self.stats
+        character.inventory = self.inventory.clone()
+        character.current_life = self.current_life
+        character.rng = self.rng
+        character._took_a_potion = self._took_a_potion
+        return character
+
+
+    def to_dict(self) -> dict:
+        """The character as JSON compatible data (see from_dict): name, stats, inventory and battle state.
+        The RandomSource is not included.
+
+        Returns:
+            dict: The data of the character
+        """
+        return {"name": self._name,
+                "stats": dataclasses.asdict(self.stats),
+                "inventory": self.inventory.to_dict(),
+                "current_life": self.current_life,
+                "took_a_potion": self._took_a_potion}
+
+
+    @classmethod
+    def from_dict(cls, data: dict, rng: RandomSource = GLOBAL_RANDOM_SOURCE) -> Self:
+        """Create a character from the data of to_dict
+
+        Args:
+            data (dict): The data returned by to_dict
+            rng (RandomSource, optional): Source of the random draws of the character. Defaults to GLOBAL_RANDOM_SOURCE.
+
+        Raises:
+            InvalidNameError, InvalidStatsError: invalid data
+
+        Returns:
+            Character: The character
+        """
+        character = cls(data["name"], CharacterStats(**data["stats"]), Inventory.from_dict(data["inventory"]), rng)
+        character.current_life = data["current_life"]
+        character._took_a_potion = data["took_a_potion"]
+        return character
+
+
     @classmethod
     def default_player(cls, name: str = "Joueur"):
         """A shorcut to create a Default Player Character
@@ -209,9 +275,7 @@ class Character:
         Returns:
             Character: the character with predefined stats
         """
-        return Character(name, 
-                       CharacterStats(max_life=50, attack_min=5, attack_max=10, can_drink_potion=True), 
-                       Inventory.with_potions(3,15, 50))
+        return Character(name, _DEFAULT_PLAYER_STATS, Inventory.with_potions(3,15, 50))
     
     
     @classmethod
@@ -224,9 +288,7 @@ class Character:
         Returns:
             Character: the character with predefined stats
         """
-        return Character(name, 
-                       CharacterStats(max_life=50, attack_min=5, attack_max=10, can_drink_potion=True), 
-                       Inventory())        
+        return Character(name, _DEFAULT_PLAYER_STATS, Inventory())
 
 
     @classmethod
@@ -237,8 +299,7 @@ class Character:
         Returns:
             Character: A Default ennemy Character
         """
-        stats = CharacterStats(max_life=50, attack_min=5, attack_max=15, can_drink_potion=False)
-        return cls(name, stats,  Inventory())
+        return cls(name, _DEFAULT_ENNEMY_STATS,  Inventory())
 
 
     @classmethod
@@ -248,8 +309,7 @@ class Character:
         Returns:
             Character: A Dragon Character
         """
-        stats = CharacterStats(max_life=350, attack_min=0, attack_max=60, can_drink_potion=False)
-        return cls(name, stats,  Inventory()) 
+        return cls(name, _DRAGON_STATS,  Inventory()) 
 
 
     @classmethod
@@ -259,9 +319,8 @@ class Character:
         Returns:
             Character: A Gobelin Character
         """
-        stats = CharacterStats(max_life=35, attack_min=2, attack_max=10, can_drink_potion=True)
         bag = Inventory.with_potions(nb_of_potions=2, potion_min_recup=10, potion_max_recup=35)
-        return cls(name, stats,  bag)
+        return cls(name, _GOBELIN_STATS,  bag)
 
 
     @classmethod
@@ -272,9 +331,8 @@ class Character:
         Returns:
             Character: A Thief Character
         """
-        stats = CharacterStats(max_life=60, attack_min=0, attack_max=25, can_drink_potion=True)
         bag = Inventory.with_potions(nb_of_potions=1, potion_min_recup=15, potion_max_recup=50)
-        return cls(name, stats, bag)
+        return cls(name, _THIEF_STATS, bag)
     
 
 
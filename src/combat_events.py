@@ -0,0 +1,283 @@
+"""Structured stream of combat events, written while the battles are played and read back without re-running the game.
+- BattleEngine emits the events to an optional CombatEventListener.
+- JsonlEventWriter and BinaryEventWriter buffer the events and stream them to a file (one JSON object per line,
+  or fixed size binary records): millions of battles can be recorded without keeping them in memory.
+- read_events reads both formats back, one event at a time. replay follows the life points of every character,
+  aggregate computes the SimulationSummary of the recorded battles.
+
+Characters are identified by their index: 0 is the player, 1.. are the ennemies (in the order of the game).
+"""
+from dataclasses import dataclass
+import json
+import os
+import struct
+from typing import BinaryIO, Iterable, Iterator
+
+from src.simulation_summary import SimulationSummary
+
+
+@dataclass(frozen=True, slots=True)
+class CombatEvent:
+    """One thing that happened during a battle.
+
+    life is the life points, after the event, of the character affected by the event: the target of an attack,
+    the actor otherwise. The meaning of value depends on the kind of event:
+        - BATTLE_START: number of ennemies
+        - CHARACTER: max life of the actor (one event by character after BATTLE_START, life is the life at the start)
+        - TURN_START: not used
+        - ATTACK: damage made by the actor to the target
+        - POTION: life points gained by the actor
+        - POTION_NOT_FOUND, SKIP_TURN, DEATH: not used
+        - GAMEOVER: WON, LOST or UNFINISHED (the battle was stopped before the gameover)
+    """
+    BATTLE_START = 0
+    CHARACTER = 1
+    TURN_START = 2
+    ATTACK = 3
+    POTION = 4
+    POTION_NOT_FOUND = 5
+    SKIP_TURN = 6
+    DEATH = 7
+    GAMEOVER = 8
+
+    NAMES = ("battle_start", "character", "turn_start", "attack", "potion", "potion_not_found", "skip_turn", "death", "gameover")
+
+    LOST = 0
+    WON = 1
+    UNFINISHED = -1
+
+    NO_CHARACTER = -1
+
+    kind: int
+    battle: int
+    turn: int
+    actor: int = NO_CHARACTER
+    target: int = NO_CHARACTER
+    value: int = 0
+    life: int = 0
+
+
+    @property
+    def name(self) -> str:
+        return CombatEvent.NAMES[self.kind]
+
+
+    def __str__(self) -> str:
+        actor = _character_name(self.actor)
+        match self.kind:
+            case CombatEvent.BATTLE_START:
+                return f"Partie {self.battle}: début de la partie contre {self.value} ennemi{'s' if self.value > 1 else ''}."
+            case CombatEvent.CHARACTER:
+                return f"{actor}: {self.life}/{self.value} points de vie."
+            case CombatEvent.TURN_START:
+                return f"Tour {self.turn}"
+            case CombatEvent.ATTACK:
+                return f"{actor} attaque {_character_name(self.target)} et fait {self.value} point{'s' if self.value > 1 else ''} de dommage (vie: {self.life})."
+            case CombatEvent.POTION:
+                return f"{actor} boit une potion et récupère {self.value} point{'s' if self.value > 1 else ''} de vie (vie: {self.life})."
+            case CombatEvent.POTION_NOT_FOUND:
+                return f"{actor} a fouillé son sac mais il n'y a plus de potion."
+            case CombatEvent.SKIP_TURN:
+                return f"{actor} passe son tour."
+            case CombatEvent.DEATH:
+                return f"{actor} est mort."
+            case _:
+                return {CombatEvent.WON: "Le joueur a GAGNÉ.", CombatEvent.LOST: "Le joueur a PERDU."}.get(self.value, "Partie interrompue.")
+
+
+def _character_name(index: int) -> str:
+    return "Joueur" if index == 0 else f"Ennemi {index}"
+
+
+class CombatEventListener:
+    """Receive the events of the battles played by a BattleEngine. The default implementation ignores them.
+
+    The engine calls battle_start at the beginning of each battle, then emit for every event of the battle
+    (the CHARACTER events included).
+    """
+
+    def battle_start(self, nb_ennemies: int):
+        """A new battle begins
+
+        Args:
+            nb_ennemies (int): Number of ennemies of the battle
+        """
+
+
+    def emit(self, kind: int, turn: int, actor: int = CombatEvent.NO_CHARACTER, target: int = CombatEvent.NO_CHARACTER, value: int = 0, life: int = 0):
+        """An event of the battle in progress. See CombatEvent for the fields."""
+
+
+class EventCollector(CombatEventListener):
+    """Keep the events in memory. Useful for tests and short battles."""
+
+    def __init__(self):
+        self.events: list[CombatEvent] = []
+        self._battle = -1
+
+
+    def battle_start(self, nb_ennemies: int):
+        self._battle += 1
+        self.events.append(CombatEvent(CombatEvent.BATTLE_START, self._battle, 0, value=nb_ennemies))
+
+
+    def emit(self, kind: int, turn: int, actor: int = CombatEvent.NO_CHARACTER, target: int = CombatEvent.NO_CHARACTER, value: int = 0, life: int = 0):
+        self.events.append(CombatEvent(kind, self._battle, turn, actor, target, value, life))
+
+
+class _EventWriter(CombatEventListener):
+    """Base of the streaming writers: number the battles, buffer the encoded events and write them by block.
+
+    Use it as a context manager (or call close) so the last events are written.
+    """
+    DEFAULT_BUFFER_SIZE = 4096     #Number of events written at once
+
+    def __init__(self, file: BinaryIO, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """Create the writer
+
+        Args:
+            file (BinaryIO): Binary file opened for writing. Closed by close().
+            buffer_size (int, optional): Number of events kept before writing them. Defaults to DEFAULT_BUFFER_SIZE.
+        """
+        self._file = file
+        self._buffer_size = buffer_size
+        self._buffer: list = []
+        self._battle = -1
+
+
+    @classmethod
+    def open(cls, path: str | os.PathLike, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """Create a writer to a new file (an existing file is replaced)"""
+        return cls(open(path, "wb"), buffer_size)
+
+
+    def battle_start(self, nb_ennemies: int):
+        self._battle += 1
+        self.emit(CombatEvent.BATTLE_START, 0, value=nb_ennemies)
+
+
+    def emit(self, kind: int, turn: int, actor: int = CombatEvent.NO_CHARACTER, target: int = CombatEvent.NO_CHARACTER, value: int = 0, life: int = 0):
+        self._buffer.append(self._encode(kind, self._battle, turn, actor, target, value, life))
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+
+    def flush(self):
+        """Write the buffered events"""
+        self._file.write(b"".join(self._buffer))
+        self._buffer.clear()
+        self._file.flush()
+
+
+    def close(self):
+        """Write the buffered events and close the file"""
+        self.flush()
+        self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def _encode(self, kind: int, battle: int, turn: int, actor: int, target: int, value: int, life: int) -> bytes:
+        raise NotImplementedError
+
+
+class JsonlEventWriter(_EventWriter):
+    """Write one JSON object by event and by line: {"event": "attack", "battle": 0, "turn": 1, "actor": 0, ...}"""
+
+    def _encode(self, kind: int, battle: int, turn: int, actor: int, target: int, value: int, life: int) -> bytes:
+        return (f'{{"event": "{CombatEvent.NAMES[kind]}", "battle": {battle}, "turn": {turn}, "actor": {actor}, '
+                f'"target": {target}, "value": {value}, "life": {life}}}\n').encode()
+
+
+class BinaryEventWriter(_EventWriter):
+    """Write a MAGIC header, then one record of RECORD.size bytes by event (little endian, fields of CombatEvent in order)"""
+    MAGIC = b"RPGEVT1\n"
+    RECORD = struct.Struct("<BIIiiii")
+
+    def __init__(self, file: BinaryIO, buffer_size: int = _EventWriter.DEFAULT_BUFFER_SIZE):
+        super().__init__(file, buffer_size)
+        self._file.write(BinaryEventWriter.MAGIC)
+
+
+    def _encode(self, kind: int, battle: int, turn: int, actor: int, target: int, value: int, life: int) -> bytes:
+        return BinaryEventWriter.RECORD.pack(kind, battle, turn, actor, target, value, life)
+
+
+def read_events(path: str | os.PathLike) -> Iterator[CombatEvent]:
+    """Read the events of a log written by JsonlEventWriter or BinaryEventWriter (the format is detected).
+    The events are read one block at a time: the log is never loaded in memory.
+
+    Args:
+        path (str | os.PathLike): The log file
+
+    Raises:
+        ValueError: a line of a JSONL log is not a valid event
+
+    Yields:
+        CombatEvent: The events, in the order they were written
+    """
+    with open(path, "rb") as file:
+        if file.read(len(BinaryEventWriter.MAGIC)) == BinaryEventWriter.MAGIC:
+            record_size = BinaryEventWriter.RECORD.size
+            while block := file.read(record_size * _EventWriter.DEFAULT_BUFFER_SIZE):
+                for fields in BinaryEventWriter.RECORD.iter_unpack(block[:len(block) - len(block) % record_size]):
+                    yield CombatEvent(*fields)
+            return
+
+        file.seek(0)
+        kinds = {name: kind for kind, name in enumerate(CombatEvent.NAMES)}
+        for line in file:
+            if line.strip():
+                try:
+                    fields = json.loads(line)
+                    yield CombatEvent(kinds[fields["event"]], fields["battle"], fields["turn"], fields["actor"],
+                                      fields["target"], fields["value"], fields["life"])
+                except (KeyError, TypeError, json.JSONDecodeError) as error:
+                    raise ValueError(f"Invalid combat event: {line!r}") from error
+
+
+def replay(events: Iterable[CombatEvent]) -> Iterator[tuple[CombatEvent, list[int]]]:
+    """Follow the life points of the characters along the events, without re-running the game
+
+    Args:
+        events (Iterable[CombatEvent]): Events of one or many battles (ex: read_events(path))
+
+    Yields:
+        tuple[CombatEvent, list[int]]: Each event, with the life points of every character of its battle after the event
+                                       (index 0: the player). The list is updated in place: copy it to keep it.
+    """
+    lives: list[int] = []
+    for event in events:
+        if event.kind == CombatEvent.BATTLE_START:
+            lives = [0] * (event.value + 1)
+        elif event.kind in (CombatEvent.CHARACTER, CombatEvent.POTION):
+            lives[event.actor] = event.life
+        elif event.kind == CombatEvent.ATTACK:
+            lives[event.target] = event.life
+        yield event, lives
+
+
+def aggregate(events: Iterable[CombatEvent]) -> SimulationSummary:
+    """Results of the recorded battles
+
+    Args:
+        events (Iterable[CombatEvent]): Events of one or many battles (ex: read_events(path))
+
+    Returns:
+        SimulationSummary: Win rate and turns statistics of the battles that have a GAMEOVER event
+    """
+    summary = SimulationSummary()
+    for event in events:
+        if event.kind == CombatEvent.GAMEOVER:
+            summary.add_battle(None if event.value == CombatEvent.UNFINISHED else event.value == CombatEvent.WON, event.turn)
+    return summary
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_combat_events.py"""
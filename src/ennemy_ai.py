@@ -1,16 +1,28 @@
 """A really simple way to give so AI to an ennemy"""
-from random import randint
-
 from src.character import Character
 from src.exceptions import DeadCharacterError
+from src.random_source import RandomSource
 
 class EnnemyAI():
     """Simulate actions choice for a Ennemy Character
     Actions possibles are ACTION_ATTACK and ACTION_DRINKPOTION
+
+    An EnnemyAI keeps no state between two decisions: create it once by ennemy and reuse it for the whole battle.
     """
+    __slots__ = ('character', 'rng')
+
+    ALWAYS_DRINK_BELOW_PCT = 5      #He is somehow stupid: he try to take a potion before checking if he has potion
+    MAY_DRINK_BELOW_PCT = 25        #50/50 between attack and drink a potion, if he has a potion
 
-    def __init__(self, character: Character):
+    def __init__(self, character: Character, rng: RandomSource | None = None):
+        """Create the AI of a character
+
+        Args:
+            character (Character): The ennemy controlled by the AI
+            rng (RandomSource, optional): Source of the random decisions. Defaults to None: the source of the character.
+        """
         self.character = character
+        self.rng = rng if rng is not None else character.rng
 
 
     def decide_action(self) -> int:
@@ -29,17 +41,55 @@ class EnnemyAI():
 
         pourcent_life_remains = self.character.current_life / self.character.stats.max_life * 100
         
-        if pourcent_life_remains < 5: #He is somehow stupid: he try to take a potion before checking if he has potion
+        if pourcent_life_remains < EnnemyAI.ALWAYS_DRINK_BELOW_PCT:
             return Character.ACTION_DRINKPOTION
         
-        if pourcent_life_remains < 25 and self.character.inventory.has_potion():
-            if randint(False, True):
+        if pourcent_life_remains < EnnemyAI.MAY_DRINK_BELOW_PCT and self.character.inventory.has_potion():
+            if self.rng.coin_flip():
                 return Character.ACTION_DRINKPOTION
 
         return Character.ACTION_ATTACK
-        
 
-        
+
+    @staticmethod
+    def decide_actions(ennemy_ais: list["EnnemyAI"]) -> list[int]:
+        """Decide the actions of many ennemies in one pass (ex: all the ennemies that act during a turn).
+        Same rules as decide_action (the subclasses decide with their own decide_action): the ennemies that do not need a random draw are decided without any call,
+        and the random draws are done in the order of the list.
+
+        Args:
+            ennemy_ais (list[EnnemyAI]): The AI of each ennemy
+
+        Raises:
+            DeadCharacterError: an ennemy is dead
+
+        Returns:
+            list[int]: Character.ACTION_ATTACK or Character.ACTION_DRINKPOTION for each ennemy, in the same order
+        """
+        attack, drink = Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION
+        always_drink_below, may_drink_below = EnnemyAI.ALWAYS_DRINK_BELOW_PCT, EnnemyAI.MAY_DRINK_BELOW_PCT
+
+        actions = [attack] * len(ennemy_ais)
+        for index, ennemy_ai in enumerate(ennemy_ais):
+            if type(ennemy_ai) is not EnnemyAI:     #Subclasses (ex: ExpectimaxAI) have their own rules
+                actions[index] = ennemy_ai.decide_action()
+                continue
+
+            character = ennemy_ai.character
+            stats = character.stats
+            if not stats.can_drink_potion:
+                continue
+            if character.current_life <= 0:
+                raise DeadCharacterError("Character is dead: he cannot decide anything.")
+
+            pourcent_life_remains = character.current_life / stats.max_life * 100
+            if pourcent_life_remains < always_drink_below:
+                actions[index] = drink
+            elif pourcent_life_remains < may_drink_below and character.inventory.has_potion() and ennemy_ai.rng.coin_flip():
+                actions[index] = drink
+        return actions
+
+
 
 if __name__ == "__main__":
 
@@ -15,4 +15,7 @@ class EmptyPotionError(Exception):
     pass
 
 class PoisonPotionError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class InvalidCatalogError(ValueError):
+    pass
@@ -0,0 +1,189 @@
+"""A search-based AI for the ennemies (hard difficulty): expectimax over the random damages and potion recoveries.
+The rule-based EnnemyAI stays the default AI and the fast baseline.
+
+The search looks at a duel between the ennemy and the player, from the ennemy point of view:
+- the ennemy chooses between attack and drink a potion (max node)
+- the damages and the recoveries are uniform between their min and max (chance nodes)
+- the player is expected to attack this ennemy at each of his turns (the worst case for the ennemy)
+The search deepens one ennemy turn at a time until the time budget is spent, and keeps the evaluated states in a
+transposition table for the whole battle.
+"""
+import time
+
+from src.character import Character
+from src.ennemy_ai import EnnemyAI
+from src.exceptions import DeadCharacterError
+from src.potion import Potion
+from src.random_source import RandomSource
+
+#State of a duel: (ennemy life, number of potions drunk, ennemy skips his next turn, player life, player skips his next turn)
+DuelState = tuple[int, int, bool, int, bool]
+
+
+class _TimeBudgetExceeded(Exception):
+    pass
+
+
+class ExpectimaxAI(EnnemyAI):
+    """Decide the action of an ennemy by expectimax search, within a time budget by decision.
+
+    Use it as the ennemy AI factory of a game: RoleplayGame(..., ennemy_ai_factory=ExpectimaxAI),
+    or functools.partial(ExpectimaxAI, time_budget=0.01) to change the budget.
+    The depth reached depends on the speed of the computer: for reproducible decisions (replays, tests),
+    use time_budget=math.inf and a small max_depth.
+    """
+    __slots__ = ('opponent', 'time_budget', 'max_depth', 'last_depth', '_potions', '_table', '_deadline', '_nb_nodes')
+
+    DEFAULT_TIME_BUDGET = 0.005     #Seconds by decision
+    DEFAULT_MAX_DEPTH = 12          #Number of ennemy turns looked ahead
+    MAX_TABLE_SIZE = 500_000        #The transposition table is cleared when it gets bigger
+    WIN, LOSS = 1.0, -1.0           #Value of a state where the player / the ennemy is dead
+
+    def __init__(self, character: Character, opponent: Character, time_budget: float = DEFAULT_TIME_BUDGET,
+                 max_depth: int = DEFAULT_MAX_DEPTH, rng: RandomSource | None = None):
+        """Create the AI of an ennemy for one battle
+
+        Args:
+            character (Character): The ennemy controlled by the AI
+            opponent (Character): The player
+            time_budget (float, optional): Seconds allowed by decision. The first turn is always looked at. Defaults to DEFAULT_TIME_BUDGET.
+            max_depth (int, optional): Maximum number of ennemy turns looked ahead. Defaults to DEFAULT_MAX_DEPTH.
+            rng (RandomSource, optional): Not used by the search. Defaults to None: the source of the character.
+        """
+        super().__init__(character, rng)
+        self.opponent = opponent
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.last_depth = 0             #Depth of the last complete search (for statistics and tests)
+        #Recovery ranges of the potions of the ennemy, in the order they will be drunk
+        self._potions = tuple((obj.min_recup, obj.max_recup) for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty)
+        self._table: dict[tuple[DuelState, int], float] = {}
+        self._deadline = 0.0
+        self._nb_nodes = 0
+
+
+    def decide_action(self) -> int:
+        """Decide the action with the deepest search done within the time budget
+
+        Raises:
+            DeadCharacterError: the ennemy is dead
+
+        Returns:
+            int: Character.ACTION_ATTACK or Character.ACTION_DRINKPOTION
+        """
+        if self.character.is_dead:
+            raise DeadCharacterError("Character is dead: he cannot decide anything.")
+
+        if not self.character.stats.can_drink_potion:
+            return Character.ACTION_ATTACK
+
+        if len(self._table) > ExpectimaxAI.MAX_TABLE_SIZE:
+            self._table.clear()
+
+        state = self._current_state()
+        self._deadline = time.perf_counter() + self.time_budget
+        best_action = Character.ACTION_ATTACK
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_action = self._best_action(state, depth)
+            except _TimeBudgetExceeded:
+                break
+            self.last_depth = depth
+        return best_action
+
+
+    def _current_state(self) -> DuelState:
+        nb_potions = sum(1 for obj in self.character.inventory if isinstance(obj, Potion) and not obj.is_empty)
+        drunk = max(0, len(self._potions) - nb_potions)
+        return (self.character.current_life, drunk, self.character.took_a_potion, self.opponent.current_life, self.opponent.took_a_potion)
+
+
+    def _best_action(self, state: DuelState, depth: int) -> int:
+        """Action with the best expected value. The first depth is never interrupted. Attack wins the ties."""
+        check_time = depth > 1
+        attack = self._attack_value(state, depth, check_time)
+        drink = self._drink_value(state, depth, check_time)
+        return Character.ACTION_DRINKPOTION if drink > attack else Character.ACTION_ATTACK
+
+
+    def _ennemy_value(self, state: DuelState, depth: int, check_time: bool) -> float:
+        """Expected value when the ennemy plays (max node)"""
+        if depth == 0:
+            return self._evaluate(state)
+
+        key = (state, depth)
+        value = self._table.get(key)
+        if value is not None:
+            return value
+
+        self._nb_nodes += 1
+        if check_time and not self._nb_nodes % 64 and time.perf_counter() > self._deadline:
+            raise _TimeBudgetExceeded()
+
+        life, drunk, skip, player_life, player_skip = state
+        if skip:
+            value = self._player_value((life, drunk, False, player_life, player_skip), depth - 1, check_time)
+        else:
+            value = max(self._attack_value(state, depth, check_time), self._drink_value(state, depth, check_time))
+
+        self._table[key] = value
+        return value
+
+
+    def _attack_value(self, state: DuelState, depth: int, check_time: bool) -> float:
+        """Expected value of an attack of the ennemy (chance node over the damages)"""
+        life, drunk, _, player_life, player_skip = state
+        attack_min, attack_max = self.character.stats.attack_min, self.character.stats.attack_max
+
+        total = 0.0
+        for damage in range(attack_min, attack_max + 1):
+            if damage >= player_life:
+                #Every bigger damage kills the player too
+                total += ExpectimaxAI.WIN * (attack_max - damage + 1)
+                break
+            total += self._player_value((life, drunk, False, player_life - damage, player_skip), depth - 1, check_time)
+        return total / (attack_max - attack_min + 1)
+
+
+    def _drink_value(self, state: DuelState, depth: int, check_time: bool) -> float:
+        """Expected value of drinking a potion (chance node over the recoveries). Without potion, the turn is lost."""
+        life, drunk, _, player_life, player_skip = state
+        if drunk >= len(self._potions):
+            return self._player_value((life, drunk, True, player_life, player_skip), depth - 1, check_time)
+
+        max_life = self.character.stats.max_life
+        recup_min, recup_max = self._potions[drunk]
+        total = 0.0
+        for recup in range(recup_min, recup_max + 1):
+            if life + recup >= max_life:
+                #Every bigger recovery gives the max life too
+                total += self._player_value((max_life, drunk + 1, True, player_life, player_skip), depth - 1, check_time) * (recup_max - recup + 1)
+                break
+            total += self._player_value((life + recup, drunk + 1, True, player_life, player_skip), depth - 1, check_time)
+        return total / (recup_max - recup_min + 1)
+
+
+    def _player_value(self, state: DuelState, depth: int, check_time: bool) -> float:
+        """Expected value after the player turn: he attacks this ennemy, or skips his turn (chance node over the damages)"""
+        life, drunk, skip, player_life, player_skip = state
+        if player_skip:
+            return self._ennemy_value((life, drunk, skip, player_life, False), depth, check_time)
+
+        attack_min, attack_max = self.opponent.stats.attack_min, self.opponent.stats.attack_max
+        total = 0.0
+        for damage in range(attack_min, attack_max + 1):
+            if damage >= life:
+                total += ExpectimaxAI.LOSS * (attack_max - damage + 1)
+                break
+            total += self._ennemy_value((life - damage, drunk, skip, player_life, False), depth, check_time)
+        return total / (attack_max - attack_min + 1)
+
+
+    def _evaluate(self, state: DuelState) -> float:
+        """Value of a state at the search horizon, strictly between LOSS and WIN: difference of the life ratios"""
+        life, _, _, player_life, _ = state
+        return (life / self.character.stats.max_life - player_life / self.opponent.stats.max_life) / 2
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_expectimax_ai.py"""
@@ -1,56 +1,274 @@
 """Roleplay Game in command line."""
 
+import itertools
 import logging
+import sys
+from typing import TYPE_CHECKING
 
+from src.battle_engine import BattleEngine, ActionResult, EnnemyAIFactory, PlayerController, ReplayController
 from src.character import Character, CharacterStats
-from src.ennemy_ai import EnnemyAI
+from src.combat_events import CombatEventListener
 from src.inventory import Inventory
-from src.utils import get_valid_user_input
+from src.profiling import CountingRandomSource, NullProfiler, NULL_PROFILER, PHASE_AI_DECISION, PHASE_ENNEMY_TURN, PHASE_GAMEOVER_CHECK, \
+                          PHASE_PLAYER_DECISION, PHASE_PLAYER_TURN, PHASE_RECAP_RENDER
+from src.random_source import RandomSource
+from src.renderer import Renderer, ColorRenderer, PlainRenderer
+from src.utils import get_int_in_range_input, get_valid_user_input, read_input
 import src.constants as c
 
-logger = logging.getLogger("__name__")
+if TYPE_CHECKING:
+    from src.policy_solver import PolicyTable
+
+logger = logging.getLogger(__name__)
+
+
+class CliPlayerController(PlayerController):
+    """Ask the user, in terminal, which action the player does"""
+
+    def __init__(self, game: "RoleplayGame"):
+        self.game = game
+
+
+    def choose_action(self, engine: BattleEngine) -> tuple[int, int]:
+        """Ask action to do to user (between Attack and Drink a potion) and which ennemy to attack if there is more than one
+
+        Returns:
+            tuple[int, int]: (action, index of the ennemy to attack)
+        """
+        with self.game.profiler.phase(PHASE_PLAYER_DECISION):
+            return self._ask_action(engine)
+
+
+    def _ask_action(self, engine: BattleEngine) -> tuple[int, int]:
+        if self.game.hints is not None:
+            self.game._display_hint()
+        self.game.renderer.flush()
+
+        #Action choice
+        #note: the ⚔️ seams to delete the next caracter: 2 spaces add in string
+        player_answer = get_valid_user_input(f"Souhaitez-vous attaquer ⚔️  ({Character.ACTION_ATTACK}) ou boire une potion ✨ ({Character.ACTION_DRINKPOTION})? ", (Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION))
+        player_answer = int(player_answer)
+
+        #If there is more than 1 ennemy, need to ask the user which one he want to attack. Otherwise, there is only one annemy.
+        attack_ennemy_index = 0
+        if player_answer == Character.ACTION_ATTACK and len(engine.ennemies) > 1:
+            self.game._display_ennemies()
+            self.game.renderer.flush()
+            nb_ennemies = len(engine.ennemies)
+            attack_ennemy_index = get_int_in_range_input(f"Quel ennemi attaquez-vous (1-{nb_ennemies})? ", 1, nb_ennemies) - 1   # -1 because display list begin to 1 (not 0)
+
+        return player_answer, attack_ennemy_index
 
 
 class RoleplayGame:
+    """Front end in terminal of a BattleEngine: display the game and ask the player actions to the user"""
+    MAX_LISTED_ENNEMIES = 10    #Above this number of ennemies, the lists of ennemies only show the first ones still alive
 
-    def __init__(self, player_character: Character, ennemy_characters: list[Character]):
+    def __init__(self, player_character: Character, ennemy_characters: list[Character], rng: RandomSource | None = None,
+                 renderer: Renderer | None = None, ennemy_ai_factory: EnnemyAIFactory | None = None):
         """Initialize the RoleplayGame
 
         Args:
             player_character (Character): The player. Must be a valid Character
             ennemy_characters (list[Character]): A list of ennemies. Must contains at least one ennemy
+            rng (RandomSource, optional): Source of every random draw of the game, given to all the characters.
+                                          Defaults to None: a RandomSource with a new seed.
+            renderer (Renderer, optional): Output of the game. Defaults to None: with colors in a terminal, without colors otherwise.
+            ennemy_ai_factory (EnnemyAIFactory, optional): Create the AI of each ennemy (ex: ExpectimaxAI for the hard difficulty).
+                                                          Defaults to None: the rule-based EnnemyAI.
         """
         self._player = player_character
         self._ennemies = ennemy_characters
-        self._tour_nb = 0
+        self._engine = None
+        self._profiler: NullProfiler = NULL_PROFILER
+        self.rng = rng if rng is not None else RandomSource()
+        self.renderer = renderer if renderer is not None else (ColorRenderer() if sys.stdout.isatty() else PlainRenderer())
+        self.ennemy_ai_factory = ennemy_ai_factory
+        self.hints: "PolicyTable | None" = None     #Best player actions of the setup (see src.policy_solver): shown before each choice of the user
+
+        if logger.isEnabledFor(logging.DEBUG):  #settings_info formats every character
+            logger.debug("Creation of RoleplayGame with the followings parameters:")
+            logger.debug(self.settings_info)
+
+
+    @property
+    def player(self) -> Character:
+        return self._player
+
+
+    @property
+    def ennemies(self) -> list[Character]:
+        return self._ennemies
+
+
+    def clone(self, rng: RandomSource | None = None) -> "RoleplayGame":
+        """A copy of the game, ready to be played: copy the battle state of each character (faster than copy.deepcopy)
+
+        Args:
+            rng (RandomSource, optional): Source of the random draws of the copy. Defaults to None (a new seed).
+
+        Returns:
+            RoleplayGame: The copy. It uses the same renderer, the same ennemy AI and the same hints.
+        """
+        game = type(self)(self._player.clone(), [ennemy.clone() for ennemy in self._ennemies], rng, self.renderer, self.ennemy_ai_factory)
+        game.hints = self.hints
+        return game
+
+
+    def to_dict(self) -> dict:
+        """The setup of the game (the characters and their current state) as JSON compatible data (see from_dict).
+        The RandomSource is not included: keep rng.seed to replay the same draws.
+
+        Returns:
+            dict: {"player": player data, "ennemies": [ennemy data]}
+        """
+        return {"player": self._player.to_dict(), "ennemies": [ennemy.to_dict() for ennemy in self._ennemies]}
+
+
+    @classmethod
+    def from_dict(cls, data: dict, rng: RandomSource | None = None) -> "RoleplayGame":
+        """Create a game from the data of to_dict
+
+        Args:
+            data (dict): The data returned by to_dict
+            rng (RandomSource, optional): Source of the random draws of the game. Defaults to None (a new seed).
+
+        Returns:
+            RoleplayGame: The game
+        """
+        return cls(Character.from_dict(data["player"]), [Character.from_dict(ennemy) for ennemy in data["ennemies"]], rng)
+
+
+    @property
+    def rng(self) -> RandomSource:
+        return self._rng
+
+
+    @rng.setter
+    def rng(self, rng: RandomSource):
+        """Use a new source of random draws for the game and all its characters"""
+        if self._profiler.enabled and not isinstance(rng, CountingRandomSource):
+            rng = CountingRandomSource(rng, self._profiler)
+        self._rng = rng
+        self._player.rng = rng
+        for ennemy in self._ennemies:
+            ennemy.rng = rng
+
+
+    @property
+    def profiler(self) -> NullProfiler:
+        """Timers and counters of the phases of the turns played by play(). Defaults to NULL_PROFILER: nothing is measured."""
+        return self._profiler
+
+
+    @profiler.setter
+    def profiler(self, profiler: NullProfiler | None):
+        """Measure the next turns with profiler (ex: a TurnProfiler), or stop measuring them with None.
+        A TurnProfiler also counts the random draws: the characters get a CountingRandomSource of the same source.
+        Set it before play(): the ennemy AIs keep the source of the characters at the start of the game.
+        """
+        source = self._rng.source if isinstance(self._rng, CountingRandomSource) else self._rng
+        self._profiler = profiler if profiler is not None else NULL_PROFILER
+        self.rng = source
+
+
+    @property
+    def _tour_nb(self) -> int:
+        return self._engine.turn_nb if self._engine else 0
+
 
-        logger.debug("Creation of RoleplayGame with the followings parameters:")
-        logger.debug(self.settings_info)
+    def simulate(self, player_controller: PlayerController, max_turns: int | None = None, listener: CombatEventListener | None = None) -> bool:
+        """Play the game without any console I/O until the game is over
+
+        Args:
+            player_controller (PlayerController): Decide the player actions
+            max_turns (int, optional): Stop after this number of turns even if the game is not over. Defaults to None (no limit).
+            listener (CombatEventListener, optional): Receive the events of the battle (ex: a JsonlEventWriter). Defaults to None.
+
+        Raises:
+            ValueError: player and ennnemies are not properly setup
+
+        Returns:
+            bool: True if the player won
+        """
+        self._engine = BattleEngine(self._player, self._ennemies, player_controller, listener, self.ennemy_ai_factory)
+        return self._engine.run(max_turns)
 
 
-    def play(self, print_settings = True):
+    def fast_forward(self, player_controller: ReplayController, turn_nb: int | None = None) -> int:
+        """Replay turns without any console I/O. Stop after turn_nb turns, at the gameover, or before a turn
+        where the player must decide and no recorded decision is left. play() then continues the game.
+
+        Args:
+            player_controller (ReplayController): The recorded player decisions
+            turn_nb (int, optional): Number of turns to replay. Defaults to None (all the recorded decisions).
+
+        Raises:
+            ValueError: player and ennnemies are not properly setup
+
+        Returns:
+            int: Number of turns played
+        """
+        self._engine = BattleEngine(self._player, self._ennemies, player_controller, ennemy_ai_factory=self.ennemy_ai_factory)
+        while not self.gameover and (turn_nb is None or self._engine.turn_nb < turn_nb):
+            if not self._player.took_a_potion and not player_controller.remaining:
+                break
+            self._engine.play_turn()
+        return self._engine.turn_nb
+
+
+    def resume_at(self, turn_nb: int):
+        """Continue a game saved after turn_nb turns, with its characters in their saved state (see src.savegame).
+        play() then continues from the turn turn_nb + 1.
+
+        Args:
+            turn_nb (int): Number of turns played before the save. 0: the game is not started.
+
+        Raises:
+            ValueError: player and ennnemies are not properly setup
+        """
+        if turn_nb <= 0:
+            self._engine = None
+            return
+        self._engine = BattleEngine(self._player, self._ennemies, ennemy_ai_factory=self.ennemy_ai_factory)
+        self._engine.turn_nb = turn_nb
+
+
+    def play(self, print_settings = True, player_controller: PlayerController | None = None):
         """Manage the game. Launch each tour until the game is over.
+        A game already started (ex: with fast_forward) continues from its current turn.
 
         Args:
             print_settings (bool, optional): If True, print the settings at the beginning of the game. Defaults to True.
+            player_controller (PlayerController, optional): Decide the player actions. Defaults to None (ask the user).
 
         Raises:
             ValueError: player and ennnemies are not properly setup
         """
-        #Valid if game setup is ok
-        if not self._player or len(self._ennemies) <= 0:
-            raise ValueError("Game cannot be start because the settings are invalids (player is missing or there is no ennemy). ")
+        if player_controller is None:
+            player_controller = CliPlayerController(self)
+
+        if self._engine is None:
+            #Valid if game setup is ok (the engine raise a ValueError otherwise)
+            self._engine = BattleEngine(self._player, self._ennemies, player_controller, ennemy_ai_factory=self.ennemy_ai_factory)
+        else:
+            self._engine.player_controller = player_controller
+        self.renderer.battle_start(self._tour_nb)
 
         #Play!
-        print("DÉBUT DE LA PARTIE")
         if print_settings:
-            print("Voici les participants:")
-            print(self.settings_info)
-
-        while not self.gameover:
+            self.renderer.settings(self._player, self._ennemies)
+
+        profiler = self._profiler
+        while True:
+            with profiler.phase(PHASE_GAMEOVER_CHECK):
+                gameover = self.gameover
+            if gameover:
+                break
             self._turn()
         
         self._finalize_gameover()
+        self.renderer.flush()
 
 
     @property
@@ -60,145 +278,84 @@ class RoleplayGame:
         Returns:
             str: A multiple lines str that give all details about player and ennemy Characters and there inventory
         """
-        str = "Joueur:\n"             
-        str += f"  {self._player}"         #spaces before: for indent infos. Do not remove...
-        str += ''.join([f"\n    {obj}" for obj in self._player.inventory])
-        
-        str +=  "\nEnnemi(s):"
+        lines = ["Joueur:", f"  {self._player}"]        #spaces before: for indent infos. Do not remove...
+        lines.extend(f"    {obj}" for obj in self._player.inventory)
+
+        lines.append("Ennemi(s):")
         for ennemy in self._ennemies:
-            str += f"\n  {ennemy}"
-            str += ''.join([f"\n    {obj}" for obj in ennemy.inventory])
+            lines.append(f"  {ennemy}")
+            lines.extend(f"    {obj}" for obj in ennemy.inventory)
 
-        return str
+        return "\n".join(lines)
 
 
     def _turn(self):
         """Manage the game playing tour. Check if the pass tour rule must be apply. 
         Player plays, then ennemies. Display the tour recap at the end of the tour."""
-        self._tour_nb += 1
+        profiler = self._profiler
+        profiler.count("turns")
+        self._engine.start_turn()
 
-        print(f"{c.BLUE}{'-' * 20} Tour {self._tour_nb} {'-' * 70}{c.RESET}")
+        renderer = self.renderer
+        renderer.turn_start(self._tour_nb)
 
         #Player play first
-        print("C'est votre tour!")
-        if self._player.took_a_potion:
-            print(f"{c.MAGENTA}Vous{c.RESET} passez votre tour puisque vous avez fouillé votre sac pour une potion au tour précédent ⌛.")
-            self._player.reset_took_a_potion()
-            input('Appuyer sur retour pour continuer...')
-        else:
-            self._player_turn()
+        with profiler.phase(PHASE_PLAYER_TURN):
+            result = self._engine.player_turn()
+            renderer.player_action(result)
+            if result.action == ActionResult.SKIP_TURN:
+                renderer.flush()
+                read_input('Appuyer sur retour pour continuer...')
         
-        #Ennemies play next
-        print(f"C'est au tour {"des ennemies" if len(self._ennemies) >1 else "de l'ennemi."} ")
-        for ennemy in self._ennemies:
-            if ennemy.is_dead:
-                print(f"{ennemy.name} est {c.RED}mort{c.RESET} 💀.")
-                continue
+        #Ennemies play next (the dead ones are skipped by the engine)
+        renderer.ennemies_turn(len(self._ennemies))
+        with profiler.phase(PHASE_AI_DECISION):
+            actions = self._engine.decide_ennemy_actions()
+        for ennemy in self._engine.turn_ennemies:
+            with profiler.phase(PHASE_ENNEMY_TURN):
+                renderer.ennemy_action(self._engine.ennemy_turn(ennemy, actions.get(id(ennemy))))
 
-            #Ennemy is alive
-            if ennemy.took_a_potion:
-                print(f"{ennemy.name} passe son tour puisqu'il a fouillé son sac pour une potion au tour précédent ⌛.")
-                ennemy.reset_took_a_potion()
-                continue
-
-            self._ennemy_turn(ennemy)
+        self._engine.end_turn()
 
         #Tour end: display life points of each Character
-        print("Récapitulatif du tour:")
-        print("\t"+ self._player.life_status)
-        print('\n'.join(["\t"+ ennemy.life_status for ennemy in self._ennemies]))
-
-
-    def _player_turn(self):
-        """Ask action to do to user (between Attack and Drink a potion) and manage it
-        """
-
-        #Action choice
-        #note: the ⚔️ seams to delete the next caracter: 2 spaces add in string
-        player_answer = get_valid_user_input(f"Souhaitez-vous attaquer ⚔️  ({Character.ACTION_ATTACK}) ou boire une potion ✨ ({Character.ACTION_DRINKPOTION})? ", (Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION))
-        player_answer = int(player_answer)
-
-        # Action management
-        #   Attack
-        if player_answer == Character.ACTION_ATTACK:
-            
-            #If there is more than 1 ennemy, need to ask the user which one he want to attack. Otherwise, there is only one annemy.
-            if len(self._ennemies) > 1:
-                self._display_ennemies()
-                valid_choices = tuple(x for x in range(1, len(self._ennemies)+1)) 
-                attack_ennemy_index = int(get_valid_user_input(f"Quel ennemi attaquez-vous {valid_choices}? ", valid_choices)) - 1   # -1 because display list begin to 1 (not 0)
-            
-            else:   #Only one ennemy : attack this one
-                attack_ennemy_index = 0
-
-            damage = self._player.attacks(self._ennemies[attack_ennemy_index])
-            print(f"{c.MAGENTA}Vous{c.RESET} attaquez {self._ennemies[attack_ennemy_index].name} et lui faites {c.RED}{damage}{c.RESET} point{'s' if damage > 1 else ''} de dommage. ⚔️")
-        
-        #   Drink a potion
-        elif player_answer == Character.ACTION_DRINKPOTION:
-            life_pt_gain = self._player.drink_a_potion()
-
-            if  life_pt_gain == Character.POTION_NOT_FOUND:
-                #Comment: Changement dans règle -> si pas de potion alors pas de recup et perte du tour...
-                print(f"{c.MAGENTA}Vous{c.RESET} avez fouillé votre sac mais il n'y a plus de potion. Vie: {self._player.life_status}.")
-            else:
-                print(f"{c.MAGENTA}Vous{c.RESET} buvez une potion et récupérez {c.GREEN}{life_pt_gain}{c.RESET} point{'s' if life_pt_gain > 1 else ''} de vie ❤️. Vie: {self._player.life_status}.")
-
-        else:   #Just a safety display. This else should never be performed becaue every valid player_answer are already managed
-            logger.error("Un événement qui ne devait pas se produire est survenu: le _tour_player semble mal géré.")
-            print("Hein? Ça ne devrait pas se produire ça")
-
-
-    def _ennemy_turn(self, ennemy: Character):
-        """Manage the ennemy tour
-        Certain ennemy can drink potion so EnnemiAI need to decide whick action to take between Attack and Drink potion.
-
-        Args:
-            ennemy (Character): _description_
-        """
-
-        # Action choice: Attack or Drink a potion
-        if ennemy.stats.can_drink_potion:
-            ennemy_ai = EnnemyAI(ennemy)
-            action_to_do = ennemy_ai.decide_action()
-        else:
-            action_to_do = Character.ACTION_ATTACK
-        
-        # Action management
-        #   Attack
-        if action_to_do == Character.ACTION_ATTACK:
-           damage = ennemy.attacks(self._player)
-           print(f"{ennemy.name} vous attaque et fait {c.RED}{damage}{c.RESET} point{"s" if damage > 1 else ''} de dommage ⚔️")
-
-        #   Drink potion
-        elif action_to_do == Character.ACTION_DRINKPOTION:
-            life_pt_gain = ennemy.drink_a_potion()
-
-            if life_pt_gain == Character.POTION_NOT_FOUND:
-                print(f"{ennemy.name} a fouillé son sac mais il n'y a plus de potion. Vie: {ennemy.life_status}.")
+        with profiler.phase(PHASE_RECAP_RENDER):
+            if len(self._ennemies) <= RoleplayGame.MAX_LISTED_ENNEMIES:
+                renderer.turn_recap(self._player, self._ennemies)
             else:
-                print(f"{ennemy.name} récupère {c.GREEN}{life_pt_gain}{c.RESET} point{'s' if life_pt_gain > 1 else ''} de vie ❤️. Vie: {ennemy.life_status}).")
+                renderer.turn_recap(self._player, self._first_alive_ennemies(), self._engine.nb_alive_ennemies, len(self._ennemies))
+            renderer.flush()
 
 
     def _finalize_gameover(self):
         """Display the final gameover status result"""
+        self.renderer.gameover(not self._player.is_dead)
 
-        print(f"{c.BLUE}{'-' * 20} 🏁 Fin de partie 🏁 {'-' * 50}{c.RESET}")
-        
-        if self._player.is_dead:
-            print("Vous avez PERDU 💀")
-        else:
-            print("Vous avez GAGNÉ 🏆!")
+
+    def _display_hint(self):
+        """Display the best action of the player according to the hints"""
+        action, ennemy_index = self.hints.best_action(self._player, self._ennemies)
+        self.renderer.hint(action, ennemy_index, self._ennemies)
 
 
     def _display_ennemies(self):
         """Display the ordered list of ennemies. Useful to let the user choose who he wants to attack"""
-        print(f"Liste des ennemies:")
-        print('\n'.join( [f"\t{i+1}. {ennemy}" for i, ennemy in enumerate(self._ennemies) ]))
+        if len(self._ennemies) <= RoleplayGame.MAX_LISTED_ENNEMIES:
+            self.renderer.ennemy_list(enumerate(self._ennemies))
+        else:
+            alive_indexes = itertools.islice(self._engine.alive_ennemy_indexes, RoleplayGame.MAX_LISTED_ENNEMIES)
+            self.renderer.ennemy_list([(i, self._ennemies[i]) for i in alive_indexes], self._engine.nb_alive_ennemies, len(self._ennemies))
+
+
+    def _first_alive_ennemies(self) -> list[Character]:
+        """The first MAX_LISTED_ENNEMIES ennemies still alive"""
+        alive_indexes = itertools.islice(self._engine.alive_ennemy_indexes, RoleplayGame.MAX_LISTED_ENNEMIES)
+        return [self._ennemies[i] for i in alive_indexes]
 
 
     @property
     def _all_ennemies_are_dead(self) -> bool:
+        if self._engine is not None:
+            return self._engine.all_ennemies_are_dead
         for ennemy in self._ennemies:
             if not ennemy.is_dead:
                 return False
@@ -211,12 +368,13 @@ class RoleplayGame:
 
 
     @classmethod
-    def default_settings(cls, player_name = "Joueur", ennemy_name = "Ennemi"):
+    def default_settings(cls, player_name = "Joueur", ennemy_name = "Ennemi", rng: RandomSource | None = None):
         """A shortcut to create a valid default game setup
 
         Args:
             player_name (str, optional): Player name. Defaults to "Joueur".
             ennemy_names (tuple, optional): Ennemy names. Defaults to ("Ennemi 1","Ennemi 2").
+            rng (RandomSource, optional): Source of the random draws of the game. Defaults to None (a new seed).
 
         Returns:
             _type_: A RoleplayGame ready to be play.
@@ -238,16 +396,17 @@ class RoleplayGame:
                                    can_drink_potion=False),
                     Inventory())
 
-        return cls(player, [ennemy])
+        return cls(player, [ennemy], rng)
 
 
     @classmethod
-    def settings_with_two_weak_ennemies(cls, player_name = "Joueur", ennemy_names = ("Ennemi 1","Ennemi 2")):
+    def settings_with_two_weak_ennemies(cls, player_name = "Joueur", ennemy_names = ("Ennemi 1","Ennemi 2"), rng: RandomSource | None = None):
         """A shortcut to create a valid setup game with two weak ennemies and a default player
 
         Args:
             player_name (str, optional): Player name. Defaults to "Joueur".
             ennemy_names (tuple, optional): Ennemy names. Defaults to ("Ennemi 1","Ennemi 2").
+            rng (RandomSource, optional): Source of the random draws of the game. Defaults to None (a new seed).
 
         Returns:
             _type_: A RoleplayGame ready to be play.
@@ -278,7 +437,7 @@ class RoleplayGame:
                                    can_drink_potion=True),
                     Inventory())
 
-        return cls(player, [ennemy1, ennemy2])
+        return cls(player, [ennemy1, ennemy2], rng)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,405 @@
+"""Game server: many command line sessions in one process, over local TCP (telnet or netcat: one answer by line).
+- GameServer: asyncio server. Each connection runs a session (main.main by default: the setup menus and the games, unchanged)
+  in its own thread, with a SessionInputProvider as input provider (see src/utils.py) and its SessionOutput as sys.stdout.
+  The game code stays synchronous: a session thread that asks a question waits for the line read by the event loop.
+- Memory by session is bounded: small thread stack (SESSION_STACK_SIZE), lines longer than MAX_LINE_LENGTH close the session,
+  the output is sent by blocks of at most OUTPUT_BUFFER_SIZE characters and the session waits while the client does not read them.
+  Sessions idle for idle_timeout seconds are closed, and at most max_sessions run at the same time.
+- run_load: the load generator. Clients that play scripted sessions concurrently, with a think time between their answers.
+Run (from the root of the project):
+    python -m src.game_server --port 4000                      #then: telnet localhost 4000
+    python -m src.game_server --load 2000 --think-time 0.5     #server and 2000 clients in this process
+"""
+import argparse
+import asyncio
+from contextvars import ContextVar
+import itertools
+import logging
+import re
+import sys
+import threading
+import time
+from typing import Callable, TextIO
+
+from src.utils import InputProvider, use_input_provider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_MAX_SESSIONS = 5000
+DEFAULT_IDLE_TIMEOUT = 600.0
+SESSION_STACK_SIZE = 512 * 1024     #Bytes. The threads of the sessions only run the game code: the default stack (8 Mio) is useless
+MAX_LINE_LENGTH = 1024              #Bytes by answer. Also bounds the bytes read in advance from the client (2 * MAX_LINE_LENGTH)
+OUTPUT_BUFFER_SIZE = 4096           #Characters written by the game before they are sent
+ANSI_CODE = re.compile(r"\033\[[0-9;]*m")   #Color codes of the menus (the games use a PlainRenderer without colors)
+
+#Manual setup where the player kills the ennemy at the first attack, then quits: the same game whatever the random draws
+DEMO_ANSWERS = ("3", "1", "Héros", "100", "50 50", "0", "3", "Cible", "10", "1 1", "n", "7", "n", "o", "1", "o", "o", "1", "n")
+
+
+def play_command_line_session():
+    """The session of the command line: main.main() (main.py at the root of the project)"""
+    import main
+    main.main()
+
+
+class _Connection:
+    """The connection of a session: the calls of the session thread, run in the event loop of the server"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, idle_timeout: float):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.idle_timeout = idle_timeout
+
+
+    def call(self, coroutine):
+        """Run coroutine in the event loop and wait for its result (from the session thread)"""
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        except RuntimeError:    #Event loop closed: the server is stopped
+            coroutine.close()
+            raise ConnectionError("The server is stopped.") from None
+        return future.result()
+
+
+    async def send(self, data: bytes):
+        self.writer.write(data)
+        await self.writer.drain()     #The session waits while the client does not read: the buffer of the transport stays small
+
+
+    async def read_line(self) -> str:
+        """The next line of the client, without the end of line
+
+        Raises:
+            EOFError: the client closed the connection, was idle for idle_timeout seconds or sent a line too long
+        """
+        try:
+            line = await asyncio.wait_for(self.reader.readline(), self.idle_timeout)
+        except TimeoutError:
+            await self.send("\r\nSession expirée.\r\n".encode())
+            raise EOFError("Idle session.") from None
+        except ValueError:     #Line longer than the limit of the reader
+            await self.send("\r\nRéponse trop longue.\r\n".encode())
+            raise EOFError("Line too long.") from None
+        if not line:
+            raise EOFError("Connection closed by the client.")
+        return line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+class SessionOutput:
+    """The sys.stdout of a session: the text is buffered and sent to the client (new lines as \\r\\n, for telnet)"""
+
+    def __init__(self, connection: _Connection, colors: bool = True):
+        """Create the output
+
+        Args:
+            connection (_Connection): The connection of the session
+            colors (bool, optional): If False, the ANSI color codes are removed (isatty() is False too). Defaults to True.
+        """
+        self._connection = connection
+        self.colors = colors
+        self._parts: list[str] = []
+        self._size = 0
+
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= OUTPUT_BUFFER_SIZE:
+            self.flush()
+        return len(text)
+
+
+    def flush(self):
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        if not self.colors:
+            text = ANSI_CODE.sub("", text)
+        data = text.replace("\n", "\r\n").encode()
+        self._parts.clear()
+        self._size = 0
+        self._connection.call(self._connection.send(data))
+
+
+    def isatty(self) -> bool:
+        return self.colors
+
+
+class SessionInputProvider(InputProvider):
+    """The answers of the client of a session. The output is sent before each question is read."""
+
+    def __init__(self, connection: _Connection, output: SessionOutput):
+        self._connection = connection
+        self._output = output
+
+
+    def read_line(self, question: str) -> str:
+        self._output.write(question)
+        self._output.flush()
+        return self._connection.call(self._connection.read_line())
+
+
+_session_output: ContextVar[SessionOutput | None] = ContextVar("session_output", default=None)
+
+
+class _StdoutRouter:
+    """sys.stdout while a server runs: the SessionOutput of the current session thread, the previous sys.stdout elsewhere"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.nb_servers = 0
+
+
+    def _target(self):
+        output = _session_output.get()
+        return output if output is not None else self.stream
+
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+
+    def flush(self):
+        self._target().flush()
+
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+def _install_stdout_router():
+    if not isinstance(sys.stdout, _StdoutRouter):
+        sys.stdout = _StdoutRouter(sys.stdout)
+    sys.stdout.nb_servers += 1
+
+
+def _uninstall_stdout_router():
+    router = sys.stdout
+    if isinstance(router, _StdoutRouter):
+        router.nb_servers -= 1
+        if router.nb_servers <= 0:
+            sys.stdout = router.stream
+
+
+class GameServer:
+    """Asyncio TCP server of game sessions, one thread by session.
+
+    Use it as an async context manager (start, then close), or start() then serve_forever().
+    """
+
+    def __init__(self, session: Callable[[], None] = play_command_line_session, host: str = DEFAULT_HOST, port: int = 0,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, colors: bool = True):
+        """Create the server
+
+        Args:
+            session (Callable[[], None], optional): Run one session: its questions are read with src.utils.read_input and its output
+                                                    is written to sys.stdout. Defaults to play_command_line_session (main.main).
+            host (str, optional): Address of the server. Defaults to DEFAULT_HOST (local connections only).
+            port (int, optional): Port of the server. Defaults to 0: a free port, see the attribute port after start().
+            max_sessions (int, optional): Sessions at the same time. The next connections are refused. Defaults to DEFAULT_MAX_SESSIONS.
+            idle_timeout (float, optional): Seconds without answer before a session is closed. Defaults to DEFAULT_IDLE_TIMEOUT.
+            colors (bool, optional): Send the games with their ANSI colors. Defaults to True.
+        """
+        self.session = session
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.colors = colors
+        self.nb_sessions = 0            #Running now
+        self.nb_finished_sessions = 0
+        self.nb_refused_sessions = 0
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._threads: set[threading.Thread] = set()
+        self._session_numbers = itertools.count(1)
+
+
+    async def start(self) -> "GameServer":
+        """Listen to the connections. Returns the server."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_LINE_LENGTH)
+        self.port = self._server.sockets[0].getsockname()[1]
+        _install_stdout_router()
+        return self
+
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+
+    async def close(self, timeout: float = 5.0):
+        """Stop listening, close the running sessions and wait for the end of their threads
+
+        Args:
+            timeout (float, optional): Seconds to wait for the threads. Defaults to 5.0.
+        """
+        if self._server is None:
+            return
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()     #The sessions waiting for an answer get an EOFError
+        threads = list(self._threads)
+        deadline = time.monotonic() + timeout
+        await asyncio.to_thread(lambda: [thread.join(max(0.0, deadline - time.monotonic())) for thread in threads])
+        await self._server.wait_closed()
+        self._server = None
+        _uninstall_stdout_router()
+
+
+    async def __aenter__(self) -> "GameServer":
+        return await self.start()
+
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+    def _refuse(self, writer: asyncio.StreamWriter):
+        self.nb_refused_sessions += 1
+        writer.write("Serveur complet, réessayez plus tard.\r\n".encode())
+        writer.close()
+
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.nb_sessions >= self.max_sessions:
+            self._refuse(writer)
+            return
+
+        loop = asyncio.get_running_loop()
+        connection = _Connection(loop, reader, writer, self.idle_timeout)
+        done = loop.create_future()
+        thread = threading.Thread(target=self._run_session, args=(connection, done), name=f"session-{next(self._session_numbers)}", daemon=True)
+        previous_stack_size = threading.stack_size(SESSION_STACK_SIZE)
+        try:
+            thread.start()
+        except RuntimeError:    #No more threads available
+            self._refuse(writer)
+            return
+        finally:
+            threading.stack_size(previous_stack_size)
+        self.nb_sessions += 1
+        self._writers.add(writer)
+        self._threads.add(thread)
+        try:
+            await done
+        finally:
+            self.nb_sessions -= 1
+            self.nb_finished_sessions += 1
+            self._writers.discard(writer)
+            self._threads.discard(thread)
+            writer.close()
+
+
+    def _run_session(self, connection: _Connection, done: asyncio.Future):
+        """Body of a session thread"""
+        output = SessionOutput(connection, self.colors)
+        token = _session_output.set(output)
+        try:
+            with use_input_provider(SessionInputProvider(connection, output)):
+                self.session()
+            output.flush()
+        except (EOFError, ConnectionError):
+            pass    #The client left, was idle too long or the server stopped
+        except Exception:
+            logger.exception("Session ended by an error.")
+        finally:
+            _session_output.reset(token)
+            try:
+                connection.loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+            except RuntimeError:    #Event loop closed
+                pass
+
+
+async def play_scripted_session(host: str, port: int, answers: tuple[str, ...] | list[str], think_time: float = 0.0) -> str:
+    """A client of a GameServer: send the answers, one by line, with think_time seconds before each answer
+
+    Args:
+        host (str): Address of the server
+        port (int): Port of the server
+        answers (tuple[str, ...] | list[str]): The answers of the session, in order
+        think_time (float, optional): Seconds before each answer (an idle client). Defaults to 0.0.
+
+    Returns:
+        str: Everything sent by the server, until it closes the connection
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def send_answers():
+        for answer in answers:
+            if think_time:
+                await asyncio.sleep(think_time)
+            writer.write(f"{answer}\n".encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send_answers())
+    try:
+        output = await reader.read()
+    finally:
+        sender.cancel()
+        writer.close()
+    return output.decode("utf-8", errors="replace")
+
+
+async def run_load(host: str, port: int, nb_clients: int, answers: tuple[str, ...] | list[str] = DEMO_ANSWERS,
+                   think_time: float = 0.0, ramp_up: float = 0.0) -> list[str]:
+    """The load generator: nb_clients concurrent clients that play the same scripted session
+
+    Args:
+        host (str): Address of the server
+        port (int): Port of the server
+        nb_clients (int): Number of clients
+        answers (tuple[str, ...] | list[str], optional): The answers of each session. Defaults to DEMO_ANSWERS.
+        think_time (float, optional): Seconds before each answer. Defaults to 0.0.
+        ramp_up (float, optional): Seconds over which the connections are spread (the backlog of the server is limited). Defaults to 0.0.
+
+    Returns:
+        list[str]: The output of each session
+    """
+    async def client(i: int) -> str:
+        if ramp_up:
+            await asyncio.sleep(ramp_up * i / nb_clients)
+        return await play_scripted_session(host, port, answers, think_time)
+
+    return await asyncio.gather(*(client(i) for i in range(nb_clients)))
+
+
+async def _load_test(nb_clients: int, think_time: float, max_sessions: int):
+    import resource
+
+    async with GameServer(max_sessions=max_sessions, colors=False) as server:
+        memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        outputs = await run_load(server.host, server.port, nb_clients, think_time=think_time, ramp_up=min(2.0, nb_clients / 1000))
+        seconds = time.perf_counter() - start
+        memory_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    completed = sum("Aurevoir!" in output for output in outputs)
+    print(f"{completed}/{nb_clients} sessions terminées en {seconds:.2f} s ({completed / seconds:.0f} sessions/s), "
+          f"{server.nb_refused_sessions} refusées")
+    print(f"Mémoire max du processus: +{(memory_after - memory_before) / 1024:.1f} Mio ({(memory_after - memory_before) / max(1, nb_clients):.1f} Kio par session)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur de parties en TCP (telnet ou netcat).")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Adresse d'écoute (défaut: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=4000, help="Port d'écoute (défaut: 4000)")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="Nombre maximal de sessions simultanées")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Secondes sans réponse avant la fermeture d'une session")
+    parser.add_argument("--load", type=int, metavar="CLIENTS", help="Test de charge: un serveur et CLIENTS clients scriptés dans ce processus")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Avec --load: secondes avant chaque réponse des clients")
+    args = parser.parse_args()
+
+    if args.load:
+        asyncio.run(_load_test(args.load, args.think_time, max(args.max_sessions, args.load)))
+    else:
+        async def serve():
+            async with GameServer(host=args.host, port=args.port, max_sessions=args.max_sessions, idle_timeout=args.idle_timeout) as server:
+                print(f"Serveur de parties sur {server.host}:{server.port} (telnet {server.host} {server.port})")
+                await server.serve_forever()
+        asyncio.run(serve())
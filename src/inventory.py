@@ -1,24 +1,43 @@
-"""Wrapper around a list"""
+"""Wrapper around a list, indexed by type and by value:
+- the objects are kept in insertion order (iteration order)
+- has_potion, get_a_potion and get(object) do not scan the inventory
+- identical potions can be stored as a single PotionStack entry. The stack counts as its number of bottles
+  (len) and is iterated bottle by bottle, as if each Potion was stored alone.
+"""
 import logging
 
-from src.potion import Potion
+from src.potion import Potion, PotionStack
 
 logger = logging.getLogger(__name__)
 
 
 class Inventory():
+    __slots__ = ('_items', '_next_slot', '_slots_by_type', '_slots_by_value', '_unhashable_slots', '_nb_objects')
 
     def __init__(self):
         """Create an empty Inventory"""
-        self._list = []
+        self._items: dict[int, object] = {}                 #slot number -> object. Slots are increasing: dict order is insertion order
+        self._next_slot = 0
+        self._slots_by_type: dict[type, dict[int, None]] = {}   #Slots in insertion order. A type without object is removed
+        self._slots_by_value: dict[object, list[int]] = {}  #Hashable objects only. Usually one slot by value: a small list
+        self._unhashable_slots: dict[int, None] = {}
+        self._nb_objects = 0                                #A PotionStack counts as its number of bottles
 
 
     def __len__(self):
-        return len(self._list)
+        return self._nb_objects
 
 
     def __iter__(self):
-        return self._list.__iter__()
+        for obj in self._items.values():
+            if isinstance(obj, PotionStack):
+                yield from obj
+            else:
+                yield obj
+
+
+    def __contains__(self, searched_object: object) -> bool:
+        return self._find_slot(searched_object) is not None
 
 
     def add(self, new_object: object):
@@ -28,34 +47,98 @@ class Inventory():
             new_object (object): object or list of objects. A list of objects will be extend in the inventory.
         """
         if isinstance(new_object, list):
-            logger.debug(f"Add items {new_object} in Inventory")
-            self._list.extend(new_object)
+            logger.debug("Add items %s in Inventory", new_object)
+            for obj in new_object:
+                self._add_one(obj)
         else:
-            logger.debug(f"Add item {new_object} in Inventory")
-            self._list.append(new_object)
+            logger.debug("Add item %s in Inventory", new_object)
+            self._add_one(new_object)
 
 
     def get(self, object_to_remove: object):
-        """Get an object from the bag.
+        """Get an object from the bag (the first one equal to object_to_remove).
+        A bottle of a PotionStack can only be taken with get_a_potion.
 
         Args:
- i           object_to_remove (object): Object to remove
+            object_to_remove (object): Object to remove
 
         Returns:
             _type_: object or None if not found
         """
-        logger.debug(f"Inventory.get{object_to_remove}.")
-        try:
-            self._list.remove(object_to_remove)
-            logger.debug("Object found in the inventory (return the object).")
-            return object_to_remove
-        except ValueError:
+        logger.debug("Inventory.get%s.", object_to_remove)
+        slot = self._find_slot(object_to_remove)
+        if slot is None:
             logger.debug("Object not found in the inventory (return None).")
             return None
+
+        self._remove_slot(slot)
+        logger.debug("Object found in the inventory (return the object).")
+        return object_to_remove
         
 
+    def clone(self) -> "Inventory":
+        """A copy of the inventory for a new game: Potions and PotionStacks are copied (drinking changes them),
+        other objects are shared.
+
+        Returns:
+            Inventory: The copy
+        """
+        inventory = Inventory()
+        for obj in self._items.values():
+            if isinstance(obj, (Potion, PotionStack)):
+                obj = obj.clone()
+            inventory._add_one(obj)
+        return inventory
+
+
+    def to_dict(self) -> dict:
+        """The content of the inventory as JSON compatible data (see from_dict).
+        Objects other than potions are kept as their str.
+
+        Returns:
+            dict: {"items": [{"type": "potion", ...}, {"type": "potion_stack", ...}, {"type": "object", "value": str}]}
+        """
+        items = []
+        for obj in self._items.values():
+            if isinstance(obj, PotionStack):
+                items.append({"type": "potion_stack", "count": obj.count, "min_recup": obj.min_recup, "max_recup": obj.max_recup})
+            elif isinstance(obj, Potion):
+                items.append({"type": "potion", "min_recup": obj.min_recup, "max_recup": obj.max_recup, "is_empty": obj.is_empty})
+            else:
+                items.append({"type": "object", "value": str(obj)})
+        return {"items": items}
+
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Inventory":
+        """Create an inventory from the data of to_dict. The potions get new ids.
+
+        Args:
+            data (dict): The data returned by to_dict
+
+        Raises:
+            ValueError: unknown type of item
+
+        Returns:
+            Inventory: The inventory
+        """
+        inventory = Inventory()
+        for item in data["items"]:
+            if item["type"] == "potion_stack":
+                inventory.add(PotionStack(item["count"], item["min_recup"], item["max_recup"]))
+            elif item["type"] == "potion":
+                potion = Potion(item["min_recup"], item["max_recup"])
+                potion.is_empty = item["is_empty"]
+                inventory.add(potion)
+            elif item["type"] == "object":
+                inventory.add(item["value"])
+            else:
+                raise ValueError(f"Unknown inventory item: {item}")
+        return inventory
+
+
     def clear(self):
-        self._list.clear()
+        self.__init__()
 
 
     def get_a_potion(self):
@@ -64,13 +147,21 @@ class Inventory():
         Returns:
             _type_: a Potion or None if not found
         """
-        for object_in_bag in self._list:
-            if isinstance(object_in_bag, Potion):
-                potion = object_in_bag
-                return self.get(potion)
-        return None
-        
-        
+        slot = self._first_potion_slot()
+        if slot is None:
+            return None
+
+        potion = self._items[slot]
+        if not isinstance(potion, PotionStack):
+            self._remove_slot(slot)
+            return potion
+
+        stack = potion
+        potion = stack.take()
+        self._nb_objects -= 1
+        if not stack.count:
+            self._remove_slot(slot)
+        return potion
     
     
     def has_potion(self) -> bool:
@@ -79,15 +170,84 @@ class Inventory():
         Returns:
             bool: True if a Potion is found, False otherwise
         """        
-        for object_in_bag in self._list:
-            if isinstance(object_in_bag, Potion):
-                return True
-        return False
+        return any(issubclass(object_type, (Potion, PotionStack)) for object_type in self._slots_by_type)
+
+
+    def _add_one(self, new_object: object):
+        if isinstance(new_object, PotionStack):
+            if not new_object.count:
+                return      #An empty stack is not stored: it would count as a potion
+            self._nb_objects += new_object.count
+        else:
+            self._nb_objects += 1
+
+        slot = self._next_slot
+        self._next_slot += 1
+        self._items[slot] = new_object
+
+        object_type = type(new_object)
+        self._slots_by_type.setdefault(object_type, {})[slot] = None
+
+        try:
+            self._slots_by_value.setdefault(new_object, []).append(slot)
+        except TypeError:   #unhashable object
+            self._unhashable_slots[slot] = None
+
+
+    def _remove_slot(self, slot: int):
+        removed_object = self._items.pop(slot)
+        self._nb_objects -= removed_object.count if isinstance(removed_object, PotionStack) else 1
+
+        object_type = type(removed_object)
+        same_type_slots = self._slots_by_type[object_type]
+        del same_type_slots[slot]
+        if not same_type_slots:
+            del self._slots_by_type[object_type]
+
+        if slot in self._unhashable_slots:
+            del self._unhashable_slots[slot]
+            return
+
+        same_value_slots = self._slots_by_value[removed_object]
+        if len(same_value_slots) == 1:
+            del self._slots_by_value[removed_object]
+        else:
+            same_value_slots.remove(slot)
+
+
+    def _find_slot(self, searched_object: object) -> int | None:
+        """Slot of the first object equal to searched_object, None if not found"""
+        slot = None
+        try:
+            same_value_slots = self._slots_by_value.get(searched_object)
+            if same_value_slots:
+                slot = same_value_slots[0]
+        except TypeError:   #unhashable object: only an unhashable object can be equal
+            pass
+
+        #Objects without hash are compared one by one (rare: an Inventory usually contains Potions)
+        for unhashable_slot in self._unhashable_slots:
+            if slot is not None and unhashable_slot > slot:
+                break
+            if self._items[unhashable_slot] == searched_object:
+                return unhashable_slot
+        return slot
+
+
+    def _first_potion_slot(self) -> int | None:
+        """Slot of the first Potion (or Potion subclass, or PotionStack) in insertion order, None if there is none"""
+        first_slot = None
+        for object_type, slots in self._slots_by_type.items():
+            if issubclass(object_type, (Potion, PotionStack)):
+                slot = next(iter(slots))
+                if first_slot is None or slot < first_slot:
+                    first_slot = slot
+        return first_slot
 
 
     @classmethod
     def with_potions(cls, nb_of_potions: int, potion_min_recup: int, potion_max_recup: int):
-        """Shortcut to create a bag of identical potions
+        """Shortcut to create a bag of identical potions, stored as one PotionStack
 
         Args:
             total (int): Total number of potions to add in the bag
@@ -98,7 +258,7 @@ class Inventory():
             _type_: Bag of Potions
         """
         potions_bag = cls()
-        potions_bag.add( [Potion(potion_min_recup, potion_max_recup) for _ in range(nb_of_potions) ])
+        potions_bag.add(PotionStack(nb_of_potions, potion_min_recup, potion_max_recup))
         return potions_bag
 
 
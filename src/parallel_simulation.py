@@ -0,0 +1,98 @@
+"""Simulate many battles of a RoleplayGame setup on every core, with reproducible results.
+The battles are split in chunks of a fixed size. Each chunk has its own random stream, seeded from the simulation
+seed and the chunk number, so the summary only depends on the seed: never on the number of workers.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+
+from src.battle_engine import BattleEngine, PlayerController, PotionThresholdController
+from src.combat_events import CombatEventListener
+from src.game import RoleplayGame
+from src.random_source import BufferedRandomSource
+from src.simulation_summary import SimulationSummary
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_TURNS = 1000
+
+
+def chunk_seed(seed: int, chunk_index: int) -> int:
+    """Seed of the random stream of a chunk. Independent of the process that simulates the chunk.
+
+    Args:
+        seed (int): The simulation seed
+        chunk_index (int): Number of the chunk
+
+    Returns:
+        int: A 64 bits seed
+    """
+    digest = hashlib.sha256(f"{seed}:{chunk_index}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def simulate_chunk(game: RoleplayGame, player_controller: PlayerController, seed: int, nb_battles: int, max_turns: int = DEFAULT_MAX_TURNS,
+                   listener: CombatEventListener | None = None) -> SimulationSummary:
+    """Simulate battles on a copy of the game, in the current process
+
+    Args:
+        game (RoleplayGame): The setup to simulate, with its ennemy AI factory. Not modified.
+        player_controller (PlayerController): Decide the player actions
+        seed (int): Seed of the random stream of this chunk
+        nb_battles (int): Number of battles to simulate
+        max_turns (int, optional): A battle not over after this number of turns is unfinished. Defaults to DEFAULT_MAX_TURNS.
+        listener (CombatEventListener, optional): Receive the events of all the battles (ex: a BinaryEventWriter). Defaults to None.
+
+    Returns:
+        SimulationSummary: Results of the battles
+    """
+    rng = BufferedRandomSource(seed)
+
+    summary = SimulationSummary()
+    for _ in range(nb_battles):
+        battle = game.clone(rng)    #One random stream for the whole chunk
+        engine = BattleEngine(battle.player, battle.ennemies, player_controller, listener, battle.ennemy_ai_factory)
+        player_won = engine.run(max_turns)
+        summary.add_battle(player_won if engine.gameover else None, engine.turn_nb)
+    return summary
+
+
+def run_parallel_simulation(game: RoleplayGame, player_controller: PlayerController, nb_battles: int, seed: int = 0,
+                            nb_workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE, max_turns: int = DEFAULT_MAX_TURNS) -> SimulationSummary:
+    """Shard the battles across a pool of processes and merge the results
+
+    Args:
+        game (RoleplayGame): The setup to simulate, with its ennemy AI factory (must be picklable). Not modified.
+        player_controller (PlayerController): Decide the player actions. Must be picklable.
+        nb_battles (int): Number of battles to simulate
+        seed (int, optional): Simulation seed. The same seed always gives the same summary. Defaults to 0.
+        nb_workers (int, optional): Number of processes. Defaults to None (number of processors).
+        chunk_size (int, optional): Number of battles by random stream. Changing it changes the results. Defaults to DEFAULT_CHUNK_SIZE.
+        max_turns (int, optional): A battle not over after this number of turns is unfinished. Defaults to DEFAULT_MAX_TURNS.
+
+    Returns:
+        SimulationSummary: Results of all the battles
+    """
+    chunk_sizes = [min(chunk_size, nb_battles - start) for start in range(0, nb_battles, chunk_size)]
+    seeds = [chunk_seed(seed, chunk_index) for chunk_index in range(len(chunk_sizes))]
+
+    summary = SimulationSummary()
+    with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+        chunk_summaries = executor.map(simulate_chunk,
+                                       [game] * len(chunk_sizes), [player_controller] * len(chunk_sizes),
+                                       seeds, chunk_sizes, [max_turns] * len(chunk_sizes))
+        for chunk_summary in chunk_summaries:
+            summary.merge(chunk_summary)
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulation parallèle de parties prédéfinies.")
+    parser.add_argument("--battles", type=int, default=100_000, help="Nombre de parties")
+    parser.add_argument("--seed", type=int, default=0, help="Graine de la simulation")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut: nombre de processeurs)")
+    parser.add_argument("--two-weak-ennemies", action="store_true", help="Jeu avec deux adversaires faibles au lieu du jeu par défaut")
+    args = parser.parse_args()
+
+    game = RoleplayGame.settings_with_two_weak_ennemies() if args.two_weak_ennemies else RoleplayGame.default_settings()
+    print(run_parallel_simulation(game, PotionThresholdController(), args.battles, args.seed, args.workers))
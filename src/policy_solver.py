@@ -0,0 +1,446 @@
+"""Optimal player policy of a RoleplayGame setup: at each turn, attack (and which ennemy) or drink a potion.
+The values come from the machinery of WinSolver (exact enumeration of the turns, value iteration on the cycles of
+states), with a maximum over the player choices instead of a fixed rule: the policy maximizes the win probability,
+then minimizes the expected number of turns. The ennemies follow the rule-based EnnemyAI (the hints are only
+approximate against ExpectimaxAI).
+
+Two reductions keep the tables small and fast to build with several ennemies:
+- identical ennemies (same stats, same potions) are interchangeable: their states are sorted (3 gobelins: about
+  6 times less states)
+- the life points can be aggregated on a grid (1, step, 2*step, ..., max life): a life between two points of the grid
+  is split between them, in proportion of the distances. The step is chosen so the setup fits in max_states
+  (life_step=1: exact solution). The steps stop at 10: with coarser grids the win probabilities and the hints are
+  wrong (3 gobelins at step 35: 5% estimated, 0% played), the setup is refused instead.
+The policy is kept in a PolicyTable: only the decisions that differ from "attack the first ennemy alive" are stored.
+The tables are cached by setup hash, in memory and optionally in a directory.
+"""
+from bisect import bisect_left
+import hashlib
+import json
+from math import comb, prod
+import os
+
+from src.battle_engine import BattleEngine, PlayerController
+from src.character import Character
+from src.game import RoleplayGame
+from src.potion import Potion
+from src.win_solver import WinSolver, GameState
+
+
+class PolicyTooLargeError(Exception):
+    """The setup has too many states to be solved within the limit"""
+
+
+def life_grid(max_life: int, life_step: int) -> tuple[int, ...]:
+    """The life points kept in the states: 1, the multiples of life_step and max_life"""
+    return tuple(sorted({1, max_life} | set(range(life_step, max_life, life_step))))
+
+
+def grid_life(grid: tuple[int, ...], life: int) -> int:
+    """The nearest life of the grid (0 stays 0: the character is dead)"""
+    if life <= 0:
+        return 0
+    position = bisect_left(grid, life)
+    if position == len(grid):
+        return grid[-1]
+    if position == 0 or grid[position] - life <= life - grid[position - 1]:
+        return grid[position]
+    return grid[position - 1]
+
+
+def canonical_order(groups: tuple[tuple[int, ...], ...], state: GameState) -> list[int]:
+    """Sort the states of the interchangeable ennemies
+
+    Args:
+        groups (tuple[tuple[int, ...], ...]): Indexes of the interchangeable ennemies in the game states
+        state (GameState): A game state
+
+    Returns:
+        list[int]: The index in state of the character at each index of the canonical state
+    """
+    order = list(range(len(state)))
+    for group in groups:
+        for position, index in zip(group, sorted(group, key=state.__getitem__)):
+            order[position] = index
+    return order
+
+
+class OptimalPolicySolver(WinSolver):
+    """Solve a RoleplayGame setup for the best player policy"""
+    DEFAULT_MAX_STATES = 30_000
+    LIFE_STEPS = (1, 2, 3, 4, 5, 7, 10)     #Tried in order by life_step_for, coarser grids give wrong hints
+
+    def __init__(self, game: RoleplayGame, life_step: int = 1, max_states: int = DEFAULT_MAX_STATES):
+        """Read the setup of the game. The game itself is not modified.
+
+        Args:
+            game (RoleplayGame): The setup to solve, from its current state
+            life_step (int, optional): Step of the life grid. Defaults to 1 (exact solution).
+            max_states (int, optional): Stop with a PolicyTooLargeError above this number of states. Defaults to DEFAULT_MAX_STATES.
+        """
+        super().__init__(game)
+        self.life_step = life_step
+        self.max_states = max_states
+        self._grids = tuple(life_grid(max_life, life_step) for max_life in self._max_life)
+        #_splits[index][life]: [(life of the grid, weight)] for a life of 0..max life
+        self._splits = tuple(tuple(self._split(grid, life) for life in range(max_life + 1)) for grid, max_life in zip(self._grids, self._max_life))
+        self._groups = OptimalPolicySolver._interchangeable_ennemies(game)
+        self._afterstate_cache: dict[GameState, list[tuple[GameState, float]]] = {}
+
+        self.initial_state = self._canonical(tuple((grid_life(grid, life), drunk, took) for grid, (life, drunk, took) in zip(self._grids, self.initial_state)))
+
+
+    @staticmethod
+    def _interchangeable_ennemies(game: RoleplayGame) -> tuple[tuple[int, ...], ...]:
+        """Groups of 2 or more identical ennemies (indexes of the game states: 1 is the first ennemy)"""
+        kinds: dict[tuple, list[int]] = {}
+        for index, ennemy in enumerate(game.ennemies, start=1):
+            potions = tuple((obj.min_recup, obj.max_recup) for obj in ennemy.inventory if isinstance(obj, Potion) and not obj.is_empty)
+            kinds.setdefault((ennemy.stats, potions), []).append(index)
+        return tuple(tuple(indexes) for indexes in kinds.values() if len(indexes) > 1)
+
+
+    @staticmethod
+    def _split(grid: tuple[int, ...], life: int) -> tuple[tuple[int, float], ...]:
+        if life <= 0:
+            return ((0, 1.0),)
+        position = bisect_left(grid, life)
+        if grid[position] == life:
+            return ((life, 1.0),)
+        lower, upper = grid[position - 1], grid[position]
+        return ((lower, (upper - life) / (upper - lower)), (upper, (life - lower) / (upper - lower)))
+
+
+    @staticmethod
+    def life_step_for(game: RoleplayGame, max_states: int = DEFAULT_MAX_STATES) -> int:
+        """The smallest step of LIFE_STEPS whose number of possible states fits in max_states
+
+        Args:
+            game (RoleplayGame): The setup
+            max_states (int, optional): Maximum number of states. Defaults to DEFAULT_MAX_STATES.
+
+        Raises:
+            PolicyTooLargeError: the setup does not fit in max_states, even with the biggest step
+
+        Returns:
+            int: The step of the life grid
+        """
+        groups = OptimalPolicySolver._interchangeable_ennemies(game)
+        grouped = {index for group in groups for index in group}
+        characters = [game.player] + list(game.ennemies)
+        nb_potions = [sum(1 for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty) for character in characters]
+
+        for life_step in OptimalPolicySolver.LIFE_STEPS:
+            #States of each character: life of the grid (or dead), potions drunk, took_a_potion
+            nb_states = [(len(life_grid(character.stats.max_life, life_step)) + (index > 0)) * (potions + 1) * 2
+                         for index, (character, potions) in enumerate(zip(characters, nb_potions))]
+            estimate = prod(nb_states[index] for index in range(len(characters)) if index not in grouped)
+            estimate *= prod(comb(nb_states[group[0]] + len(group) - 1, len(group)) for group in groups)
+            if estimate <= max_states:
+                return life_step
+        raise PolicyTooLargeError(f"More than {max_states} states to solve, even with the life step {OptimalPolicySolver.LIFE_STEPS[-1]}.")
+
+
+    @property
+    def setup_hash(self) -> str:
+        """Identify the setup and the life grid: the stats, the potions and the initial state of the characters (the names are ignored)"""
+        setup = [self._max_life, self._attack_range, self._can_drink, self._potions, self.initial_state, self.life_step]
+        return hashlib.sha256(json.dumps(setup).encode()).hexdigest()
+
+
+    def player_choices(self, state: GameState) -> list[tuple[int, int]]:
+        """Attack each ennemy alive (only one of the interchangeable ennemies in the same state), then drink if a potion is left.
+        The first choice wins the ties."""
+        choices = []
+        attacked = set()
+        for index in range(1, len(state)):
+            if state[index][0] > 0:
+                key = (self._max_life[index], self._attack_range[index], self._can_drink[index], self._potions[index], state[index])
+                if key not in attacked:
+                    attacked.add(key)
+                    choices.append((Character.ACTION_ATTACK, index))
+        if self._can_drink[0] and state[0][1] < len(self._potions[0]):
+            choices.append((Character.ACTION_DRINKPOTION, 0))
+        return choices
+
+
+    def _canonical(self, state: GameState) -> GameState:
+        if not self._groups:
+            return state
+        return tuple(state[index] for index in canonical_order(self._groups, state))
+
+
+    def _expand(self, state: GameState):
+        """Same outcomes as WinSolver._expand, on the life grid. The player action leads to afterstates (the state
+        before the ennemies phase, on the grid): the outcomes of each afterstate are computed once (see _afterstate_outcomes)."""
+        if len(self._values) >= self.max_states:
+            raise PolicyTooLargeError(f"More than {self.max_states} states to solve (life step: {self.life_step}).")
+
+        if state[0][2]:     #The player skips his turn: the action does not matter
+            choices = [(Character.ACTION_ATTACK, 1)]
+        else:
+            choices = self.player_choices(state)
+
+        expanded = []
+        for player_action in choices:
+            win_now = 0.0
+            afterstates = {}
+            for after_player, probability in self._player_outcomes(state, player_action):
+                if all(ennemy_state[0] <= 0 for ennemy_state in after_player[1:]):
+                    win_now += probability
+                    continue
+                for afterstate, weight in self._on_grid(after_player):
+                    afterstates[afterstate] = afterstates.get(afterstate, 0.0) + probability * weight
+
+            successors = {}
+            for afterstate, probability in afterstates.items():
+                for successor, successor_probability in self._afterstate_outcomes(afterstate):
+                    successors[successor] = successors.get(successor, 0.0) + probability * successor_probability
+            expanded.append((player_action, win_now, list(successors.items())))
+        return expanded
+
+
+    def _on_grid(self, state: GameState) -> list[tuple[GameState, float]]:
+        """The canonical states of the grid that stand for state, with their weights"""
+        parts = [((), 1.0)]
+        for splits, (life, drunk, took) in zip(self._splits, state):
+            character_splits = splits[life]
+            if len(character_splits) == 1:
+                character_state = ((character_splits[0][0], drunk, took),)
+                parts = [(states + character_state, weight) for states, weight in parts]
+            else:
+                parts = [(states + ((grid_life, drunk, took),), weight * grid_weight)
+                         for states, weight in parts for grid_life, grid_weight in character_splits]
+        if self._groups:
+            return [(self._canonical(states), weight) for states, weight in parts]
+        return parts
+
+
+    def _ennemy_moves(self, index: int, ennemy_state):
+        """The moves of WinSolver, with the ennemy state on the grid: the ennemies phase combines less states"""
+        key = (index, ennemy_state)
+        moves = self._moves_cache.get(key)
+        if moves is not None:
+            return moves
+
+        grid_moves = {}
+        #super() caches the exact moves under the same key: they are replaced below
+        for (life, drunk, took), damage, probability in super()._ennemy_moves(index, ennemy_state):
+            for grid_life, weight in self._splits[index][life]:
+                move = ((grid_life, drunk, took), damage)
+                grid_moves[move] = grid_moves.get(move, 0.0) + probability * weight
+        moves = [(next_state, damage, probability) for (next_state, damage), probability in grid_moves.items()]
+        self._moves_cache[key] = moves
+        return moves
+
+
+    def _afterstate_outcomes(self, afterstate: GameState) -> list[tuple[GameState, float]]:
+        """The states at the end of the turn after the ennemies phase, on the grid, when the player is still alive.
+        The probability that the player dies is the missing part."""
+        outcomes = self._afterstate_cache.get(afterstate)
+        if outcomes is not None:
+            return outcomes
+
+        life, drunk, took = afterstate[0]
+        outcomes = {}
+        for ennemy_states, damage, probability in self._ennemies_phase(afterstate[1:]):
+            if damage < life:
+                for successor, weight in self._on_grid(((life - damage, drunk, took),) + ennemy_states):
+                    outcomes[successor] = outcomes.get(successor, 0.0) + probability * weight
+
+        outcomes = list(outcomes.items())
+        self._afterstate_cache[afterstate] = outcomes
+        return outcomes
+
+
+    def policy_table(self) -> "PolicyTable":
+        """Solve the setup and keep its policy
+
+        Raises:
+            PolicyTooLargeError: the setup has more than max_states states
+
+        Returns:
+            PolicyTable: The best action in each state
+        """
+        result = self.solve()
+        exceptions = {}
+        for state, (action, target) in self._policy.items():
+            if state[0][2]:
+                continue    #The player skips his turn: no decision
+            if action == Character.ACTION_DRINKPOTION:
+                exceptions[state] = PolicyTable.DRINK
+            elif target != PolicyTable.first_alive(state):
+                exceptions[state] = target
+        return PolicyTable(self.setup_hash, self.life_step, self._max_life, tuple(len(potions) for potions in self._potions),
+                           self._groups, exceptions, result.win_probability, result.nb_states)
+
+
+class PolicyTable:
+    """The best player action in each state of a setup. Only the exceptions to the default action are stored:
+    the default action is to attack the first ennemy alive (of the canonical state).
+
+    The actions are encoded as int: DRINK, or the index of the ennemy to attack in the canonical state (1 is the first ennemy).
+    """
+    DRINK = 0
+
+    def __init__(self, setup_hash: str, life_step: int, max_life: tuple[int, ...], nb_potions: tuple[int, ...],
+                 groups: tuple[tuple[int, ...], ...], exceptions: dict[GameState, int], win_probability: float, nb_states: int):
+        self.setup_hash = setup_hash
+        self.life_step = life_step
+        self.max_life = max_life                #Max life of each character, player first
+        self.nb_potions = nb_potions            #Potions of each character at the beginning: the states count the potions drunk
+        self.groups = groups                    #Interchangeable ennemies (see OptimalPolicySolver)
+        self.exceptions = exceptions
+        self.win_probability = win_probability  #With the best policy, from the initial state (on the grid if life_step > 1)
+        self.nb_states = nb_states
+        self._grids = tuple(life_grid(character_max_life, life_step) for character_max_life in max_life)
+
+
+    def __len__(self) -> int:
+        return len(self.exceptions)
+
+
+    @staticmethod
+    def first_alive(state: GameState) -> int:
+        return next((index for index in range(1, len(state)) if state[index][0] > 0), 1)
+
+
+    def state_of(self, player: Character, ennemies: list[Character]) -> GameState:
+        """The state of the characters in the game, on the grid of the table"""
+        state = []
+        for character, grid, nb_potions in zip([player] + list(ennemies), self._grids, self.nb_potions):
+            potions_left = sum(1 for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty)
+            state.append((grid_life(grid, character.current_life), max(0, nb_potions - potions_left), character.took_a_potion))
+        return tuple(state)
+
+
+    def best_action(self, player: Character, ennemies: list[Character]) -> tuple[int, int]:
+        """The best action of the player at the beginning of his turn
+
+        Args:
+            player (Character): The player of the game the table was built for
+            ennemies (list[Character]): The ennemies of the game, in order
+
+        Returns:
+            tuple[int, int]: (action, index of the ennemy to attack: 0 is the first ennemy), as returned by PlayerController.choose_action
+        """
+        state = self.state_of(player, ennemies)
+        order = canonical_order(self.groups, state)
+        canonical = tuple(state[index] for index in order)
+
+        action = self.exceptions.get(canonical, PolicyTable.first_alive(canonical))
+        if action == PolicyTable.DRINK:
+            return Character.ACTION_DRINKPOTION, 0
+        return Character.ACTION_ATTACK, order[action] - 1
+
+
+    def to_dict(self) -> dict:
+        """JSON compatible data (see from_dict). Each state is flattened: life, drunk, took of each character."""
+        return {"setup_hash": self.setup_hash, "life_step": self.life_step, "max_life": list(self.max_life),
+                "nb_potions": list(self.nb_potions), "groups": [list(group) for group in self.groups],
+                "win_probability": self.win_probability, "nb_states": self.nb_states,
+                "exceptions": [[value for character_state in state for value in character_state] + [action]
+                               for state, action in self.exceptions.items()]}
+
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PolicyTable":
+        exceptions = {}
+        for *values, action in data["exceptions"]:
+            exceptions[tuple((values[i], values[i + 1], bool(values[i + 2])) for i in range(0, len(values), 3))] = action
+        return cls(data["setup_hash"], data["life_step"], tuple(data["max_life"]), tuple(data["nb_potions"]),
+                   tuple(tuple(group) for group in data["groups"]), exceptions, data["win_probability"], data["nb_states"])
+
+
+class PolicyController(PlayerController):
+    """Follow the best player actions of a PolicyTable"""
+
+    def __init__(self, table: PolicyTable):
+        self.table = table
+
+
+    def choose_action(self, engine: BattleEngine) -> tuple[int, int]:
+        return self.table.best_action(engine.player, engine.ennemies)
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "jeu_de_role", "policies")
+
+_tables: dict[tuple, PolicyTable] = {}     #Tables already built, by _setup_key
+
+
+def _setup_key(game: RoleplayGame, max_states: int) -> tuple:
+    """Key of the memory cache: what the solver reads from the game (not the names), without building the solver"""
+    return (max_states,) + tuple((character.stats, character.current_life, character.took_a_potion,
+                                  tuple((obj.min_recup, obj.max_recup) for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty))
+                                 for character in [game.player] + list(game.ennemies))
+
+
+def _read_table(path: str) -> PolicyTable | None:
+    """The table saved in the cache, None if it is missing or cannot be read (ex: a file cut by the end of the program)"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return PolicyTable.from_dict(json.load(file))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def _write_table(path: str, table: PolicyTable):
+    """Save the table in the cache. A cache that cannot be written is ignored: it is only faster."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(table.to_dict(), file)
+        os.replace(temporary_path, path)     #Another process never reads a partial file
+    except OSError:
+        pass
+
+
+def policy_table_for(game: RoleplayGame, cache_dir: str | os.PathLike | None = None,
+                     max_states: int = OptimalPolicySolver.DEFAULT_MAX_STATES) -> PolicyTable:
+    """The policy table of the current setup of a game: from the memory cache, then from cache_dir, solved otherwise.
+    The step of the life grid is the smallest one that fits in max_states (see OptimalPolicySolver.life_step_for).
+    A file of cache_dir that cannot be read is solved again, a cache_dir that cannot be written is ignored.
+
+    Args:
+        game (RoleplayGame): The game, not started (or at the beginning of a turn)
+        cache_dir (str | os.PathLike, optional): Directory of the tables already built (policy-<hash>.json). Defaults to None (memory only).
+        max_states (int, optional): Maximum number of states to solve. Defaults to OptimalPolicySolver.DEFAULT_MAX_STATES.
+
+    Raises:
+        PolicyTooLargeError: the setup has too many states, even with the biggest life step of OptimalPolicySolver.LIFE_STEPS
+
+    Returns:
+        PolicyTable: The table
+    """
+    key = _setup_key(game, max_states)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    solver = OptimalPolicySolver(game, OptimalPolicySolver.life_step_for(game, max_states), max_states)
+    path = os.path.join(cache_dir, f"policy-{solver.setup_hash}.json") if cache_dir is not None else None
+    table = _read_table(path) if path is not None else None
+    if table is None or table.setup_hash != solver.setup_hash:
+        table = solver.policy_table()
+        if path is not None:
+            _write_table(path, table)
+
+    _tables[key] = table
+    return table
+
+
+if __name__ == "__main__":
+    import time
+    for game in (RoleplayGame.default_settings(), RoleplayGame.settings_with_two_weak_ennemies(),
+                 RoleplayGame(Character.default_player(), [Character.gobelin(), Character.thief()]),
+                 RoleplayGame(Character.default_player(), [Character.gobelin(), Character.gobelin(), Character.gobelin()]),
+                 RoleplayGame(Character.default_player(), [Character.dragon()])):
+        start = time.perf_counter()
+        try:
+            table = policy_table_for(game)
+        except PolicyTooLargeError as error:
+            print(f"{len(game.ennemies)} ennemi(s): trop grand ({error})")
+            continue
+        print(f"{len(game.ennemies)} ennemi(s), pas de vie {table.life_step}: victoire {table.win_probability:.4%}, "
+              f"{table.nb_states} états, {len(table)} exceptions, {time.perf_counter() - start:.2f} s")
@@ -1,7 +1,7 @@
-from random import randint
 import logging
 
 from src.exceptions import EmptyPotionError, PoisonPotionError
+from src.random_source import RandomSource, GLOBAL_RANDOM_SOURCE
 import src.constants as c
 
 #Init local logger
@@ -15,6 +15,8 @@ class Potion:
         PoisonPotionError: Raise if the range.start or .stop is negative
         EmptyPotionError: Raise if drink() is call more than one time
     """
+    __slots__ = ('id', 'min_recup', 'max_recup', 'is_empty')
+
     instance_counter: int = 0
 
     def __init__(self, min_recup: int, max_recup: int):
@@ -33,7 +35,7 @@ class Potion:
             self.min_recup = min_recup
             self.max_recup = max_recup
             self.is_empty = False
-            logger.debug(f'Potion creation: {repr(self)} (id={self.id}).')
+            logger.debug('Potion creation: %r (id=%d).', self, self.id)
             
         else:
             raise PoisonPotionError(f"Magic potion do not exist (hum well...) so Potion(min_recup={min_recup}, max_recup={max_recup}) cannot be created.\n\tInit values must be : min_recup >= 0, max_recup >= 0 and min_recup <= max_recup")
@@ -50,23 +52,115 @@ class Potion:
         return f"Potion({self.min_recup}, {self.max_recup})"
 
         
-    def drink(self) -> int:
+    def drink(self, rng: RandomSource = GLOBAL_RANDOM_SOURCE) -> int:
         """Action to drink the potion. Can be call only once.
 
+        Args:
+            rng (RandomSource, optional): Source of the random recovery. Defaults to GLOBAL_RANDOM_SOURCE.
+
         Raises:
             EmptyPotionError: Raise if drink is call more than one time
 
         Returns:
             int: Number of point of life gain
         """
-        logger.debug(f'Drink potion id={self.id}.')
+        logger.debug('Drink potion id=%d.', self.id)
         if not self.is_empty:       
             self.is_empty = True
-            return randint(self.min_recup, self.max_recup)
+            return rng.randint(self.min_recup, self.max_recup)
         
         else:
             raise EmptyPotionError("Cannot drink an empty potion.")
 
 
+    def clone(self) -> "Potion":
+        """A copy of the potion (same id, same state)"""
+        potion = Potion._bottle(self.id, self.min_recup, self.max_recup)
+        potion.is_empty = self.is_empty
+        return potion
+
+
+    @classmethod
+    def _bottle(cls, potion_id: int, min_recup: int, max_recup: int) -> "Potion":
+        """A full Potion with a known id, without counting a new instance (used by PotionStack)"""
+        potion = cls.__new__(cls)
+        potion.id = potion_id
+        potion.min_recup = min_recup
+        potion.max_recup = max_recup
+        potion.is_empty = False
+        return potion
+
+
+class PotionStack:
+    """Identical bottles of Potion(min_recup, max_recup), stored as a single object with a count.
+    The bottles have consecutive ids, as if they were created one by one. A Potion object is created only when a bottle
+    is taken (or displayed).
+
+    Raises:
+        PoisonPotionError: Raise if the recovery range is invalid (same rules as Potion)
+    """
+    __slots__ = ('first_id', 'count', 'min_recup', 'max_recup')
+
+    def __init__(self, count: int, min_recup: int, max_recup: int):
+        """Create the stack
+
+        Args:
+            count (int): Number of bottles
+            min_recup (int): The minimum number of life points each potion will give
+            max_recup (int): The maximum number of life points each potion will give
+        """
+        if not (min_recup >=0 and max_recup >= 0 and min_recup <= max_recup):
+            raise PoisonPotionError(f"Magic potion do not exist (hum well...) so PotionStack(min_recup={min_recup}, max_recup={max_recup}) cannot be created.\n\tInit values must be : min_recup >= 0, max_recup >= 0 and min_recup <= max_recup")
+
+        self.first_id = Potion.instance_counter + 1
+        Potion.instance_counter += count
+        self.count = count
+        self.min_recup = min_recup
+        self.max_recup = max_recup
+        logger.debug('PotionStack creation: %r (ids=%d to %d).', self, self.first_id, self.first_id + count - 1)
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def __iter__(self):
+        """The bottles of the stack, as Potion objects"""
+        for potion_id in range(self.first_id, self.first_id + self.count):
+            yield Potion._bottle(potion_id, self.min_recup, self.max_recup)
+
+
+    def __repr__(self) -> str:
+        return f"{self.count} × Potion({self.min_recup}, {self.max_recup})"
+
+
+    def clone(self) -> "PotionStack":
+        """A copy of the stack: same bottles, same ids"""
+        stack = PotionStack.__new__(PotionStack)
+        stack.first_id = self.first_id
+        stack.count = self.count
+        stack.min_recup = self.min_recup
+        stack.max_recup = self.max_recup
+        return stack
+
+
+    def take(self) -> Potion:
+        """Take the first bottle out of the stack
+
+        Raises:
+            EmptyPotionError: Raise if the stack has no more bottle
+
+        Returns:
+            Potion: A full Potion
+        """
+        if self.count <= 0:
+            raise EmptyPotionError("Cannot take a potion from an empty stack.")
+
+        potion = Potion._bottle(self.first_id, self.min_recup, self.max_recup)
+        self.first_id += 1
+        self.count -= 1
+        return potion
+
+
 if __name__ == "__main__":
     """Unit tests complete: check src/tests/test_potion.py"""
\ No newline at end of file
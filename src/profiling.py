@@ -0,0 +1,193 @@
+"""Opt-in instrumentation of the turns of a RoleplayGame: per-phase timers and counters.
+- NULL_PROFILER: the default profiler of a game. Its phases do nothing, so the overhead of a game without profiling is a no-op `with` by phase.
+- TurnProfiler: for each phase, the number of calls, the total and self time (without the nested phases), the max time,
+  the random draws and the net memory blocks allocated (sys.getallocatedblocks), both without the nested phases: the rows of
+  the report add up. Enable it with `game.profiler = TurnProfiler()`.
+- CountingRandomSource: the RandomSource given to the characters of a profiled game, to count the draws.
+
+The phases of a turn are the player turn (with the player decision nested in it: the wait for the user in the command line),
+the AI decision, each ennemy turn, the recap render and the gameover check.
+"""
+from dataclasses import dataclass
+import sys
+import time
+
+from src.random_source import RandomSource
+
+PHASE_PLAYER_TURN = "player_turn"
+PHASE_PLAYER_DECISION = "player_decision"
+PHASE_AI_DECISION = "ai_decision"
+PHASE_ENNEMY_TURN = "ennemy_turn"
+PHASE_RECAP_RENDER = "recap_render"
+PHASE_GAMEOVER_CHECK = "gameover_check"
+PHASES = (PHASE_PLAYER_TURN, PHASE_PLAYER_DECISION, PHASE_AI_DECISION, PHASE_ENNEMY_TURN, PHASE_RECAP_RENDER, PHASE_GAMEOVER_CHECK)
+
+
+@dataclass
+class PhaseStats:
+    """What was measured for one phase, over all its calls. Times in seconds."""
+    calls: int = 0
+    seconds: float = 0.0
+    self_seconds: float = 0.0   #Without the nested phases
+    max_seconds: float = 0.0
+    draws: int = 0              #Random draws of the characters and their AIs, without the nested phases
+    blocks: int = 0             #Net memory blocks allocated (the blocks still allocated at the end of the phase), without the nested phases
+
+
+class _NoTimer:
+    """Context manager of the phases of NULL_PROFILER: does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class NullProfiler:
+    """A disabled profiler: every method does nothing. Base class of TurnProfiler."""
+    enabled = False
+
+    def phase(self, name: str):
+        """Context manager that measures a phase
+
+        Args:
+            name (str): Name of the phase (see PHASES)
+        """
+        return _NO_TIMER
+
+    def count(self, name: str, value: int = 1):
+        """Add value to a counter
+
+        Args:
+            name (str): Name of the counter (ex: "turns")
+            value (int, optional): Value added. Defaults to 1.
+        """
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _PhaseTimer:
+    """Context manager of a phase of a TurnProfiler: one by phase name, reused by all the calls"""
+    __slots__ = ('profiler', 'stats', '_starts')
+
+    def __init__(self, profiler: "TurnProfiler", stats: PhaseStats):
+        self.profiler = profiler
+        self.stats = stats
+        self._starts = []   #A phase may be nested in itself
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler._stack.append(self)
+        self._starts.append((profiler.clock(), profiler.draws, sys.getallocatedblocks(), profiler._nested))
+        profiler._nested = (0.0, 0, 0)
+        return self
+
+    def __exit__(self, *exc_info):
+        profiler = self.profiler
+        end = profiler.clock()
+        start, start_draws, start_blocks, parent_nested = self._starts.pop()
+        elapsed = end - start
+        draws = profiler.draws - start_draws
+        blocks = sys.getallocatedblocks() - start_blocks
+        nested_seconds, nested_draws, nested_blocks = profiler._nested
+
+        stats = self.stats
+        stats.calls += 1
+        stats.seconds += elapsed
+        stats.self_seconds += elapsed - nested_seconds
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        stats.draws += draws - nested_draws
+        stats.blocks += blocks - nested_blocks
+
+        profiler._stack.pop()
+        #The parent phase does not count this time, these draws and these blocks as its own
+        profiler._nested = (parent_nested[0] + elapsed, parent_nested[1] + draws, parent_nested[2] + blocks)
+        return False
+
+
+class TurnProfiler(NullProfiler):
+    """Per-phase timers and counters of a RoleplayGame. The same profiler can measure several games: the figures add up."""
+    enabled = True
+
+    def __init__(self, clock=time.perf_counter):
+        """Create the profiler
+
+        Args:
+            clock (optional): Function that returns the current time in seconds. Defaults to time.perf_counter.
+        """
+        self.clock = clock
+        self.stats: dict[str, PhaseStats] = {}
+        self.counters: dict[str, int] = {}
+        self.draws = 0      #Incremented by CountingRandomSource
+        self._timers: dict[str, _PhaseTimer] = {}
+        self._stack: list[_PhaseTimer] = []
+        self._nested = (0.0, 0, 0)     #Seconds, draws and blocks of the phases nested in the current phase
+
+
+    def phase(self, name: str) -> _PhaseTimer:
+        timer = self._timers.get(name)
+        if timer is None:
+            stats = self.stats[name] = PhaseStats()
+            timer = self._timers[name] = _PhaseTimer(self, stats)
+        return timer
+
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+    def report(self) -> str:
+        """The measures as a text table: one line by phase, in the order of PHASES, then the counters
+
+        Returns:
+            str: The table, on multiple lines
+        """
+        lines = [f"{'Phase':16} {'Appels':>8} {'Total (ms)':>11} {'Propre (ms)':>12} {'Moyenne (µs)':>13} {'Max (µs)':>10} {'Tirages':>8} {'Blocs':>8}"]
+        names = [name for name in PHASES if name in self.stats] + [name for name in self.stats if name not in PHASES]
+        for name in names:
+            stats = self.stats[name]
+            mean = stats.seconds / stats.calls if stats.calls else 0.0
+            lines.append(f"{name:16} {stats.calls:8} {stats.seconds * 1e3:11.3f} {stats.self_seconds * 1e3:12.3f} {mean * 1e6:13.1f} "
+                         f"{stats.max_seconds * 1e6:10.1f} {stats.draws:8} {stats.blocks:8}")
+        lines.extend(f"{name}: {value}" for name, value in self.counters.items())
+        return "\n".join(lines)
+
+
+class CountingRandomSource(RandomSource):
+    """A RandomSource that counts the draws of another one in a profiler. Same seed and same values as the source."""
+
+    def __init__(self, source: RandomSource, profiler: TurnProfiler):
+        """Wrap a source
+
+        Args:
+            source (RandomSource): The source of the values
+            profiler (TurnProfiler): Profiler where the draws are counted
+        """
+        self.source = source
+        self.seed = source.seed
+        self.profiler = profiler
+
+
+    def randint(self, a: int, b: int) -> int:
+        self.profiler.draws += 1
+        return self.source.randint(a, b)
+
+
+    def choice(self, sequence):
+        self.profiler.draws += 1
+        return self.source.choice(sequence)
+
+
+    def coin_flip(self) -> bool:
+        self.profiler.draws += 1
+        return self.source.coin_flip()
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_profiling.py"""
@@ -0,0 +1,97 @@
+"""Sources of random numbers for the characters of a game.
+- RandomSource: a random generator seeded per game (the seed is kept, so a game can be replayed)
+- BufferedRandomSource: same, but draws the values of each range in bulk and hands them out one by one
+- GLOBAL_RANDOM_SOURCE: the module-level functions of random. Default source of a Character created outside a game.
+"""
+import random
+
+
+class RandomSource:
+    """A random generator for one game"""
+
+    def __init__(self, seed: int | None = None):
+        """Create the generator
+
+        Args:
+            seed (int, optional): Seed of the generator. Defaults to None: a new seed is drawn from the system.
+        """
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self._generator = random.Random(self.seed)
+
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer N such as a <= N <= b"""
+        return self._generator.randint(a, b)
+
+
+    def choice(self, sequence):
+        """Random element of a non-empty sequence"""
+        return self._generator.choice(sequence)
+
+
+    def coin_flip(self) -> bool:
+        """True or False with the same probability. Faster than randint(False, True)."""
+        return bool(self._generator.getrandbits(1))
+
+
+class BufferedRandomSource(RandomSource):
+    """A random generator for one game that draws buffer_size values at once for each (a, b) range.
+    Damages and potion recoveries always use the same few ranges, so almost every randint is a list pop.
+    """
+    DEFAULT_BUFFER_SIZE = 256
+
+    def __init__(self, seed: int | None = None, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """Create the generator
+
+        Args:
+            seed (int, optional): Seed of the generator. Defaults to None: a new seed is drawn from the system.
+            buffer_size (int, optional): Number of values drawn at once for a range. Defaults to DEFAULT_BUFFER_SIZE.
+        """
+        super().__init__(seed)
+        self.buffer_size = buffer_size
+        self._buffers: dict[tuple[int, int], list[int]] = {}
+
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer N such as a <= N <= b, taken from the buffer of the range"""
+        buffer = self._buffers.get((a, b))
+        if not buffer:
+            buffer = self._generator.choices(range(a, b + 1), k=self.buffer_size)
+            self._buffers[(a, b)] = buffer
+        return buffer.pop()
+
+
+    def coin_flip(self) -> bool:
+        """True or False with the same probability, taken from the buffer of the range (0, 1)"""
+        return bool(self.randint(0, 1))
+
+
+class _GlobalRandomSource(RandomSource):
+    """The module-level functions of random. There is only one instance: GLOBAL_RANDOM_SOURCE"""
+
+    def __init__(self):
+        self.seed = None
+
+
+    def randint(self, a: int, b: int) -> int:
+        return random.randint(a, b)
+
+
+    def choice(self, sequence):
+        return random.choice(sequence)
+
+
+    def coin_flip(self) -> bool:
+        return bool(random.getrandbits(1))
+
+
+    def __reduce__(self):
+        #Copies and unpickled objects share the unique instance
+        return "GLOBAL_RANDOM_SOURCE"
+
+
+GLOBAL_RANDOM_SOURCE = _GlobalRandomSource()
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_random_source.py"""
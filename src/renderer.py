@@ -0,0 +1,249 @@
+"""Output of the game in the terminal. RoleplayGame sends what happens (the turns, the actions of the characters,
+the recap of each turn) to its renderer, and each renderer formats it in its own way. The lines are collected in a
+buffer and written at once by flush(): RoleplayGame flushes once at the end of each turn and before every question to the user.
+- ColorRenderer: the text with the ANSI color codes of constants.py
+- PlainRenderer: the text without colors (piped output, log files, terminals without colors)
+- NullRenderer: nothing is formatted nor written (quiet mode, benchmarks)
+"""
+import logging
+import sys
+from typing import Iterable, TextIO
+
+from src.battle_engine import ActionResult
+from src.character import Character
+from src.potion import Potion
+import src.constants as c
+
+logger = logging.getLogger(__name__)
+
+
+class Renderer:
+    """Buffered output of the game, without colors. Subclasses may override color to style the parts of the text."""
+
+    def __init__(self, stream: TextIO | None = None):
+        """Create the renderer
+
+        Args:
+            stream (TextIO, optional): Where to write. Defaults to None: sys.stdout at the time of the flush.
+        """
+        self.stream = stream
+        self._lines: list[str] = []
+
+
+    def write(self, *lines: str):
+        """Add lines to the buffer (a new line is added after each)"""
+        self._lines.extend(lines)
+
+
+    def flush(self):
+        """Write the buffered lines in one write"""
+        if not self._lines:
+            return
+        text = "\n".join(self._lines) + "\n"
+        self._lines.clear()
+
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+
+    def color(self, text: str, color: str) -> str:
+        """The text in a color of constants.py. Defaults to the text without color."""
+        return text
+
+
+    def battle_start(self, turn_nb: int):
+        """The game begins, or continues after turn_nb turns"""
+        self.write("DÉBUT DE LA PARTIE" if not turn_nb else f"REPRISE DE LA PARTIE APRÈS LE TOUR {turn_nb}")
+
+
+    def settings(self, player: Character, ennemies: list[Character]):
+        """The characters of the game and their inventory"""
+        self.write("Voici les participants:", "Joueur:", f"  {self.character_info(player)}")
+        self.write(*[f"    {self.object_info(obj)}" for obj in player.inventory])
+        self.write("Ennemi(s):")
+        for ennemy in ennemies:
+            self.write(f"  {self.character_info(ennemy)}")
+            self.write(*[f"    {self.object_info(obj)}" for obj in ennemy.inventory])
+
+
+    def turn_start(self, turn_nb: int):
+        """A new turn begins: the player plays first"""
+        self.write(self.color(f"{'-' * 20} Tour {turn_nb} {'-' * 70}", c.BLUE), "C'est votre tour!")
+
+
+    def player_action(self, result: ActionResult):
+        """What the player did during his turn
+
+        Args:
+            result (ActionResult): The player action returned by the engine
+        """
+        you = self.color("Vous", c.MAGENTA)
+        if result.action == ActionResult.SKIP_TURN:
+            self.write(f"{you} passez votre tour puisque vous avez fouillé votre sac pour une potion au tour précédent ⌛.")
+
+        #   Attack
+        elif result.action == Character.ACTION_ATTACK:
+            damage = result.value
+            self.write(f"{you} attaquez {self.name(result.target)} et lui faites {self.color(str(damage), c.RED)} point{'s' if damage > 1 else ''} de dommage. ⚔️")
+
+        #   Drink a potion
+        elif result.action == Character.ACTION_DRINKPOTION:
+            life_pt_gain = result.value
+
+            if  life_pt_gain == Character.POTION_NOT_FOUND:
+                #Comment: Changement dans règle -> si pas de potion alors pas de recup et perte du tour...
+                self.write(f"{you} avez fouillé votre sac mais il n'y a plus de potion. Vie: {self.life_status(result.actor)}.")
+            else:
+                self.write(f"{you} buvez une potion et récupérez {self.color(str(life_pt_gain), c.GREEN)} point{'s' if life_pt_gain > 1 else ''} de vie ❤️. Vie: {self.life_status(result.actor)}.")
+
+        else:   #Just a safety display. This else should never be performed becaue every valid player action are already managed
+            logger.error("Un événement qui ne devait pas se produire est survenu: le _tour_player semble mal géré.")
+            self.write("Hein? Ça ne devrait pas se produire ça")
+
+
+    def ennemies_turn(self, nb_ennemies: int):
+        """The ennemies play after the player"""
+        self.write(f"C'est au tour {"des ennemies" if nb_ennemies > 1 else "de l'ennemi."} ")
+
+
+    def ennemy_action(self, result: ActionResult):
+        """What an ennemy did during his turn
+
+        Args:
+            result (ActionResult): The ennemy action returned by the engine
+        """
+        ennemy = result.actor
+        name = self.name(ennemy)
+
+        if result.action == ActionResult.IS_DEAD:
+            self.write(f"{name} est {self.color('mort', c.RED)} 💀.")
+
+        elif result.action == ActionResult.SKIP_TURN:
+            self.write(f"{name} passe son tour puisqu'il a fouillé son sac pour une potion au tour précédent ⌛.")
+
+        #   Attack
+        elif result.action == Character.ACTION_ATTACK:
+           damage = result.value
+           self.write(f"{name} vous attaque et fait {self.color(str(damage), c.RED)} point{"s" if damage > 1 else ''} de dommage ⚔️")
+
+        #   Drink potion
+        elif result.action == Character.ACTION_DRINKPOTION:
+            life_pt_gain = result.value
+
+            if life_pt_gain == Character.POTION_NOT_FOUND:
+                self.write(f"{name} a fouillé son sac mais il n'y a plus de potion. Vie: {self.life_status(ennemy)}.")
+            else:
+                self.write(f"{name} récupère {self.color(str(life_pt_gain), c.GREEN)} point{'s' if life_pt_gain > 1 else ''} de vie ❤️. Vie: {self.life_status(ennemy)}).")
+
+
+    def turn_recap(self, player: Character, ennemies: Iterable[Character], nb_alive: int | None = None, nb_ennemies: int = 0):
+        """The life points of each character at the end of a turn
+
+        Args:
+            player (Character): The player
+            ennemies (Iterable[Character]): The listed ennemies
+            nb_alive (int, optional): Number of ennemies alive, when only the first ones are listed. Defaults to None (all listed).
+            nb_ennemies (int, optional): Number of ennemies of the game, when only the first ones are listed. Defaults to 0.
+        """
+        self.write("Récapitulatif du tour:", f"\t{self.life_status(player)}")
+        ennemy_lines = [f"\t{self.life_status(ennemy)}" for ennemy in ennemies]
+        self.write(*ennemy_lines)
+        if nb_alive is not None:
+            self.write(f"\t{self.alive_ennemies_summary(nb_alive, nb_ennemies, len(ennemy_lines))}")
+
+
+    def ennemy_list(self, ennemies: Iterable[tuple[int, Character]], nb_alive: int | None = None, nb_ennemies: int = 0):
+        """The ordered list of ennemies, to choose the one to attack
+
+        Args:
+            ennemies (Iterable[tuple[int, Character]]): The listed ennemies, with their index in the game
+            nb_alive (int, optional): Number of ennemies alive, when only the first ones are listed. Defaults to None (all listed).
+            nb_ennemies (int, optional): Number of ennemies of the game, when only the first ones are listed. Defaults to 0.
+        """
+        lines = [f"\t{i+1}. {self.character_info(ennemy)}" for i, ennemy in ennemies]
+        self.write("Liste des ennemies:", *lines)
+        if nb_alive is not None:
+            self.write(f"\t{self.alive_ennemies_summary(nb_alive, nb_ennemies, len(lines))}")
+
+
+    def hint(self, action: int, ennemy_index: int, ennemies: list[Character]):
+        """The best action of the player according to the hints"""
+        if action == Character.ACTION_DRINKPOTION:
+            self.write("💡 Conseil: boire une potion.")
+        elif len(ennemies) > 1:
+            self.write(f"💡 Conseil: attaquer l'ennemi {ennemy_index + 1} ({self.name(ennemies[ennemy_index])}).")
+        else:
+            self.write("💡 Conseil: attaquer.")
+
+
+    def gameover(self, player_won: bool):
+        """The final result of the game"""
+        self.write(self.color(f"{'-' * 20} 🏁 Fin de partie 🏁 {'-' * 50}", c.BLUE))
+        self.write("Vous avez GAGNÉ 🏆!" if player_won else "Vous avez PERDU 💀")
+
+
+    def name(self, character: Character) -> str:
+        return self.color(character._name, c.YELLOW)
+
+
+    def life_status(self, character: Character) -> str:
+        """Ex: Name a 20/35 pts de vie (a skull is added if the character is dead)"""
+        return f"{self.name(character)} a {self.color(str(character.current_life), c.GREEN)}/{character.stats.max_life} pts de vie{' 💀' if character.is_dead else ''}"
+
+
+    def character_info(self, character: Character) -> str:
+        """One line description of a character, without his inventory (see Character.__str__)"""
+        stats = character.stats
+        attack_info = f"des attaques entre {self.color(str(stats.attack_min), c.RED)} et {self.color(str(stats.attack_max), c.RED)} pts de dommage"
+        if stats.can_drink_potion:
+            nb_potions = len(character.inventory)
+            drink_potion_status = f"a {self.color(str(nb_potions), c.CYAN)} potion{'s' if nb_potions > 1 else ''}"
+        else:
+            drink_potion_status = "ne sait pas boire de potion"
+        return f"{self.life_status(character)}, fait {attack_info} et {drink_potion_status}."
+
+
+    def object_info(self, obj: object) -> str:
+        """Description of an object of an inventory (see Potion.__str__)"""
+        if not isinstance(obj, Potion):
+            return str(obj)
+        if obj.is_empty:
+            return f"Une très belle bouteille vide (Potion {self.color(str(obj.id), c.YELLOW)})."
+        return (f"{self.color(f'Potion {obj.id}', c.BLUE)} pouvant redonner entre {self.color(str(obj.min_recup), c.GREEN)} "
+                f"et {self.color(str(obj.max_recup), c.GREEN)} points de vie.")
+
+
+    @staticmethod
+    def alive_ennemies_summary(nb_alive: int, nb_ennemies: int, nb_listed: int) -> str:
+        """One line summary of a large list of ennemies"""
+        nb_not_listed = nb_alive - nb_listed
+        summary = f"{nb_alive} ennemi{'s' if nb_alive > 1 else ''} en vie sur {nb_ennemies}."
+        if nb_not_listed > 0:
+            return f"... et {nb_not_listed} autre{'s' if nb_not_listed > 1 else ''} ({summary})"
+        return summary
+
+
+class ColorRenderer(Renderer):
+    """Write the text with its colors"""
+
+    def color(self, text: str, color: str) -> str:
+        return f"{color}{text}{c.RESET}"
+
+
+class PlainRenderer(Renderer):
+    """Write the text without colors"""
+
+
+class NullRenderer(Renderer):
+    """Format and write nothing"""
+
+    def _ignore(self, *args, **kwargs):
+        pass
+
+    write = battle_start = settings = turn_start = player_action = ennemies_turn = ennemy_action = _ignore
+    turn_recap = ennemy_list = hint = gameover = _ignore
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_renderer.py"""
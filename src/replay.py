@@ -0,0 +1,102 @@
+"""Record a game (seed, setup and player decisions) and replay it.
+Every random draw of a game comes from its RandomSource, so the seed, the setup and the player decisions are
+enough to replay the exact same battle: a strange outcome reported by a player can be reproduced.
+- Recording: GameRecording.of(game) before the game starts, then play with recording.recording_controller(...)
+- Replay: recording.replay(turn_nb) replays the first turns without any output, then game.play() continues in the CLI
+"""
+from dataclasses import dataclass, field
+import json
+import os
+
+from src.battle_engine import PlayerController, RecordingController, ReplayController
+from src.game import RoleplayGame
+from src.random_source import RandomSource
+
+
+@dataclass
+class GameRecording:
+    """Everything needed to replay a game.
+
+    decisions are the player decisions in order: (Character.ACTION_ATTACK or Character.ACTION_DRINKPOTION, index of the ennemy).
+    """
+    VERSION = 1
+
+    seed: int
+    setup: dict
+    decisions: list[tuple[int, int]] = field(default_factory=list)
+
+
+    @classmethod
+    def of(cls, game: RoleplayGame) -> "GameRecording":
+        """Start the recording of a game not started yet
+
+        Args:
+            game (RoleplayGame): The game. Its RandomSource must have a seed (not GLOBAL_RANDOM_SOURCE).
+
+        Raises:
+            ValueError: the random draws of the game cannot be replayed
+
+        Returns:
+            GameRecording: A recording without decision
+        """
+        if game.rng.seed is None:
+            raise ValueError("The game cannot be recorded: its RandomSource has no seed.")
+        return cls(game.rng.seed, game.to_dict())
+
+
+    def recording_controller(self, player_controller: PlayerController) -> RecordingController:
+        """A controller that records the decisions of player_controller in this recording"""
+        return RecordingController(player_controller, self.decisions)
+
+
+    def create_game(self) -> RoleplayGame:
+        """A new game with the recorded setup and seed, not started"""
+        return RoleplayGame.from_dict(self.setup, RandomSource(self.seed))
+
+
+    def replay(self, turn_nb: int | None = None) -> tuple[RoleplayGame, int]:
+        """Replay the recorded game without any output
+
+        Args:
+            turn_nb (int, optional): Number of turns to replay. Defaults to None (all the recorded decisions).
+
+        Returns:
+            tuple[RoleplayGame, int]: The game after the replayed turns (game.play() continues it), and the number of decisions replayed
+        """
+        game = self.create_game()
+        player_controller = ReplayController(self.decisions)
+        game.fast_forward(player_controller, turn_nb)
+        return game, player_controller.nb_replayed
+
+
+    def to_dict(self) -> dict:
+        return {"version": GameRecording.VERSION, "seed": self.seed, "setup": self.setup, "decisions": [list(decision) for decision in self.decisions]}
+
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameRecording":
+        """Create a recording from the data of to_dict
+
+        Raises:
+            ValueError: unsupported version
+        """
+        if data.get("version") != GameRecording.VERSION:
+            raise ValueError(f"Unsupported recording version: {data.get('version')}")
+        return cls(data["seed"], data["setup"], [(action, ennemy_index) for action, ennemy_index in data["decisions"]])
+
+
+    def save(self, path: str | os.PathLike):
+        """Write the recording in a JSON file"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file)
+
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> "GameRecording":
+        """Read a recording written by save"""
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_replay.py"""
@@ -0,0 +1,406 @@
+"""Compact binary save of a RoleplayGame (a setup, or a battle in progress) and an archive of many saved games.
+- dumps / loads: the state of a game (characters, stats, inventories, potions and the number of turns played) in a versioned
+  binary format, about 4 times smaller than its JSON. The RandomSource is not saved (like to_dict): a reloaded game draws new values.
+- GameArchive: an append-only file of saved games, with an index of their offsets in a sidecar file (.idx).
+  Both files are memory-mapped: loading one game reads its index entry and its own bytes only, whatever the size of the archive.
+
+Format (little endian):
+    game:       MAGIC, version (u16), turns played (u32), player, number of ennemies (u32), ennemies
+    character:  name, stats (max_life i32, attack_min i32, attack_max i32, can_drink_potion u8), current_life (i32),
+                took_a_potion (u8), inventory
+    inventory:  number of items (u32), then for each item a tag (u8) and: potion (min i32, max i32, is_empty u8),
+                potion stack (count u32, min i32, max i32) or object (its str)
+    str:        length (u16) and UTF-8 bytes
+    archive:    ARCHIVE_MAGIC, then for each game its size (u32) and its bytes. The index is one u64 offset by game.
+"""
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator
+
+from src.character import Character, CharacterStats
+from src.exceptions import InvalidNameError, InvalidStatsError, PoisonPotionError
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.potion import Potion, PotionStack
+from src.random_source import RandomSource
+
+MAGIC = b"RPGS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHI")
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_STATS = struct.Struct("<iiiB")
+_STATE = struct.Struct("<iB")
+_POTION = struct.Struct("<iiB")
+_POTION_STACK = struct.Struct("<Iii")
+
+_TAG_POTION = 0
+_TAG_POTION_STACK = 1
+_TAG_OBJECT = 2
+
+
+class _Writer:
+    """Encode the parts of a game in a bytearray"""
+    __slots__ = ('data',)
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def pack(self, record: struct.Struct, *values):
+        self.data += record.pack(*values)
+
+    def string(self, value: str):
+        encoded = value.encode()
+        if len(encoded) > 0xFFFF:
+            raise ValueError(f"String too long to be saved ({len(encoded)} bytes): {value[:30]}...")
+        self.data += _U16.pack(len(encoded))
+        self.data += encoded
+
+    def inventory(self, inventory: Inventory):
+        items = list(inventory._items.values())     #The stored objects: a PotionStack is one item
+        self.pack(_U32, len(items))
+        for obj in items:
+            if isinstance(obj, PotionStack):
+                self.data.append(_TAG_POTION_STACK)
+                self.pack(_POTION_STACK, obj.count, obj.min_recup, obj.max_recup)
+            elif isinstance(obj, Potion):
+                self.data.append(_TAG_POTION)
+                self.pack(_POTION, obj.min_recup, obj.max_recup, obj.is_empty)
+            else:
+                self.data.append(_TAG_OBJECT)
+                self.string(str(obj))
+
+    def character(self, character: Character):
+        stats = character.stats
+        self.string(character._name)     #Without the colors of the name property
+        self.pack(_STATS, stats.max_life, stats.attack_min, stats.attack_max, stats.can_drink_potion)
+        self.pack(_STATE, character.current_life, character.took_a_potion)
+        self.inventory(character.inventory)
+
+
+class _Reader:
+    """Decode the parts of a game from a buffer (bytes, memoryview or mmap slice)"""
+    __slots__ = ('data', 'offset')
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, record: struct.Struct) -> tuple:
+        values = record.unpack_from(self.data, self.offset)
+        self.offset += record.size
+        return values
+
+    def byte(self) -> int:
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def string(self) -> str:
+        length = self.unpack(_U16)[0]
+        start = self.offset
+        self.offset += length
+        if self.offset > len(self.data):
+            raise ValueError("Truncated string.")
+        return bytes(self.data[start:self.offset]).decode()
+
+    def inventory(self) -> Inventory:
+        inventory = Inventory()
+        for _ in range(self.unpack(_U32)[0]):
+            tag = self.byte()
+            if tag == _TAG_POTION_STACK:
+                inventory.add(PotionStack(*self.unpack(_POTION_STACK)))
+            elif tag == _TAG_POTION:
+                min_recup, max_recup, is_empty = self.unpack(_POTION)
+                potion = Potion(min_recup, max_recup)
+                potion.is_empty = bool(is_empty)
+                inventory.add(potion)
+            elif tag == _TAG_OBJECT:
+                inventory.add(self.string())
+            else:
+                raise ValueError(f"Unknown inventory item tag: {tag}")
+        return inventory
+
+    def character(self, rng: RandomSource) -> Character:
+        name = self.string()
+        max_life, attack_min, attack_max, can_drink_potion = self.unpack(_STATS)
+        current_life, took_a_potion = self.unpack(_STATE)
+        character = Character(name, CharacterStats(max_life, attack_min, attack_max, bool(can_drink_potion)), self.inventory(), rng)
+        character.current_life = current_life
+        character._took_a_potion = bool(took_a_potion)
+        return character
+
+
+def dumps(game: RoleplayGame) -> bytes:
+    """The state of a game in the binary format (see loads)
+
+    Args:
+        game (RoleplayGame): The game: not started, in progress or over
+
+    Raises:
+        ValueError: a name or an object of an inventory is too long (more than 65535 bytes)
+
+    Returns:
+        bytes: The saved game
+    """
+    writer = _Writer()
+    writer.pack(_HEADER, MAGIC, VERSION, game._tour_nb)
+    writer.character(game.player)
+    writer.pack(_U32, len(game.ennemies))
+    for ennemy in game.ennemies:
+        writer.character(ennemy)
+    return bytes(writer.data)
+
+
+def loads(data, rng: RandomSource | None = None) -> RoleplayGame:
+    """Create a game from the data of dumps. A battle in progress continues with play() after its last saved turn.
+    The potions get new ids.
+
+    Args:
+        data: bytes, memoryview or any buffer that contains one saved game
+        rng (RandomSource, optional): Source of the random draws of the game. Defaults to None (a new seed).
+
+    Raises:
+        ValueError: the data are not a saved game, or are saved by an unknown version, or are truncated or corrupted
+            (including a character or a potion that cannot be created)
+
+    Returns:
+        RoleplayGame: The game
+    """
+    reader = _Reader(data)
+    try:
+        magic, version, turn_nb = reader.unpack(_HEADER)
+        if magic != MAGIC:
+            raise ValueError("The data are not a saved game.")
+        if version != VERSION:
+            raise ValueError(f"Unknown version of saved game: {version} (supported: {VERSION}).")
+
+        game_rng = rng if rng is not None else RandomSource()
+        player = reader.character(game_rng)
+        ennemies = [reader.character(game_rng) for _ in range(reader.unpack(_U32)[0])]
+    except (struct.error, IndexError, UnicodeDecodeError, InvalidNameError, InvalidStatsError, PoisonPotionError) as error:
+        raise ValueError(f"Truncated or corrupted saved game: {error}") from error
+
+    game = RoleplayGame(player, ennemies, game_rng)
+    game.resume_at(turn_nb)
+    return game
+
+
+class GameArchive:
+    """An append-only file of saved games and its index of offsets (path + INDEX_SUFFIX), read through memory maps.
+    The index is rebuilt from the archive if it is missing or behind (ex: the program stopped between the two writes).
+
+    Use it as a context manager (or call close).
+    """
+    MAGIC = b"RPGARC1\n"
+    INDEX_SUFFIX = ".idx"
+    _OFFSET = struct.Struct("<Q")
+
+    def __init__(self, path: str | os.PathLike):
+        """Open the archive, create it if it does not exist
+
+        Args:
+            path (str | os.PathLike): The archive file
+
+        Raises:
+            ValueError: the file is not an archive of saved games
+        """
+        self.path = os.fspath(path)
+        self.index_path = self.path + GameArchive.INDEX_SUFFIX
+        self._file = open(self.path, "a+b")
+        self._index_file = open(self.index_path, "a+b")
+        self._map: mmap.mmap | None = None
+        self._index_map: mmap.mmap | None = None
+
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.write(GameArchive.MAGIC)
+            self._file.flush()
+        else:
+            self._file.seek(0)
+            if self._file.read(len(GameArchive.MAGIC)) != GameArchive.MAGIC:
+                self.close()
+                raise ValueError(f"{self.path} is not an archive of saved games.")
+        self._size = os.path.getsize(self.path)
+        self._length = self._check_index()
+
+
+    def __len__(self) -> int:
+        return self._length
+
+
+    def append(self, game: RoleplayGame) -> int:
+        """Save a game at the end of the archive
+
+        Args:
+            game (RoleplayGame): The game
+
+        Returns:
+            int: Index of the saved game
+        """
+        return self.extend([game])[0]
+
+
+    def extend(self, games: Iterable[RoleplayGame]) -> range:
+        """Save games at the end of the archive, in one write
+
+        Args:
+            games (Iterable[RoleplayGame]): The games
+
+        Returns:
+            range: Indexes of the saved games
+        """
+        records = bytearray()
+        offsets = bytearray()
+        offset = self._size
+        for game in games:
+            data = dumps(game)
+            offsets += GameArchive._OFFSET.pack(offset)
+            records += _U32.pack(len(data))
+            records += data
+            offset += _U32.size + len(data)
+        return self._append_records(records, offsets)
+
+
+    def read_bytes(self, index: int) -> bytes:
+        """The saved data of a game (see loads)
+
+        Args:
+            index (int): Index of the game (negative: from the end)
+
+        Raises:
+            IndexError: no game at this index
+            ValueError: the index entry points outside of the archive (corrupted index)
+
+        Returns:
+            bytes: The saved game
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"No saved game at index {index} (the archive has {self._length} games).")
+
+        if self._index_map is None:
+            self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = GameArchive._OFFSET.unpack_from(self._index_map, index * GameArchive._OFFSET.size)[0]
+        #_check_index only checks the last entry: the others are checked here, when they are read
+        if not len(GameArchive.MAGIC) <= offset <= len(self._map) - _U32.size:
+            raise ValueError(f"Corrupted index of {self.path}: offset {offset} of the game {index} is outside of the archive.")
+        size = _U32.unpack_from(self._map, offset)[0]
+        start = offset + _U32.size
+        if start + size > len(self._map):
+            raise ValueError(f"Corrupted index of {self.path}: the game {index} ends after the end of the archive.")
+        return self._map[start:start + size]
+
+
+    def __getitem__(self, index: int) -> RoleplayGame:
+        """The saved game at index, loaded with a new RandomSource"""
+        return loads(self.read_bytes(index))
+
+
+    def __iter__(self) -> Iterator[RoleplayGame]:
+        for index in range(self._length):
+            yield self[index]
+
+
+    def close(self):
+        self._unmap()
+        self._file.close()
+        self._index_file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+    def _append_records(self, records: bytes, offsets: bytes) -> range:
+        """Write the records, then their offsets: the index never points after the end of the archive"""
+        first = self._length
+        if not offsets:
+            return range(first, first)
+        self._unmap()   #A map does not see the new bytes
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(records)
+        self._file.flush()
+        self._index_file.write(offsets)
+        self._index_file.flush()
+        self._size += len(records)
+        self._length += len(offsets) // GameArchive._OFFSET.size
+        return range(first, self._length)
+
+
+    def _unmap(self):
+        if self._index_map is not None:
+            self._index_map.close()
+            self._map.close()
+            self._index_map = self._map = None
+
+
+    def _check_index(self) -> int:
+        """Number of games in the index. Rebuild the index by reading the records if it does not end at the end of the archive.
+        Only the last entry is checked (opening a big archive does not read all its index): the offsets of the other
+        entries are checked by read_bytes.
+        """
+        index_size = os.path.getsize(self.index_path)
+        length = index_size // GameArchive._OFFSET.size
+        if index_size % GameArchive._OFFSET.size == 0:
+            if length == 0 and self._size == len(GameArchive.MAGIC):
+                return 0
+            if length > 0:
+                self._file.seek(0)
+                with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as archive_map, \
+                     mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ) as index_map:
+                    last = GameArchive._OFFSET.unpack_from(index_map, index_size - GameArchive._OFFSET.size)[0]
+                    if last + _U32.size <= self._size and last + _U32.size + _U32.unpack_from(archive_map, last)[0] == self._size:
+                        return length
+        return self._rebuild_index()
+
+
+    def _rebuild_index(self) -> int:
+        """Read the sizes of all the records to write the index again. A record cut by the end of the file is removed."""
+        offsets = bytearray()
+        offset = len(GameArchive.MAGIC)
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as archive_map:
+            while offset + _U32.size <= self._size:
+                end = offset + _U32.size + _U32.unpack_from(archive_map, offset)[0]
+                if end > self._size:
+                    break
+                offsets += GameArchive._OFFSET.pack(offset)
+                offset = end
+
+        self._file.truncate(offset)
+        self._size = offset
+        self._index_file.truncate(0)
+        self._index_file.write(offsets)
+        self._index_file.flush()
+        return len(offsets) // GameArchive._OFFSET.size
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from src.battle_engine import PotionThresholdController
+
+    #Save 100 000 battles in progress, then load a few of them
+    game = RoleplayGame.settings_with_two_weak_ennemies(rng=RandomSource(1))
+    game.simulate(PotionThresholdController(), max_turns=3)
+    print(f"Partie sauvegardée: {len(dumps(game))} octets (JSON: {len(str(game.to_dict()))} caractères)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with GameArchive(os.path.join(directory, "parties.rpg")) as archive:
+            start = time.perf_counter()
+            archive.extend(game for _ in range(100_000))
+            print(f"{len(archive)} parties archivées en {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        with GameArchive(os.path.join(directory, "parties.rpg")) as archive:
+            loaded = [archive[index] for index in (0, 50_000, -1)]
+        print(f"Ouverture et chargement de 3 parties: {(time.perf_counter() - start) * 1e3:.2f} ms")
@@ -1,13 +1,11 @@
 """Setup a RolePlayGame by a user, in terminal.
 - A RoleplayGame object is available after a call of the create method (if user do not cancel during setup process) by the game property.
 - Check if settings are valid before getting the game otherwise a ValueError will be raised.
-- It's possible de display directly the available game settings. This method will need to be modify if more predefined setting game are create in 
-  the RolePlayGame class.
+- It's possible de display directly the available game settings: the setups of the catalog (src/catalog.json by default),
+  then the manual setup.
 """
-import copy
-
+from src.catalog import Catalog, load_catalog
 from src.game import RoleplayGame
-from src.setup_game_manually import SetupGameManually
 from src.utils import get_valid_user_input
 
 
@@ -17,13 +15,19 @@ class SetupGame:
     Raises:
         ValueError: when trying to get the RoleplayGame (game property getter) while the setup is not valid
     """
-    SETTINGS_DEFAULT = 1
+    SETTINGS_DEFAULT = 1                #Choices of the default catalog. The manual setup is always the last choice.
     SETTINGS_TWO_WEAKS_ENNEMIES = 2
     SETTINGS_MANUAL = 3
     CANCEL = ''
 
-    def __init__(self):
+    def __init__(self, catalog: Catalog | None = None):
+        """Init the setup
+
+        Args:
+            catalog (Catalog, optional): The predefined setups of the menu. Defaults to None: the default catalog (load_catalog()).
+        """
         self._game = None
+        self.catalog = catalog if catalog is not None else load_catalog()
 
 
     def create(self) -> bool:
@@ -44,18 +48,14 @@ class SetupGame:
             return False
 
         setting_choice = int(setting_choice)
-        match setting_choice:
-            case SetupGame.SETTINGS_DEFAULT:
-                self._game = RoleplayGame.default_settings()
-            
-            case SetupGame.SETTINGS_TWO_WEAKS_ENNEMIES:
-                self._game = RoleplayGame.settings_with_two_weak_ennemies()
-            
-            case SetupGame.SETTINGS_MANUAL:
-                manual_settings = SetupGameManually()
-                manual_settings.create()
-                if manual_settings.is_valid:
-                    self._game = RoleplayGame(manual_settings.player, manual_settings.ennemmies)
+        if setting_choice <= len(self.catalog.setups):
+            self._game = self.catalog.setups[setting_choice - 1].create_game()
+        else:
+            from src.setup_game_manually import SetupGameManually     #The wizard is imported only when it is used (startup time)
+            manual_settings = SetupGameManually(self.catalog)
+            manual_settings.create()
+            if manual_settings.is_valid:
+                self._game = RoleplayGame(manual_settings.player, manual_settings.ennemmies)
 
         return self.is_valid          
 
@@ -84,10 +84,10 @@ class SetupGame:
             ValueError: when trying to get the game while the game setups are not valid.
 
         Returns:
-            RoleplayGame: A copy of the RoleplayGame object
+            RoleplayGame: A copy of the RoleplayGame object, with its own newly seeded RandomSource
         """
-        if isinstance(self._game, RoleplayGame):    #Note: if we used is_valid instead, deepcopy do not reconize that the None is eliminated and parse a possible error
-            return copy.deepcopy(self._game)
+        if isinstance(self._game, RoleplayGame):    #Note: if we used is_valid instead, the type checker do not reconize that the None is eliminated
+            return self._game.clone()
         raise ValueError("The game is not setup properly.")
         
 
@@ -98,11 +98,12 @@ class SetupGame:
             tuple: Valid possible choices of settings
         """
         print("Configurations possibles: ")
-        print(f"  {SetupGame.SETTINGS_DEFAULT}. Jeu par défaut")
-        print(f"  {SetupGame.SETTINGS_TWO_WEAKS_ENNEMIES}. Jeu avec deux adversaires faibles")
-        print(f"  {SetupGame.SETTINGS_MANUAL}. Configuration manuelle")
+        for i, setup in enumerate(self.catalog.setups, 1):
+            print(f"  {i}. {setup.label}")
+        manual_choice = len(self.catalog.setups) + 1
+        print(f"  {manual_choice}. Configuration manuelle")
     
-        return (SetupGame.SETTINGS_DEFAULT, SetupGame.SETTINGS_TWO_WEAKS_ENNEMIES, SetupGame.SETTINGS_MANUAL)
+        return tuple(range(1, manual_choice + 1))
 
 
 
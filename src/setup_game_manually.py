@@ -2,9 +2,11 @@
 - call create() to begin the creation of a setup
 - get is_valid to check if a valid RolePlayGame setup has been created correctly
 - get config to have a string representation of the actual setup
+The predefined ennemies are the archetypes of the catalog (src/catalog.json by default).
 """
 from src.utils import get_valid_user_input, get_nonempty_string_input, get_valid_int_input
-from src.character import Character
+from src.catalog import Catalog, load_catalog
+from src.character import Character, CharacterStats
 from src.potion import Potion
 import src.constants as c
 
@@ -19,7 +21,7 @@ class SetupGameManually():
     END_CONFIG = 7
     INVALID_CHOICE = 0
 
-    ENNEMY_STANDARD = 1
+    ENNEMY_STANDARD = 1     #Choices of the default catalog
     ENNEMY_GOBELIN = 2
     ENNEMY_THIEF = 3
     ENNEMY_DRAGON = 4
@@ -27,11 +29,16 @@ class SetupGameManually():
     CREATED = True
     MODIFIED = False
 
-    def __init__(self):
-        """ Init setup game manually"""
+    def __init__(self, catalog: Catalog | None = None):
+        """ Init setup game manually
+
+        Args:
+            catalog (Catalog, optional): The predefined ennemies of the menu. Defaults to None: the default catalog (load_catalog()).
+        """
 
         #self.player : initialize during creation process 
         self.ennemmies = []
+        self.catalog = catalog if catalog is not None else load_catalog()
 
 
     def create(self):
@@ -131,19 +138,10 @@ class SetupGameManually():
     def _create_a_predefined_ennemy(self):
         """Create a predefined ennemy and add it to the ennemy setup. The process will always succeed"""
         
-        valid_ennemies_choice = SetupGameManually._display_predefined_ennemies_menu()
-        answer = int(get_valid_user_input(f"Choix ({SetupGameManually.ENNEMY_STANDARD}-{SetupGameManually.ENNEMY_DRAGON}) ", valid_ennemies_choice))
-
-        match answer:
-            case SetupGameManually.ENNEMY_STANDARD:
-                new_ennemy = Character.default_ennemy()
-            case SetupGameManually.ENNEMY_GOBELIN:
-                new_ennemy = Character.gobelin()
-            case SetupGameManually.ENNEMY_THIEF:
-                new_ennemy = Character.thief()
-            case SetupGameManually.ENNEMY_DRAGON:
-                new_ennemy = Character.dragon()
+        valid_ennemies_choice = self._display_predefined_ennemies_menu()
+        answer = int(get_valid_user_input(f"Choix (1-{len(valid_ennemies_choice)}) ", valid_ennemies_choice))
 
+        new_ennemy = self.catalog.archetypes[answer - 1].create()
         self.ennemmies.append(new_ennemy)
 
 
@@ -216,17 +214,17 @@ class SetupGameManually():
             is_ennemy (bool): True if it's an ennemy, False if it's the player character
         """
         character.name = get_nonempty_string_input(f"Nom {"de l'ennemi" if is_ennemy else 'du personnage'}: ")
-        character.stats.max_life = get_valid_int_input("Nombre de points de vie: ")[0]
-        character.current_life = character.stats.max_life
-
+        max_life = get_valid_int_input("Nombre de points de vie: ")[0]
         attacks_nb = get_valid_int_input("Attaque min et max (séparés par un espace): ", nb_of_int=2, valid_ascending_order=True)
-        character.stats.attack_min = attacks_nb[0]
-        character.stats.attack_max = attacks_nb[1]
 
         if is_ennemy:
-            character.stats.can_drink_potion = get_valid_user_input(f"Cet ennemi peut-il boire des potions? (o/n): ", ('o', 'n')) == 'o'
+            can_drink_potion = get_valid_user_input(f"Cet ennemi peut-il boire des potions? (o/n): ", ('o', 'n')) == 'o'
         else: 
-            character.stats.can_drink_potion = True   #The player Character can always drink potion
+            can_drink_potion = True   #The player Character can always drink potion
+
+        #Stats are immutable (and can be shared with other characters): replace them
+        character.stats = CharacterStats(max_life, attacks_nb[0], attacks_nb[1], can_drink_potion)
+        character.current_life = character.stats.max_life
 
         if character.stats.can_drink_potion:
             character.inventory.clear() #We recreate the inventory
@@ -272,20 +270,17 @@ class SetupGameManually():
         return (SetupGameManually.CREATE_OR_MODIF_PERSO, SetupGameManually.CREATE_PREDEFINED_ENNEMY, SetupGameManually.CREATE_ENNEMY, SetupGameManually.MODIF_ENNEMY, SetupGameManually.DELETE_ENNEMY, SetupGameManually.DISPLAY_CONFIG, SetupGameManually.END_CONFIG)
 
 
-    @staticmethod
-    def _display_predefined_ennemies_menu() -> tuple:
-        """Display a ordered list of the available predefined ennemies
+    def _display_predefined_ennemies_menu(self) -> tuple:
+        """Display a ordered list of the available predefined ennemies (the archetypes of the catalog)
 
         Returns:
             tuple: Valid ennemies choices
         """
         print(f"{'-' * 10} Menu des ennemies prédéfinis {'-' * 10}")
-        print(f"{SetupGameManually.ENNEMY_STANDARD}. Créer un ennemi standard")
-        print(f"{SetupGameManually.ENNEMY_GOBELIN}. Créer un gobelin")
-        print(f"{SetupGameManually.ENNEMY_THIEF}. Créer un voleur")
-        print(f"{SetupGameManually.ENNEMY_DRAGON}. Créer un dragon")
+        for i, archetype in enumerate(self.catalog.archetypes, 1):
+            print(f"{i}. {archetype.label}")
 
-        return (SetupGameManually.ENNEMY_STANDARD, SetupGameManually.ENNEMY_GOBELIN, SetupGameManually.ENNEMY_THIEF, SetupGameManually.ENNEMY_DRAGON)
+        return tuple(range(1, len(self.catalog.archetypes) + 1))
 
     
 if __name__ == '__main__':
@@ -0,0 +1,105 @@
+"""Summary of a set of simulated battles (win rate and turns statistics).
+Summaries can be merged, so battles simulated in separate batches or processes give one final summary.
+"""
+from dataclasses import dataclass, field
+import math
+
+
+@dataclass
+class SimulationSummary:
+    """Results of many simulated battles.
+
+    turn_counts is an histogram of the number of turns of each finished battle: {nb of turns: nb of battles}.
+    A battle is unfinished if it reached the maximum number of turns allowed by the simulation.
+    """
+    nb_battles: int = 0
+    nb_wins: int = 0
+    nb_losses: int = 0
+    nb_unfinished: int = 0
+    turn_counts: dict[int, int] = field(default_factory=dict)
+
+
+    def add_battle(self, player_won: bool | None, nb_turns: int, count: int = 1):
+        """Add the result of one battle (or of count battles with the same result)
+
+        Args:
+            player_won (bool | None): True if the player won, False if he lost, None if the battle is unfinished
+            nb_turns (int): Number of turns played
+            count (int, optional): Number of battles with this result. Defaults to 1.
+        """
+        self.nb_battles += count
+        if player_won is None:
+            self.nb_unfinished += count
+            return
+
+        if player_won:
+            self.nb_wins += count
+        else:
+            self.nb_losses += count
+        self.turn_counts[nb_turns] = self.turn_counts.get(nb_turns, 0) + count
+
+
+    def merge(self, other: "SimulationSummary") -> "SimulationSummary":
+        """Add the results of another summary to this one
+
+        Args:
+            other (SimulationSummary): The summary to add
+
+        Returns:
+            SimulationSummary: self, to chain merges
+        """
+        self.nb_battles += other.nb_battles
+        self.nb_wins += other.nb_wins
+        self.nb_losses += other.nb_losses
+        self.nb_unfinished += other.nb_unfinished
+        for nb_turns, count in other.turn_counts.items():
+            self.turn_counts[nb_turns] = self.turn_counts.get(nb_turns, 0) + count
+        return self
+
+
+    @property
+    def nb_finished(self) -> int:
+        return self.nb_wins + self.nb_losses
+
+
+    @property
+    def win_rate(self) -> float:
+        """Ratio of battles won by the player (0 if there is no battle)"""
+        return self.nb_wins / self.nb_battles if self.nb_battles else 0.0
+
+
+    @property
+    def mean_turns(self) -> float:
+        """Mean number of turns of the finished battles (0 if there is none)"""
+        if not self.nb_finished:
+            return 0.0
+        return sum(nb_turns * count for nb_turns, count in self.turn_counts.items()) / self.nb_finished
+
+
+    @property
+    def std_turns(self) -> float:
+        """Standard deviation of the number of turns of the finished battles (0 if there is none)"""
+        if not self.nb_finished:
+            return 0.0
+        mean = self.mean_turns
+        variance = sum(count * (nb_turns - mean) ** 2 for nb_turns, count in self.turn_counts.items()) / self.nb_finished
+        return math.sqrt(variance)
+
+
+    @property
+    def min_turns(self) -> int:
+        return min(self.turn_counts) if self.turn_counts else 0
+
+
+    @property
+    def max_turns(self) -> int:
+        return max(self.turn_counts) if self.turn_counts else 0
+
+
+    def __str__(self) -> str:
+        return (f"{self.nb_battles} parties: {self.win_rate:.2%} gagnées, {self.nb_losses} perdues, {self.nb_unfinished} non terminées. "
+                f"Tours: moyenne {self.mean_turns:.2f} (écart-type {self.std_turns:.2f}, min {self.min_turns}, max {self.max_turns}).")
+
+
+if __name__ == "__main__":
+    """Unit tests complete: check src/tests/test_simulation_summary.py"""
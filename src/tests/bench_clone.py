@@ -0,0 +1,45 @@
+"""Speed benchmark of the game copy made by SetupGame.get_game: RoleplayGame.clone compared with copy.deepcopy.
+Run: python -m src.tests.bench_clone
+"""
+import copy
+import timeit
+
+from src.character import Character
+from src.game import RoleplayGame
+from src.random_source import RandomSource
+
+
+def game_with_gobelins(nb_ennemies: int) -> RoleplayGame:
+    """The default player against nb_ennemies gobelins"""
+    return RoleplayGame(Character.default_player(), [Character.gobelin(f"Gobelin {i}") for i in range(nb_ennemies)])
+
+
+def deepcopy_game(game: RoleplayGame) -> RoleplayGame:
+    """The copy made by SetupGame.get_game before RoleplayGame.clone"""
+    game = copy.deepcopy(game)
+    game.rng = RandomSource()
+    return game
+
+
+def seconds_by_copy(copy_function, game: RoleplayGame, nb_copies: int) -> float:
+    """Mean time of one copy of the game, best of 3 measures"""
+    return min(timeit.repeat(lambda: copy_function(game), number=nb_copies, repeat=3)) / nb_copies
+
+
+def run() -> dict[str, float]:
+    """Measure every case
+
+    Returns:
+        dict[str, float]: {case name: microseconds by copy}
+    """
+    results = {}
+    for nb_ennemies, nb_copies in ((1, 2000), (100, 100), (10_000, 2)):
+        game = game_with_gobelins(nb_ennemies)
+        results[f"deepcopy, {nb_ennemies} ennemies"] = seconds_by_copy(deepcopy_game, game, nb_copies) * 1e6
+        results[f"clone, {nb_ennemies} ennemies"] = seconds_by_copy(RoleplayGame.clone, game, nb_copies) * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    for case, microseconds in run().items():
+        print(f"{case:30} {microseconds:12.1f} µs par copie")
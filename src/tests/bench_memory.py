@@ -0,0 +1,59 @@
+"""Memory benchmark of the combatants: bytes by instance of the slotted classes, compared with the same classes with a __dict__.
+Run: python -m src.tests.bench_memory
+"""
+import gc
+import tracemalloc
+
+from src.character import Character, CharacterStats
+from src.inventory import Inventory
+from src.potion import Potion
+
+
+class _DictPotion(Potion):
+    """A subclass without __slots__: its instances have a __dict__, like Potion before"""
+
+
+class _DictCharacter(Character):
+    """A subclass without __slots__: its instances have a __dict__, like Character before"""
+
+
+def bytes_by_instance(factory, nb_instances: int = 100_000) -> float:
+    """Memory allocated by instance, measured with tracemalloc
+
+    Args:
+        factory: Function without argument that creates one instance
+        nb_instances (int, optional): Number of instances kept alive during the measure. Defaults to 100_000.
+
+    Returns:
+        float: Number of bytes by instance
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [factory() for _ in range(nb_instances)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del instances
+    return (after - before) / nb_instances
+
+
+def run() -> dict[str, float]:
+    """Measure every case
+
+    Returns:
+        dict[str, float]: {case name: bytes by instance}
+    """
+    inventory = Inventory()     #Shared empty inventory: only the characters are measured
+    return {
+        "Potion (__slots__)": bytes_by_instance(lambda: Potion(15, 50)),
+        "Potion (__dict__)": bytes_by_instance(lambda: _DictPotion(15, 50)),
+        "Character (__slots__, interned stats)": bytes_by_instance(lambda: Character("Gobelin", Character.gobelin().stats, inventory)),
+        "Character (__dict__, new stats)": bytes_by_instance(lambda: _DictCharacter("Gobelin", CharacterStats(35, 2, 10, True), inventory)),
+        "Character.gobelin() (inventory included)": bytes_by_instance(Character.gobelin),
+    }
+
+
+if __name__ == "__main__":
+    for case, nb_bytes in run().items():
+        print(f"{case:45} {nb_bytes:8.1f} octets par instance")
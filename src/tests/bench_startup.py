@@ -0,0 +1,91 @@
+"""Cold start benchmark of the command line: a new interpreter runs main.py until the first menu, the user cancels and quits.
+- startup_seconds: wall time of the whole process, best of several runs (the run least disturbed by the other processes).
+  A first run, not timed, writes the bytecode cache (__pycache__) even if PYTHONDONTWRITEBYTECODE is set: the launches
+  of an installed game load the cached bytecode, they do not compile the modules.
+- imported_modules: the modules imported by `import main`. The modules of DEFERRED_MODULES must not be in it:
+  they are imported on first use (manual setup wizard, solvers, simulators, replay, profiler).
+The cold start fails the check above STARTUP_BUDGET_SECONDS (exit code 1). The budget is only checked here, on demand:
+the unit tests only check DEFERRED_MODULES, a wall time depends on the load of the machine.
+Run: python -m src.tests.bench_startup
+"""
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MAIN_PATH = os.path.join(ROOT, "main.py")
+
+#Setup cancelled (empty answer), then no new game: the shortest session, all of it is startup
+CANCELLED_SESSION = "\nn\n"
+#Fixed budget of a cold start on the reference machine, interpreter startup included (about 20 ms of it)
+STARTUP_BUDGET_SECONDS = 0.15
+
+DEFERRED_MODULES = (
+    "src.setup_game_manually",
+    "src.expectimax_ai",
+    "src.policy_solver",
+    "src.win_solver",
+    "src.batch_simulator",
+    "src.parallel_simulation",
+    "src.balance_sweep",
+    "src.replay",
+    "src.savegame",
+    "src.game_server",
+    "cProfile",
+    "pstats",
+    "numpy",
+    "tomllib",
+)
+
+
+def startup_seconds(repeat: int = 5, python: str = sys.executable) -> float:
+    """Wall time of a cancelled session of main.py in a new interpreter, best of repeat runs
+
+    Args:
+        repeat (int, optional): Number of runs. Defaults to 5.
+        python (str, optional): The interpreter. Defaults to sys.executable.
+
+    Raises:
+        subprocess.CalledProcessError: main.py failed
+
+    Returns:
+        float: Seconds
+    """
+    env = {name: value for name, value in os.environ.items() if name != "PYTHONDONTWRITEBYTECODE"}
+    best = float("inf")
+    for i in range(repeat + 1):
+        start = time.perf_counter()
+        subprocess.run([python, MAIN_PATH], input=CANCELLED_SESSION, capture_output=True, text=True, check=True, cwd=ROOT, env=env)
+        if i:   #The first run writes the bytecode cache
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def imported_modules(python: str = sys.executable) -> set[str]:
+    """The modules imported by `import main` in a new interpreter"""
+    output = subprocess.run([python, "-c", "import sys, main; print('\\n'.join(sys.modules))"],
+                            capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    return set(output.split())
+
+
+def run() -> dict[str, float]:
+    """Measure the cold start
+
+    Returns:
+        dict[str, float]: {case name: microseconds}
+    """
+    return {"main.py, configuration annulée": startup_seconds() * 1e6}
+
+
+def main() -> int:
+    eager = sorted(set(DEFERRED_MODULES) & imported_modules())
+    seconds = startup_seconds()
+    print(f"Démarrage à froid de main.py: {seconds * 1e3:.1f} ms (budget: {STARTUP_BUDGET_SECONDS * 1e3:.0f} ms)")
+    if eager:
+        print(f"Modules importés au démarrage au lieu de leur première utilisation: {', '.join(eager)}")
+    return 1 if eager or seconds > STARTUP_BUDGET_SECONDS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
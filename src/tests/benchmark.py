@@ -0,0 +1,354 @@
+"""Benchmark suite of the hot paths: combat, inventory, setup, full battles and settings rendering.
+- Timings: microseconds by operation, best of several repeats (the repeat least disturbed by the other processes), with fixed seeds
+  and the garbage collector disabled during the measure, so two runs on the same machine give close figures.
+- Memory: peak of the memory allocated by one operation (tracemalloc, in a separate run: tracing slows the code down),
+  and the bytes by instance of bench_memory.
+- The copies of bench_clone (RoleplayGame.clone compared with copy.deepcopy) and the cold start of bench_startup are included.
+
+Results are saved in a JSON file and compared with a baseline (benchmark_baseline.json, measured on the reference machine):
+a figure above the baseline by more than the tolerance of its metric is a regression, and the exit code is 1.
+Run:
+    python -m src.tests.benchmark                       #measure, save benchmark_results.json and compare with the baseline
+    python -m src.tests.benchmark --save-baseline       #measure and replace the baseline (after an accepted change)
+    python -m src.tests.benchmark --quick               #fewer operations and smaller sizes: a quick check, less stable
+"""
+import argparse
+from dataclasses import dataclass
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from src.battle_engine import PotionThresholdController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.potion import Potion
+from src.random_source import RandomSource
+from src.setup_game import SetupGame
+from src.tests import bench_clone, bench_memory, bench_startup
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+RESULTS_PATH = "benchmark_results.json"
+FORMAT_VERSION = 1
+
+METRIC_MICROSECONDS = "us"
+METRIC_PEAK_KIB = "peak_kib"
+METRIC_BYTES = "bytes"
+
+#Relative tolerance of each metric: timings vary more than memory
+TOLERANCES = {METRIC_MICROSECONDS: 0.25, METRIC_PEAK_KIB: 0.10, METRIC_BYTES: 0.10}
+#Smaller differences are never a regression (a few bytes or a tenth of µs are noise, even on a tiny figure)
+MIN_DIFFERENCES = {METRIC_MICROSECONDS: 0.1, METRIC_PEAK_KIB: 1.0, METRIC_BYTES: 8.0}
+UNITS = {METRIC_MICROSECONDS: "µs", METRIC_PEAK_KIB: "Kio max", METRIC_BYTES: "octets"}
+
+SEED = 2024
+MAX_TURNS = 10_000
+REPEAT = 9
+QUICK_REPEAT = 3
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """One measured operation.
+
+    Attributes:
+        name: Name of the case in the results
+        prepare: Creates the state needed by number operations (not timed), ex: prepare(1000) creates 1000 games to play
+        operation: One timed operation on the state
+        number: Number of operations by repeat
+    """
+    name: str
+    prepare: Callable[[int], object]
+    operation: Callable[[object], object]
+    number: int
+
+
+@dataclass(frozen=True)
+class Regression:
+    """A figure above its baseline by more than the tolerance"""
+    case: str
+    metric: str
+    baseline: float
+    value: float
+
+    @property
+    def ratio(self) -> float:
+        return self.value / self.baseline if self.baseline else float("inf")
+
+    def __str__(self):
+        unit = UNITS.get(self.metric, self.metric)
+        return f"{self.case}: {self.value:.2f} {unit} au lieu de {self.baseline:.2f} {unit} (x{self.ratio:.2f})"
+
+
+def time_case(case: BenchmarkCase, repeat: int = 5) -> float:
+    """Time of one operation, best of repeat measures of case.number operations
+
+    Args:
+        case (BenchmarkCase): The measured case
+        repeat (int, optional): Number of measures. Defaults to 5.
+
+    Returns:
+        float: Microseconds by operation
+    """
+    best = float("inf")
+    operation = case.operation
+    for _ in range(repeat):
+        state = case.prepare(case.number)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(case.number):
+                operation(state)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best / case.number * 1e6
+
+
+def peak_memory(case: BenchmarkCase) -> float:
+    """Peak of the memory allocated by one operation of the case
+
+    Args:
+        case (BenchmarkCase): The measured case
+
+    Returns:
+        float: Kibibytes
+    """
+    state = case.prepare(1)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.operation(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+#Cases
+def _attack_state(number: int) -> tuple[Character, Character]:
+    attacker = Character("Joueur", Character.default_player().stats, Inventory(), RandomSource(SEED))
+    target = Character("Cible", CharacterStats(10**9, 1, 1, False), Inventory())     #Never dies
+    return attacker, target
+
+
+def _drink_state(number: int) -> Character:
+    return Character("Joueur", Character.default_player().stats, Inventory.with_potions(number, 15, 50), RandomSource(SEED))
+
+
+def _drink(character: Character) -> int:
+    character.current_life = 1
+    character.reset_took_a_potion()
+    return character.drink_a_potion()
+
+
+def _inventory_state(nb_objects: int) -> Callable[[int], Inventory]:
+    """An inventory of nb_objects objects, half of them potions added one by one"""
+    def prepare(number: int) -> Inventory:
+        inventory = Inventory()
+        for i in range(nb_objects // 2):
+            inventory.add(f"Objet {i}")
+            inventory.add(Potion(15, 50))
+        return inventory
+    return prepare
+
+
+def _get_and_put_back_a_potion(inventory: Inventory):
+    #The potion goes back at the end of the bag: the size of the inventory stays the same for every operation
+    inventory.add(inventory.get_a_potion())
+
+
+def _setup_state(nb_ennemies: int) -> Callable[[int], SetupGame]:
+    def prepare(number: int) -> SetupGame:
+        setup = SetupGame()
+        setup._game = bench_clone.game_with_gobelins(nb_ennemies)   #The game chosen by the user in the menu
+        return setup
+    return prepare
+
+
+def _battles_state(factory: Callable[[], RoleplayGame]):
+    """The games played by the number operations: copies of the same setup, drawn from one seeded source"""
+    def prepare(number: int):
+        game = factory()
+        rng = RandomSource(SEED)
+        return iter([game.clone(rng) for _ in range(number)])
+    return prepare
+
+
+_CONTROLLER = PotionThresholdController()
+
+def _play_battle(games) -> bool:
+    return next(games).simulate(_CONTROLLER, MAX_TURNS)
+
+
+def _archetype(ennemy_factory: Callable[[], Character]) -> Callable[[], RoleplayGame]:
+    return lambda: RoleplayGame(Character.default_player(), [ennemy_factory()])
+
+
+BATTLES = {
+    "default_settings": RoleplayGame.default_settings,
+    "settings_with_two_weak_ennemies": RoleplayGame.settings_with_two_weak_ennemies,
+    "joueur contre default_ennemy": _archetype(Character.default_ennemy),
+    "joueur contre gobelin": _archetype(Character.gobelin),
+    "joueur contre thief": _archetype(Character.thief),
+    "joueur contre dragon": _archetype(Character.dragon),
+}
+
+
+def cases(quick: bool = False) -> list[BenchmarkCase]:
+    """Every case of the suite
+
+    Args:
+        quick (bool, optional): Fewer operations and no large sizes. Defaults to False.
+
+    Returns:
+        list[BenchmarkCase]: The cases, in the order of the report
+    """
+    scale = 20 if quick else 1
+    sizes = (10, 1000) if quick else (10, 1000, 100_000)
+    nb_ennemies = (1, 100) if quick else (1, 100, 10_000)
+
+    all_cases = [
+        BenchmarkCase("Character.attacks", _attack_state, lambda state: state[0].attacks(state[1]), 200_000 // scale),
+        BenchmarkCase("Character.drink_a_potion", _drink_state, _drink, 100_000 // scale),
+    ]
+    for size in sizes:
+        all_cases.append(BenchmarkCase(f"Inventory.get_a_potion, {size} objets", _inventory_state(size), _get_and_put_back_a_potion, 100_000 // scale))
+    for nb_potions in sizes:
+        all_cases.append(BenchmarkCase(f"Inventory.with_potions, {nb_potions} potions", lambda number, nb_potions=nb_potions: nb_potions,
+                                       lambda nb: Inventory.with_potions(nb, 15, 50), 50_000 // scale))
+    for nb in nb_ennemies:
+        all_cases.append(BenchmarkCase(f"SetupGame.get_game, {nb} ennemis", _setup_state(nb), SetupGame.get_game, max(2, 100_000 // nb // scale)))
+    for name, factory in BATTLES.items():
+        all_cases.append(BenchmarkCase(f"Partie complète, {name}", _battles_state(factory), _play_battle, 5000 // scale))
+    for nb in nb_ennemies:
+        all_cases.append(BenchmarkCase(f"settings_info, {nb} ennemis", lambda number, nb=nb: bench_clone.game_with_gobelins(nb),
+                                       lambda game: game.settings_info, max(2, 50_000 // nb // scale)))
+    return all_cases
+
+
+def run(quick: bool = False, progress: Callable[[str], None] | None = None) -> dict:
+    """Measure every case
+
+    Args:
+        quick (bool, optional): Fewer operations, smaller sizes and no bench_memory/bench_clone/bench_startup suites. Defaults to False.
+        progress (Callable[[str], None], optional): Called with the name of each case before its measure. Defaults to None.
+
+    Returns:
+        dict: The results, ready to be saved in JSON:
+            {"version", "python", "machine", "quick", "cases": {case: {metric: value}}}
+    """
+    repeat = QUICK_REPEAT if quick else REPEAT
+    results = {}
+    for case in cases(quick):
+        if progress:
+            progress(case.name)
+        results[case.name] = {METRIC_MICROSECONDS: time_case(case, repeat), METRIC_PEAK_KIB: peak_memory(case)}
+
+    if not quick:
+        if progress:
+            progress("bench_memory, bench_clone, bench_startup")
+        for name, nb_bytes in bench_memory.run().items():
+            results[f"Mémoire: {name}"] = {METRIC_BYTES: nb_bytes}
+        for name, microseconds in bench_clone.run().items():
+            results[f"Copie: {name}"] = {METRIC_MICROSECONDS: microseconds}
+        for name, microseconds in bench_startup.run().items():
+            results[f"Démarrage: {name}"] = {METRIC_MICROSECONDS: microseconds}
+
+    return {"version": FORMAT_VERSION, "python": platform.python_version(), "machine": platform.platform(),
+            "quick": quick, "cases": results}
+
+
+def compare(results: dict, baseline: dict, tolerances: dict[str, float] | None = None) -> list[Regression]:
+    """Figures of results above their baseline by more than the tolerance of their metric.
+    Cases or metrics missing from one of the files are ignored (new case, quick run).
+
+    Args:
+        results (dict): Results of run
+        baseline (dict): Results of a previous run
+        tolerances (dict[str, float], optional): {metric: relative tolerance}. Defaults to None: TOLERANCES.
+
+    Returns:
+        list[Regression]: The regressions, empty if there is none
+    """
+    tolerances = TOLERANCES if tolerances is None else tolerances
+    regressions = []
+    for case, figures in results["cases"].items():
+        baseline_figures = baseline["cases"].get(case, {})
+        for metric, value in figures.items():
+            if metric not in baseline_figures:
+                continue
+            reference = baseline_figures[metric]
+            if value > reference * (1 + tolerances.get(metric, 0)) and value - reference > MIN_DIFFERENCES.get(metric, 0):
+                regressions.append(Regression(case, metric, reference, value))
+    return regressions
+
+
+def format_results(results: dict, baseline: dict | None = None) -> str:
+    """Results as a text table, with the ratio to the baseline if any"""
+    lines = []
+    for case, figures in results["cases"].items():
+        baseline_figures = baseline["cases"].get(case, {}) if baseline else {}
+        columns = []
+        for metric, value in figures.items():
+            column = f"{value:12.2f} {UNITS[metric]}"
+            if baseline_figures.get(metric):
+                column += f" (x{value / baseline_figures[metric]:.2f})"
+            columns.append(f"{column:32}")
+        lines.append(f"{case:55} " + " ".join(columns))
+    return "\n".join(lines)
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+        file.write("\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des chemins critiques du jeu, comparé à une référence.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Fichier JSON de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="Remplacer la référence par les résultats")
+    parser.add_argument("--quick", action="store_true", help="Mesure rapide, moins stable (non comparée à la référence)")
+    parser.add_argument("--tolerance", type=float, default=None, metavar="RATIO",
+                        help=f"Tolérance relative des temps (défaut: {TOLERANCES[METRIC_MICROSECONDS]}), à augmenter sur une machine partagée")
+    args = parser.parse_args(argv)
+
+    results = run(args.quick, lambda name: print(f"Mesure: {name}...", file=sys.stderr))
+    save(results, args.output)
+
+    if args.save_baseline:
+        save(results, args.baseline)
+        print(format_results(results))
+        print(f"Référence enregistrée: {args.baseline}")
+        return 0
+
+    baseline = load(args.baseline) if os.path.exists(args.baseline) and not args.quick else None
+    print(format_results(results, baseline))
+    if baseline is None:
+        return 0
+
+    if baseline.get("machine") != results["machine"] or baseline.get("python") != results["python"]:
+        print(f"Attention: référence mesurée sur {baseline.get('machine')} (Python {baseline.get('python')}), les temps ne sont pas comparables.")
+    tolerances = TOLERANCES if args.tolerance is None else TOLERANCES | {METRIC_MICROSECONDS: args.tolerance}
+    regressions = compare(results, baseline, tolerances)
+    for regression in regressions:
+        print(f"RÉGRESSION {regression}")
+    print(f"{len(regressions)} régression(s) sur {len(results['cases'])} cas.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
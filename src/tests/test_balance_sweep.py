@@ -0,0 +1,107 @@
+import csv
+
+import pytest
+
+from src.balance_sweep import BalanceSweep, METHOD_EXACT, apply_parameters, parse_range, write_csv, write_heatmap
+import src.balance_sweep as balance_sweep
+from src.battle_engine import PotionThresholdController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.potion import Potion
+from src.win_solver import WinSolver
+
+
+def test_parse_range():
+    assert parse_range("5") == [5]
+    assert parse_range("5:8") == [5, 6, 7, 8]
+    assert parse_range("5:9:2") == [5, 7, 9]
+    assert parse_range("1,3,7") == [1, 3, 7]
+    with pytest.raises(ValueError):
+        parse_range("1:5:0")
+
+
+def test_apply_parameters():
+    setup = RoleplayGame.settings_with_two_weak_ennemies().to_dict()
+    new_setup = apply_parameters(setup, {"player.max_life": 80, "ennemy.attack_max": 12, "ennemy2.can_drink_potion": 0,
+                                         "player.nb_potions": 5, "player.potion_max_recup": 60})
+    game = RoleplayGame.from_dict(new_setup)
+
+    assert game.player.stats.max_life == 80 and game.player.current_life == 80
+    assert [ennemy.stats.attack_max for ennemy in game.ennemies] == [12, 12]
+    assert [ennemy.stats.can_drink_potion for ennemy in game.ennemies] == [True, False]
+    potions = [obj for obj in game.player.inventory if isinstance(obj, Potion)]
+    assert len(potions) == 5 and all(potion.max_recup == 60 for potion in potions)
+    assert setup == RoleplayGame.settings_with_two_weak_ennemies().to_dict()    #The base setup is not modified
+
+    assert not any(isinstance(obj, Potion) for obj in RoleplayGame.from_dict(apply_parameters(setup, {"player.nb_potions": 0})).player.inventory)
+    for name in ("player.speed", "ennemy3.max_life", "boss.max_life"):
+        with pytest.raises(ValueError):
+            apply_parameters(setup, {name: 1})
+
+
+def test_BalanceSweep_results_do_not_depend_on_the_workers():
+    grid = {"ennemy.attack_max": [10, 12], "player.nb_potions": [0, 1, 2]}
+    sweep = BalanceSweep(RoleplayGame.default_settings(), grid, nb_battles=500, seed=3)
+    results = sweep.run(nb_workers=1)
+
+    assert [result.parameters for result in results] == list(sweep.points())
+    assert results == sweep.run(nb_workers=2)
+    #More potions: more wins
+    assert results[0].win_rate < results[2].win_rate
+
+
+def test_BalanceSweep_invalid_points_and_exact_method():
+    player = Character("Player", CharacterStats(12, 3, 5, True), Inventory.with_potions(1, 2, 6))
+    game = RoleplayGame(player, [Character("Ennemy", CharacterStats(10, 1, 3, False), Inventory())])
+    sweep = BalanceSweep(game, {"ennemy.attack_min": [1, 4], "ennemy.attack_max": [2, 3]}, method=METHOD_EXACT)
+    results = sweep.run(nb_workers=1)
+
+    assert sweep.nb_invalid_points == 2     #attack_min 4 > attack_max
+    assert [result.parameters for result in results] == [{"ennemy.attack_min": 1, "ennemy.attack_max": 2}, {"ennemy.attack_min": 1, "ennemy.attack_max": 3}]
+    expected = WinSolver(game, PotionThresholdController()).solve()
+    assert results[1].win_rate == pytest.approx(expected.win_probability)
+    assert results[1].expected_turns == pytest.approx(expected.expected_turns)
+
+
+def test_BalanceSweep_cache(tmp_path, monkeypatch):
+    grid = {"player.attack_max": [10, 11]}
+    sweep = BalanceSweep(RoleplayGame.default_settings(), grid, nb_battles=200, cache_dir=tmp_path)
+    results = sweep.run(nb_workers=1)
+    assert len((tmp_path / BalanceSweep.CACHE_FILE).read_text().splitlines()) == 2
+
+    #Only the new point is evaluated
+    evaluated = []
+    def evaluate(self, missing, cache, *args):
+        evaluated.extend(missing)
+        cache.update({key: (0.5, 1.0, 0.0) for key in missing})
+    monkeypatch.setattr(balance_sweep.BalanceSweep, "_evaluate", evaluate)
+    extended = BalanceSweep(RoleplayGame.default_settings(), {"player.attack_max": [10, 11, 12]}, nb_battles=200, cache_dir=tmp_path).run(nb_workers=1)
+    assert extended[:2] == results
+    assert len(evaluated) == 1
+
+    #Other settings: other keys
+    other = BalanceSweep(RoleplayGame.default_settings(), grid, nb_battles=300, cache_dir=tmp_path)
+    assert {other.point_key(apply_parameters(other.setup, point)) for point in other.points()}.isdisjoint(
+           {sweep.point_key(apply_parameters(sweep.setup, point)) for point in sweep.points()})
+
+
+def test_write_csv_and_heatmap(tmp_path):
+    sweep = BalanceSweep(RoleplayGame.default_settings(), {"ennemy.attack_max": [10, 12], "player.nb_potions": [0, 1, 2]}, nb_battles=100)
+    results = sweep.run(nb_workers=1)
+
+    write_csv(results, tmp_path / "sweep.csv")
+    with open(tmp_path / "sweep.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["ennemy.attack_max", "player.nb_potions", "win_rate", "expected_turns", "unfinished_rate"]
+    assert len(rows) == 7 and float(rows[1][2]) == results[0].win_rate
+
+    write_heatmap(results, "ennemy.attack_max", "player.nb_potions", tmp_path / "heatmap.csv")
+    with open(tmp_path / "heatmap.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["ennemy.attack_max\\player.nb_potions", "0", "1", "2"]
+    assert [row[0] for row in rows[1:]] == ["10", "12"]
+    assert float(rows[2][3]) == results[5].win_rate
+
+    with pytest.raises(ValueError):
+        write_heatmap(results, "ennemy.attack_max", "ennemy.attack_max", tmp_path / "heatmap.csv")
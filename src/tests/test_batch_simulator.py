@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.batch_simulator import BatchSimulator
+from src.battle_engine import AttackController, PotionThresholdController, RandomController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+from src.simulation_summary import SimulationSummary
+
+
+def test_BatchSimulator_controller():
+    game = RoleplayGame.default_settings()
+    assert BatchSimulator(game).drink_below_pct == 0
+    assert BatchSimulator(game, PotionThresholdController(30)).drink_below_pct == 30
+
+    with pytest.raises(ValueError):
+        BatchSimulator(game, RandomController())
+
+
+def test_BatchSimulator_deterministic_battle():
+    #The player kills the ennemy in 2 attacks: always win in 2 turns
+    player = Character("Player", CharacterStats(50, 25, 25, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(50, 10, 10, False), Inventory())
+    summary = BatchSimulator(RoleplayGame(player, [ennemy])).run(1000, seed=1)
+
+    assert summary.nb_wins == 1000
+    assert summary.turn_counts == {2: 1000}
+
+
+def test_BatchSimulator_potion_skip_turn():
+    #Drinking the potion (+30) makes the player skip a turn: the battle lasts 4 turns instead of 2
+    player = Character("Player", CharacterStats(100, 25, 25, True), Inventory.with_potions(1, 30, 30))
+    player.current_life = 10
+    ennemy = Character("Ennemy", CharacterStats(50, 1, 1, False), Inventory())
+    summary = BatchSimulator(RoleplayGame(player, [ennemy]), PotionThresholdController(25)).run(10, seed=1)
+
+    assert summary.nb_wins == 10
+    assert summary.turn_counts == {4: 10}
+    assert player.current_life == 10    #The game setup is not modified
+
+
+def test_BatchSimulator_unfinished():
+    player = Character("Player", CharacterStats(50, 0, 0, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(50, 0, 0, False), Inventory())
+    summary = BatchSimulator(RoleplayGame(player, [ennemy]), max_turns=5).run(10)
+
+    assert summary.nb_unfinished == 10
+    assert summary.win_rate == 0
+
+
+def test_BatchSimulator_same_results_as_BattleEngine():
+    game = RoleplayGame.settings_with_two_weak_ennemies()
+    controller = PotionThresholdController(40)
+
+    engine_summary = SimulationSummary()
+    for seed in range(3000):
+        battle = game.clone(RandomSource(seed))
+        engine_summary.add_battle(battle.simulate(controller), battle._tour_nb)
+
+    batch_summary = BatchSimulator(game, controller).run(30_000, seed=3, batch_size=7000)
+
+    assert batch_summary.nb_battles == 30_000
+    assert abs(batch_summary.win_rate - engine_summary.win_rate) < 0.02
+    assert abs(batch_summary.mean_turns - engine_summary.mean_turns) < 0.2
+
+
+def test_BatchSimulator_seed():
+    simulator = BatchSimulator(RoleplayGame.default_settings())
+    assert simulator.run(1000, seed=42) == simulator.run(1000, seed=42)
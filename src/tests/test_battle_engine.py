@@ -0,0 +1,184 @@
+import io
+
+import pytest
+
+from src.battle_engine import BattleEngine, ActionResult, AttackController, PotionThresholdController, RandomController
+from src.character import Character, CharacterStats
+from src.ennemy_ai import EnnemyAI
+from src.game import CliPlayerController, RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+from src.renderer import PlainRenderer
+from src.utils import ScriptedInputProvider, use_input_provider
+
+
+def test_BattleEngine_init():
+    with pytest.raises(ValueError):
+        BattleEngine(Character.default_player(), [])
+
+    engine = BattleEngine(Character.default_player(), [Character.default_ennemy()])
+    assert engine.turn_nb == 0
+    assert engine.gameover == False
+
+    with pytest.raises(ValueError):
+        engine.player_turn()    #No controller
+
+
+def test_BattleEngine_player_action():
+    player = Character("Player", CharacterStats(50, 10, 10, True), Inventory.with_potions(1, 5, 5))
+    ennemy = Character("Ennemy", CharacterStats(50, 0, 0, False), Inventory())
+    engine = BattleEngine(player, [ennemy])
+
+    result = engine.player_action(Character.ACTION_ATTACK, 0)
+    assert result.target is ennemy
+    assert result.value == 10
+    assert ennemy.current_life == 40
+
+    player.current_life = 20
+    result = engine.player_action(Character.ACTION_DRINKPOTION)
+    assert result.value == 5
+    assert player.current_life == 25
+
+    with pytest.raises(ValueError):
+        engine.player_action(99)
+
+
+def test_BattleEngine_skip_turn_after_potion():
+    player = Character("Player", CharacterStats(50, 0, 0, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(50, 1, 1, True), Inventory())
+    engine = BattleEngine(player, [ennemy], PotionThresholdController(drink_below_pct=101))
+
+    #The player has no potion: the controller attacks
+    results = engine.play_turn()
+    assert results[0].action == Character.ACTION_ATTACK
+
+    player.drink_a_potion()     #Potion not found but the bag has been searched
+    results = engine.play_turn()
+    assert results[0].action == ActionResult.SKIP_TURN
+    assert player.took_a_potion == False
+
+    ennemy.current_life = 1     #<5%: the ennemy AI always try to drink
+    results = engine.play_turn()
+    assert results[1].action == Character.ACTION_DRINKPOTION
+    assert results[1].value == Character.POTION_NOT_FOUND
+    results = engine.play_turn()
+    assert results[1].action == ActionResult.SKIP_TURN
+
+    ennemy.current_life = 0
+    results = engine.play_turn()
+    assert results[1].action == ActionResult.IS_DEAD
+
+
+def test_BattleEngine_run_until_gameover():
+    for controller in (AttackController(), PotionThresholdController(), RandomController()):
+        game = RoleplayGame.settings_with_two_weak_ennemies()
+        engine = BattleEngine(game.player, game.ennemies, controller)
+        player_won = engine.run()
+
+        assert engine.gameover
+        assert player_won == (not game.player.is_dead)
+        assert player_won == engine.all_ennemies_are_dead
+
+
+def test_BattleEngine_run_max_turns():
+    player = Character("Player", CharacterStats(50, 0, 0, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(50, 0, 0, False), Inventory())
+    engine = BattleEngine(player, [ennemy], AttackController())
+
+    assert engine.run(max_turns=10) == False
+    assert engine.turn_nb == 10
+    assert engine.gameover == False
+
+
+def test_RoleplayGame_simulate(capsys):
+    game = RoleplayGame.default_settings()
+    player_won = game.simulate(PotionThresholdController())
+
+    assert game.gameover
+    assert player_won == (not game.player.is_dead)
+    assert capsys.readouterr().out == ""
+
+
+def test_RoleplayGame_clone():
+    game = RoleplayGame.settings_with_two_weak_ennemies()
+    rng = RandomSource(3)
+
+    copy = game.clone(rng)
+    assert copy.rng is rng
+    assert copy.player.rng is rng and all(ennemy.rng is rng for ennemy in copy.ennemies)
+    assert game.rng is not rng
+    assert [ennemy.name for ennemy in copy.ennemies] == [ennemy.name for ennemy in game.ennemies]
+
+    copy.simulate(AttackController())
+    assert copy.gameover
+    assert not game.gameover
+    assert game.player.current_life == game.player.stats.max_life
+
+    assert game.clone().rng.seed != game.clone().rng.seed
+
+
+def test_BattleEngine_alive_ennemies():
+    player = Character("Player", CharacterStats(50, 100, 100, True), Inventory())
+    ennemies = [Character(f"Ennemy {i}", CharacterStats(50, 0, 0, False), Inventory()) for i in range(5)]
+    ennemies[0].current_life = 0
+    engine = BattleEngine(player, ennemies, AttackController())
+
+    assert engine.nb_alive_ennemies == 4
+    assert engine.first_alive_ennemy_index == 1
+
+    results = engine.play_turn()
+    assert [result.actor for result in results[1:]] == ennemies[1:]
+    assert results[1].action == ActionResult.IS_DEAD     #Killed by the player during this turn
+    assert list(engine.alive_ennemy_indexes) == [2, 3, 4]
+
+    results = engine.play_turn()
+    assert [result.actor for result in results[1:]] == ennemies[2:]     #The dead ennemies are not visited anymore
+
+    assert engine.run() == True
+    assert engine.nb_alive_ennemies == 0 and engine.all_ennemies_are_dead
+
+
+def test_RoleplayGame_large_recap(monkeypatch):
+    player = Character("Player", CharacterStats(10_000, 100, 100, True), Inventory())
+    ennemies = [Character(f"Ennemy {i}", CharacterStats(50, 1, 1, False), Inventory()) for i in range(100)]
+    game = RoleplayGame(player, ennemies, renderer=PlainRenderer(io.StringIO()))
+    answers = lambda question: str(game._engine.first_alive_ennemy_index + 1) if "Quel ennemi" in question else str(Character.ACTION_ATTACK)
+    monkeypatch.setattr('builtins.input', answers)
+    game.play(print_settings=False)
+
+    out = game.renderer.stream.getvalue()
+    first_recap = out[out.index("Récapitulatif du tour"):out.index("Tour 2")]
+    assert first_recap.count("pts de vie") == RoleplayGame.MAX_LISTED_ENNEMIES + 1
+    assert "... et 89 autres (99 ennemis en vie sur 100.)" in first_recap
+    assert not game.player.is_dead and game.gameover
+
+
+def test_BattleEngine_non_rule_based_ais_decide_when_they_play():
+    #An AI that looks at the player life must see the damage of the ennemies that played before it in the turn
+    seen_lives = []
+    class PlayerLifeAI(EnnemyAI):
+        __slots__ = ('opponent',)
+        def __init__(self, character, opponent):
+            super().__init__(character)
+            self.opponent = opponent
+        def decide_action(self):
+            seen_lives.append(self.opponent.current_life)
+            return Character.ACTION_ATTACK
+
+    player = Character("Player", CharacterStats(100, 0, 0, False), Inventory())
+    ennemies = [Character(f"Ennemy {i}", CharacterStats(50, 10, 10, True), Inventory()) for i in range(3)]
+    engine = BattleEngine(player, ennemies, AttackController(), ennemy_ai_factory=PlayerLifeAI)
+    engine.play_turn()
+
+    assert seen_lives == [100, 90, 80]
+    assert engine.decide_ennemy_actions() == {}
+
+
+def test_CliPlayerController_many_ennemies(capsys):
+    #The choice of the ennemy among 10 000 is asked with its bounds, not with the list of the 10 000 numbers
+    game = RoleplayGame(Character.default_player(), [Character.gobelin(f"Gobelin {i}") for i in range(10_000)], RandomSource(1),
+                        PlainRenderer(io.StringIO()))
+    game.resume_at(1)
+    with use_input_provider(ScriptedInputProvider([str(Character.ACTION_ATTACK), "10001", "10000"])):
+        assert CliPlayerController(game).choose_action(game._engine) == (Character.ACTION_ATTACK, 9999)
+    assert capsys.readouterr().out.endswith("Quel ennemi attaquez-vous (1-10000)? Choix invalide\nQuel ennemi attaquez-vous (1-10000)? ")
@@ -0,0 +1,55 @@
+import json
+
+from src.catalog import load_catalog
+from src.tests import benchmark
+from src.tests.benchmark import BenchmarkCase, Regression, compare, peak_memory, time_case
+
+
+def results_with(cases: dict) -> dict:
+    return {"version": benchmark.FORMAT_VERSION, "python": "3.13", "machine": "test", "quick": False, "cases": cases}
+
+
+def test_compare():
+    baseline = results_with({"Partie": {"us": 100.0, "peak_kib": 10.0}, "Mémoire": {"bytes": 100.0}, "Supprimé": {"us": 1.0}})
+
+    assert compare(results_with({"Partie": {"us": 120.0, "peak_kib": 10.5}, "Mémoire": {"bytes": 60.0}}), baseline) == []
+    regressions = compare(results_with({"Partie": {"us": 130.0, "peak_kib": 12.0}, "Mémoire": {"bytes": 111.0}, "Nouveau": {"us": 5.0}}), baseline)
+    assert regressions == [Regression("Partie", "us", 100.0, 130.0), Regression("Partie", "peak_kib", 10.0, 12.0),
+                           Regression("Mémoire", "bytes", 100.0, 111.0)]
+    assert "x1.30" in str(regressions[0])
+
+    #Tiny figures: a relative difference below the absolute noise is not a regression
+    assert compare(results_with({"Supprimé": {"us": 1.05}}), baseline) == []
+    assert compare(results_with({"Partie": {"us": 130.0}}), baseline, {"us": 0.5}) == []
+
+
+def test_time_case_and_peak_memory():
+    prepared = []
+    def prepare(number):
+        prepared.append(number)
+        return []
+    case = BenchmarkCase("Liste", prepare, lambda state: state.append(bytearray(10_000)), 10)
+
+    assert time_case(case, repeat=3) > 0
+    assert prepared == [10, 10, 10]     #A new state by repeat
+    assert 9 < peak_memory(case) < 20
+
+
+def test_quick_run(tmp_path, monkeypatch):
+    #The quick suite, reduced to one operation by case: every case runs and the results can be compared with themselves
+    cases = benchmark.cases
+    monkeypatch.setattr(benchmark, "cases", lambda quick: [BenchmarkCase(case.name, case.prepare, case.operation, 1) for case in cases(quick)])
+    monkeypatch.setattr(benchmark, "QUICK_REPEAT", 1)
+    monkeypatch.setattr("src.setup_game.load_catalog", lambda: load_catalog(cache_dir=None))  #Nothing written in the home directory
+    output = tmp_path / "results.json"
+
+    assert benchmark.main(["--quick", "--output", str(output)]) == 0
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["quick"] and len(results["cases"]) == len(cases(True))
+    assert compare(results, results) == []
+
+    #A baseline faster than the results: regression
+    baseline = results_with({name: {"us": figures["us"] / 10} for name, figures in results["cases"].items()})
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline), encoding="utf-8")
+    monkeypatch.setattr(benchmark, "run", lambda quick, progress: results)
+    assert benchmark.main(["--output", str(output), "--baseline", str(tmp_path / "baseline.json")]) == 1
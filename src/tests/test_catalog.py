@@ -0,0 +1,130 @@
+import json
+import os
+
+import pytest
+
+import src.catalog
+from src.catalog import load_catalog
+from src.character import Character
+from src.exceptions import InvalidCatalogError
+from src.game import RoleplayGame
+from src.setup_game import SetupGame
+from src.setup_game_manually import SetupGameManually
+from src.utils import ScriptedInputProvider, use_input_provider
+
+
+GOBELIN = {"key": "gobelin", "label": "Créer un gobelin", "name": "Gobelin", "max_life": 35, "attack_min": 2, "attack_max": 10,
+           "can_drink_potion": True, "potions": [{"count": 2, "min_recup": 10, "max_recup": 35}]}
+TROLL = {"key": "troll", "label": "Créer un troll", "name": "Troll", "max_life": 90, "attack_min": 5, "attack_max": 12,
+         "can_drink_potion": False}
+PLAYER = {"name": "Héros", "max_life": 80, "attack_min": 4, "attack_max": 9, "can_drink_potion": True,
+          "potions": [{"count": 1, "min_recup": 5, "max_recup": 10}]}
+
+
+def write_catalog(path, setups=None, archetypes=None):
+    data = {"version": 1, "archetypes": archetypes if archetypes is not None else [GOBELIN, TROLL],
+            "setups": setups if setups is not None else
+                      [{"key": "trolls", "label": "Deux trolls", "player": PLAYER,
+                        "ennemies": [{"archetype": "troll"}, {"archetype": "troll", "name": "Troll 2"}]}]}
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+def test_default_catalog():
+    catalog = load_catalog(cache_dir=None)
+
+    assert catalog.setup("default").create_game().to_dict() == RoleplayGame.default_settings().to_dict()
+    assert catalog.setup("two_weak_ennemies").create_game().to_dict() == RoleplayGame.settings_with_two_weak_ennemies().to_dict()
+    for key, character in (("standard", Character.default_ennemy()), ("gobelin", Character.gobelin()),
+                           ("thief", Character.thief()), ("dragon", Character.dragon())):
+        assert catalog.archetype(key).create().to_dict() == character.to_dict()
+    #The menus keep the choices of the constants
+    assert catalog.setups[SetupGame.SETTINGS_TWO_WEAKS_ENNEMIES - 1].key == "two_weak_ennemies"
+    assert catalog.archetypes[SetupGameManually.ENNEMY_DRAGON - 1].key == "dragon"
+    with pytest.raises(KeyError):
+        catalog.archetype("licorne")
+
+
+def test_load_catalog_caches(tmp_path):
+    path = write_catalog(tmp_path / "catalog.json")
+    cache_dir = tmp_path / "cache"
+
+    catalog = load_catalog(path, cache_dir)
+    assert load_catalog(path, cache_dir) is catalog     #Memory cache
+    assert len(os.listdir(cache_dir)) == 1
+    troll = catalog.setups[0].ennemies
+    assert troll[0].stats is troll[1].stats and troll[1].name == "Troll 2"
+
+    #Modified file: parsed again
+    write_catalog(path, archetypes=[TROLL, GOBELIN])
+    modified = load_catalog(path, cache_dir)
+    assert modified is not catalog and modified.archetypes[0].key == "troll"
+
+    #New process (empty memory cache): the compiled cache is read, not the source file
+    src.catalog._catalogs.clear()
+    stat = path.stat()
+    path.write_text(path.read_text(encoding="utf-8").replace("Troll", "Trool"), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_catalog(path, cache_dir).archetypes[0].name == "Troll"
+
+    #A cache that cannot be written is ignored
+    (tmp_path / "file").write_text("")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_catalog(path, tmp_path / "file" / "cache").archetypes[0].name == "Trool"
+
+
+def test_load_catalog_toml(tmp_path):
+    path = tmp_path / "catalog.toml"
+    path.write_text('version = 1\n\n'
+                    '[[archetypes]]\nkey = "troll"\nlabel = "Créer un troll"\nname = "Troll"\n'
+                    'max_life = 90\nattack_min = 5\nattack_max = 12\ncan_drink_potion = false\n\n'
+                    '[[setups]]\nkey = "troll"\nlabel = "Un troll"\n'
+                    'player = {name = "Héros", max_life = 80, attack_min = 4, attack_max = 9, can_drink_potion = true}\n'
+                    'ennemies = [{archetype = "troll"}]\n', encoding="utf-8")
+
+    game = load_catalog(path, cache_dir=None).setup("troll").create_game()
+    assert game.player._name == "Héros" and game.ennemies[0].stats.max_life == 90
+
+
+@pytest.mark.parametrize("setups, archetypes, message", [
+    ([{"key": "a", "player": PLAYER, "ennemies": [{"archetype": "licorne"}]}], None, "unknown archetype"),
+    ([{"key": "a", "player": PLAYER, "ennemies": []}], None, "at least one ennemy"),
+    ([{"key": "a", "player": {**PLAYER, "attack_min": 20}, "ennemies": [{"archetype": "troll"}]}], None, "Setup 'a', player"),
+    ([{"key": "a", "player": {**PLAYER, "max_life": "80"}, "ennemies": [{"archetype": "troll"}]}], None, "integers"),
+    ([{"key": "a", "player": {**PLAYER, "max_life": True}, "ennemies": [{"archetype": "troll"}]}], None, "integers"),
+    ([{"key": "a", "player": PLAYER, "ennemies": [{"archetype": "troll", "name": ""}]}], None, "Setup 'a', ennemy 1: the name"),
+    ([{"key": "a", "player": PLAYER, "ennemies": [{"archetype": "troll", "name": 3}]}], None, "non-empty string"),
+    (None, [TROLL, {**GOBELIN, "potions": [{"count": 1, "min_recup": -5, "max_recup": 10}]}], "'gobelin'"),
+    (None, [TROLL, TROLL], "duplicate key"),
+    (None, [], "At least one archetype"),
+])
+def test_invalid_catalogs(tmp_path, setups, archetypes, message):
+    path = write_catalog(tmp_path / "catalog.json", setups, archetypes)
+    with pytest.raises(InvalidCatalogError, match=message):
+        load_catalog(path, cache_dir=None)
+
+    path.write_text('{"version": 2}', encoding="utf-8")
+    with pytest.raises(InvalidCatalogError, match="version"):
+        load_catalog(path, cache_dir=None)
+    path.write_text('{"version": 1,', encoding="utf-8")
+    with pytest.raises(InvalidCatalogError):
+        load_catalog(path, cache_dir=None)
+
+
+def test_menus_of_a_catalog(tmp_path, capsys):
+    catalog = load_catalog(write_catalog(tmp_path / "catalog.json"), cache_dir=None)
+
+    #Setup of the catalog
+    setup = SetupGame(catalog)
+    with use_input_provider(ScriptedInputProvider(["1"], write_questions=False)):
+        setup.create()
+    assert [ennemy._name for ennemy in setup.get_game().ennemies] == ["Troll", "Troll 2"]
+    assert "1. Deux trolls\n  2. Configuration manuelle" in capsys.readouterr().out
+
+    #Manual setup with a predefined ennemy of the catalog: player, troll, end
+    answers = ["1", "Héros", "100", "5 10", "0", "2", "2", "7", "n"]
+    setup = SetupGame(catalog)
+    with use_input_provider(ScriptedInputProvider(["2"] + answers, write_questions=False)):
+        setup.create()
+    assert setup.get_game().ennemies[0].to_dict() == catalog.archetype("troll").create().to_dict()
+    assert "1. Créer un gobelin\n2. Créer un troll\n" in capsys.readouterr().out
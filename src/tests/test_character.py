@@ -1,3 +1,6 @@
+import dataclasses
+import logging
+
 import pytest
 
 from src.character import Character, CharacterStats
@@ -86,7 +89,7 @@ def test_Character_drink_a_potion():
         character.drink_a_potion()
 
     character.current_life = 10
-    character.stats.can_drink_potion = False
+    character.stats = dataclasses.replace(character.stats, can_drink_potion=False)
     with pytest.raises(UnabledToDrinkPotionError):
         character.drink_a_potion()
 
@@ -124,4 +127,53 @@ def test_Character_factory():
     assert isinstance(gobelin, Character)
 
     thief = Character.thief()
-    assert isinstance(thief, Character)
\ No newline at end of file
+    assert isinstance(thief, Character)
+
+def test_Character_compact_representation():
+    stats = CharacterStats(max_life=50, attack_min=0, attack_max=30, can_drink_potion=True)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        stats.max_life = 10
+
+    character = Character('My name', stats)
+    assert not hasattr(character, '__dict__')
+    assert not hasattr(stats, '__dict__')
+    assert not hasattr(Potion(1, 2), '__dict__')
+
+    #Predefined characters share their stats
+    assert Character.gobelin().stats is Character.gobelin("Other name").stats
+    assert Character.dragon().stats is Character.dragon().stats
+    assert Character.thief().stats is Character.thief().stats
+    assert Character.default_ennemy().stats is Character.default_ennemy().stats
+
+
+def test_Character_clone():
+    character = Character.default_player()
+    character.current_life = 12
+    character.drink_a_potion()
+
+    copy = character.clone()
+    assert copy.name == character.name
+    assert copy.stats is character.stats
+    assert copy.current_life == character.current_life
+    assert copy.took_a_potion == True
+    assert copy.rng is character.rng
+    assert copy.inventory is not character.inventory
+    assert len(copy.inventory) == len(character.inventory)
+
+    copy.current_life = 0
+    copy.inventory.get_a_potion()
+    assert character.current_life > 0
+    assert len(copy.inventory) == len(character.inventory) - 1
+
+
+def test_Character_attacks_log(caplog):
+    player = Character('Player', CharacterStats(max_life=50, attack_min=5, attack_max=5, can_drink_potion=True))
+    ennemy = Character('Ennemy', CharacterStats(max_life=50, attack_min=1, attack_max=1, can_drink_potion=True))
+    with caplog.at_level(logging.INFO, logger="src.character"):
+        player.attacks(ennemy)
+    assert caplog.messages == [f"{player.name} attacks {ennemy.name} and makes 5 points of damage."]
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="src.character"):
+        player.attacks(ennemy)
+    assert caplog.messages == []
@@ -0,0 +1,93 @@
+import pytest
+
+from src.battle_engine import BattleEngine, AttackController, PotionThresholdController
+from src.character import Character, CharacterStats
+from src.combat_events import CombatEvent, EventCollector, JsonlEventWriter, BinaryEventWriter, read_events, replay, aggregate
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+from src.simulation_summary import SimulationSummary
+
+
+def test_BattleEngine_events():
+    player = Character("Player", CharacterStats(50, 30, 30, True), Inventory.with_potions(1, 5, 5))
+    ennemy = Character("Ennemy", CharacterStats(40, 1, 1, False), Inventory())
+    player.current_life = 10
+    collector = EventCollector()
+    engine = BattleEngine(player, [ennemy], PotionThresholdController(), collector)
+
+    assert engine.run() == True
+    kinds = [event.kind for event in collector.events]
+    assert kinds == [CombatEvent.BATTLE_START, CombatEvent.CHARACTER, CombatEvent.CHARACTER,
+                     CombatEvent.TURN_START, CombatEvent.POTION, CombatEvent.ATTACK,
+                     CombatEvent.TURN_START, CombatEvent.SKIP_TURN, CombatEvent.ATTACK,
+                     CombatEvent.TURN_START, CombatEvent.ATTACK, CombatEvent.ATTACK,
+                     CombatEvent.TURN_START, CombatEvent.ATTACK, CombatEvent.DEATH, CombatEvent.GAMEOVER]
+    assert collector.events[1] == CombatEvent(CombatEvent.CHARACTER, 0, 0, 0, value=50, life=10)
+    assert collector.events[4] == CombatEvent(CombatEvent.POTION, 0, 1, 0, value=5, life=15)
+    assert collector.events[5] == CombatEvent(CombatEvent.ATTACK, 0, 1, 1, 0, 1, 14)
+    assert collector.events[-1] == CombatEvent(CombatEvent.GAMEOVER, 0, 4, value=CombatEvent.WON)
+    assert all(str(event) for event in collector.events)
+
+
+def test_BattleEngine_one_death_by_character():
+    #The first dragon kills the player, the next ones still attack him in the same turn
+    player = Character("Joueur", CharacterStats(10, 5, 10, True), Inventory())
+    dragons = [Character(f"Dragon {i}", CharacterStats(350, 10, 10, False), Inventory()) for i in range(3)]
+    collector = EventCollector()
+    engine = BattleEngine(player, dragons, AttackController(), collector)
+
+    assert engine.run() == False
+    deaths = [event.actor for event in collector.events if event.kind == CombatEvent.DEATH]
+    assert deaths == [0]
+    assert sum(event.kind == CombatEvent.ATTACK and event.target == 0 for event in collector.events) > 1
+
+
+def test_BattleEngine_events_unfinished():
+    player = Character("Player", CharacterStats(50, 0, 0, False), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(50, 0, 0, True), Inventory())
+    collector = EventCollector()
+    BattleEngine(player, [ennemy], AttackController(), collector).run(max_turns=3)
+
+    assert collector.events[-1] == CombatEvent(CombatEvent.GAMEOVER, 0, 3, value=CombatEvent.UNFINISHED)
+    assert aggregate(collector.events).nb_unfinished == 1
+
+
+@pytest.mark.parametrize("writer_class", [JsonlEventWriter, BinaryEventWriter])
+def test_event_writers(tmp_path, writer_class):
+    path = tmp_path / "events.log"
+    game = RoleplayGame.settings_with_two_weak_ennemies()
+    collector = EventCollector()
+    expected = SimulationSummary()
+
+    with writer_class.open(path, buffer_size=10) as writer:
+        for seed in range(20):
+            battle = game.clone(RandomSource(seed))
+            player_won = battle.simulate(PotionThresholdController(), listener=writer)
+            expected.add_battle(player_won, battle._tour_nb)
+
+            battle = game.clone(RandomSource(seed))
+            battle.simulate(PotionThresholdController(), listener=collector)
+
+    events = list(read_events(path))
+    assert events == collector.events
+    assert events[-1].battle == 19
+    assert aggregate(read_events(path)) == expected
+
+
+def test_replay():
+    game = RoleplayGame.default_settings(rng=RandomSource(1))
+    collector = EventCollector()
+    game.simulate(AttackController(), listener=collector)
+
+    lives = None
+    for event, lives in replay(collector.events):
+        assert all(life >= 0 for life in lives)
+    assert lives == [game.player.current_life] + [ennemy.current_life for ennemy in game.ennemies]
+
+
+def test_read_events_invalid(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"event": "unknown"}\n')
+    with pytest.raises(ValueError):
+        list(read_events(path))
@@ -1,8 +1,11 @@
+import dataclasses
+
 import pytest
 
 from src.ennemy_ai import EnnemyAI
 from src.character import Character
 from src.exceptions import DeadCharacterError
+from src.random_source import RandomSource
 
 def test_EnnemiAI_decide_action():
     ennemy = Character.thief()  #can drink potion and have 1 potion
@@ -10,7 +13,7 @@ def test_EnnemiAI_decide_action():
     assert ennemy.inventory.has_potion()
     
     #Simulate battles damage
-    ennemy.stats.max_life = 100
+    ennemy.stats = dataclasses.replace(ennemy.stats, max_life=100)
     ennemy.current_life = 0
     ennemy_ai = EnnemyAI(ennemy)
 
@@ -32,4 +35,21 @@ def test_EnnemiAI_decide_action():
 
 
 
-    
\ No newline at end of file
+    
+
+def test_EnnemiAI_decide_actions():
+    ennemies = [Character.gobelin(f"Gobelin {i}", ) for i in range(300)]
+    for i, ennemy in enumerate(ennemies):
+        ennemy.current_life = 1 + i % ennemy.stats.max_life     #<5%, <25% and more
+        ennemy.rng = RandomSource(i)
+    ennemies.append(Character.default_ennemy())   #Cannot drink a potion
+
+    expected = [EnnemyAI(ennemy).decide_action() for ennemy in ennemies]
+    for i, ennemy in enumerate(ennemies[:-1]):
+        ennemy.rng = RandomSource(i)
+    assert EnnemyAI.decide_actions([EnnemyAI(ennemy) for ennemy in ennemies]) == expected
+    assert Character.ACTION_ATTACK in expected and Character.ACTION_DRINKPOTION in expected
+
+    ennemies[0].current_life = 0
+    with pytest.raises(DeadCharacterError):
+        EnnemyAI.decide_actions([EnnemyAI(ennemy) for ennemy in ennemies])
@@ -0,0 +1,73 @@
+import functools
+import math
+import time
+
+import pytest
+
+from src.battle_engine import BattleEngine, PotionThresholdController
+from src.character import Character, CharacterStats
+from src.ennemy_ai import EnnemyAI
+from src.exceptions import DeadCharacterError
+from src.expectimax_ai import ExpectimaxAI
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+
+
+def duel(ennemy_life: int, player_life: int, player_attack: int = 10, ennemy_attack: int = 5, nb_potions: int = 1):
+    player = Character("Player", CharacterStats(100, player_attack, player_attack, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(100, ennemy_attack, ennemy_attack, True), Inventory.with_potions(nb_potions, 90, 100))
+    player.current_life = player_life
+    ennemy.current_life = ennemy_life
+    return player, ennemy
+
+
+def test_ExpectimaxAI_decisions():
+    #Next player attack kills the ennemy: drink a potion
+    player, ennemy = duel(ennemy_life=8, player_life=100)
+    ai = ExpectimaxAI(ennemy, player, time_budget=math.inf, max_depth=3)
+    assert ai.decide_action() == Character.ACTION_DRINKPOTION
+    assert ai.last_depth == 3
+
+    #The ennemy can kill the player now: attack, even with a low life (the rule-based AI drinks under 5%)
+    player, ennemy = duel(ennemy_life=4, player_life=5)
+    assert ExpectimaxAI(ennemy, player, time_budget=math.inf, max_depth=3).decide_action() == Character.ACTION_ATTACK
+    assert EnnemyAI(ennemy).decide_action() == Character.ACTION_DRINKPOTION
+
+    #No potion left: searching the bag only loses the turn
+    player, ennemy = duel(ennemy_life=8, player_life=100, nb_potions=0)
+    assert ExpectimaxAI(ennemy, player, time_budget=math.inf, max_depth=3).decide_action() == Character.ACTION_ATTACK
+
+    ennemy.current_life = 0
+    with pytest.raises(DeadCharacterError):
+        ExpectimaxAI(ennemy, player).decide_action()
+
+
+def test_ExpectimaxAI_time_budget():
+    player = Character.default_player()
+    ennemy = Character.thief()
+    ennemy.current_life = 10
+    ai = ExpectimaxAI(ennemy, player, time_budget=0.005, max_depth=50)
+
+    start = time.perf_counter()
+    action = ai.decide_action()
+    assert time.perf_counter() - start < 0.1
+    assert action in (Character.ACTION_ATTACK, Character.ACTION_DRINKPOTION)
+    assert 1 <= ai.last_depth < 50
+
+    #The transposition table is kept: the next decision starts from the evaluated states
+    assert ai._table
+    depth = ai.last_depth
+    ai.decide_action()
+    assert ai.last_depth >= depth
+
+
+def test_BattleEngine_ennemy_ai_factory():
+    game = RoleplayGame.settings_with_two_weak_ennemies(rng=RandomSource(1))
+    game.ennemy_ai_factory = functools.partial(ExpectimaxAI, time_budget=0.001)
+    game.simulate(PotionThresholdController())
+    assert game.gameover
+    assert all(isinstance(ai, ExpectimaxAI) for ai in game._engine._ennemy_ais if ai is not None)
+
+    engine = BattleEngine(game.player, game.ennemies)
+    assert all(type(ai) is EnnemyAI for ai in engine._ennemy_ais if ai is not None)
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import time
+
+from src.catalog import load_catalog
+from src.game_server import DEMO_ANSWERS, MAX_LINE_LENGTH, GameServer, play_scripted_session, run_load
+from src.utils import read_input
+
+
+async def wait_until(condition, timeout: float = 10.0):
+    """Wait for a state of the server (its sessions run in threads), without a fixed delay"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timeout"
+        await asyncio.sleep(0.005)
+
+
+def test_GameServer_command_line_sessions(capsys, monkeypatch):
+    stdout = sys.stdout
+    #The menus read the default catalog without its compiled cache: the tests write nothing in the home directory
+    monkeypatch.setattr("src.setup_game.load_catalog", lambda: load_catalog(cache_dir=None))
+
+    async def scenario():
+        async with GameServer(colors=False) as server:
+            outputs = await run_load(server.host, server.port, 50, DEMO_ANSWERS, think_time=0.001)
+            print("Hors session")     #Not in a session thread: the usual stdout
+        return server, outputs
+
+    server, outputs = asyncio.run(scenario())
+    assert all(output.count("Vous avez GAGNÉ") == 2 and output.endswith("Aurevoir!\r\n") for output in outputs)
+    assert "Choix (1-7)" in outputs[0] and "\033[" not in outputs[0]
+    assert (server.nb_sessions, server.nb_finished_sessions, server.nb_refused_sessions) == (0, 50, 0)
+    assert sys.stdout is stdout and capsys.readouterr().out == "Hors session\n"
+
+
+def echo_session():
+    while (answer := read_input("? ")) != "fin":
+        print(f"Écho: {answer}")
+    print("Au revoir")
+
+
+def test_GameServer_limits():
+    async def idle_client(port: int) -> str:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        output = await reader.read()
+        writer.close()
+        return output.decode()
+
+    async def scenario():
+        async with GameServer(echo_session, max_sessions=2) as server:
+            #Each session answers its own client, with its own output
+            outputs = await asyncio.gather(play_scripted_session(server.host, server.port, ["a", "b", "fin"], think_time=0.01),
+                                           play_scripted_session(server.host, server.port, ["c", "fin"], think_time=0.01))
+            assert outputs == ["? Écho: a\r\n? Écho: b\r\n? Au revoir\r\n", "? Écho: c\r\n? Au revoir\r\n"]
+
+            #Answer too long
+            too_long = await play_scripted_session(server.host, server.port, ["x" * (2 * MAX_LINE_LENGTH), "fin"])
+            assert too_long.endswith("Réponse trop longue.\r\n")
+
+            #Two sessions running: the third client is refused
+            await wait_until(lambda: server.nb_sessions == 0)
+            waiting = [asyncio.create_task(idle_client(server.port)) for _ in range(2)]
+            await wait_until(lambda: server.nb_sessions == 2)
+            refused = await play_scripted_session(server.host, server.port, ["fin"])
+            assert refused.startswith("Serveur complet") and server.nb_refused_sessions == 1
+
+        #Sessions still running when the server is closed
+        assert await asyncio.gather(*waiting) == ["? ", "? "]
+        assert server.nb_sessions == 0 and server.nb_finished_sessions == 5
+
+        #Idle session closed after the timeout
+        async with GameServer(echo_session, idle_timeout=0.05) as server:
+            assert (await idle_client(server.port)).endswith("Session expirée.\r\n")
+
+    asyncio.run(scenario())
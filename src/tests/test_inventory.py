@@ -1,5 +1,7 @@
+import logging
+
 from src.inventory import Inventory
-from src.potion import Potion
+from src.potion import Potion, PotionStack
 from src.utils import is_iterable
 
 
@@ -93,4 +95,128 @@ def test_Inventory_with_potions_classmethod():
 
     potion = inventory.get_a_potion()
     assert isinstance(potion, Potion)
-    assert potion.min_recup == 10
\ No newline at end of file
+    assert potion.min_recup == 10
+
+def test_Inventory_get_first_equal_object():
+    inventory = Inventory()
+    inventory.add([1, "a", [1, 2], 1, True, [1, 2]])
+
+    assert [1, 2] in inventory
+    assert inventory.get([1, 2]) == [1, 2]     #Unhashable objects are found too
+    assert inventory.get(1) == 1
+    assert list(inventory) == ["a", 1, True, [1, 2]]
+
+    assert inventory.get(1) == 1
+    assert inventory.get(1) == 1               #True == 1, as in a list
+    assert inventory.get(1) == None
+    assert list(inventory) == ["a", [1, 2]]
+
+
+def test_Inventory_potion_index_keeps_order():
+    class BigPotion(Potion):
+        pass
+
+    inventory = Inventory()
+    potions = [Potion(i, 100) for i in range(5)]
+    inventory.add(["something", potions[0], BigPotion(10, 20)] + potions[1:])
+
+    assert inventory.get(potions[0]) is potions[0]
+    assert inventory.get(potions[2]) is potions[2]
+
+    potion = inventory.get_a_potion()
+    assert isinstance(potion, BigPotion)
+    assert [inventory.get_a_potion() for _ in range(3)] == [potions[1], potions[3], potions[4]]
+    assert inventory.has_potion() == False
+    assert list(inventory) == ["something"]
+
+
+def test_Inventory_many_potions():
+    inventory = Inventory.with_potions(10_000, 1, 2)
+    inventory.add("something")
+    for _ in range(10_000):
+        assert isinstance(inventory.get_a_potion(), Potion)
+    assert inventory.has_potion() == False
+    assert len(inventory) == 1
+
+    inventory.clear()
+    assert len(inventory) == 0
+
+
+def test_Inventory_index_does_not_grow():
+    inventory = Inventory()
+    first_potion = Potion(1, 2)
+    inventory.add(["a", first_potion])
+    for i in range(1000):
+        inventory.add([f"x{i}", Potion(3, 4)])
+        assert inventory.get(f"x{i}") == f"x{i}"
+        inventory.get(inventory._items[max(inventory._items)])     #The last potion
+    assert list(inventory) == ["a", first_potion]
+    assert {object_type: len(slots) for object_type, slots in inventory._slots_by_type.items()} == {str: 1, Potion: 1}
+
+
+def test_Inventory_potion_stack():
+    inventory = Inventory.with_potions(1000, 15, 50)
+    assert len(inventory._items) == 1      #One entry for all the bottles
+    assert len(inventory) == 1000
+    assert len(list(inventory)) == 1000
+    assert all(isinstance(obj, Potion) for obj in inventory)
+
+    inventory.add(["something", PotionStack(0, 1, 1), PotionStack(2, 1, 1)])
+    assert len(inventory) == 1003
+
+    for _ in range(1000):
+        assert inventory.get_a_potion().min_recup == 15
+    assert inventory.has_potion() == True
+    assert len(inventory) == 3
+
+    assert inventory.get_a_potion().min_recup == 1
+    assert inventory.get_a_potion().min_recup == 1
+    assert inventory.has_potion() == False
+    assert list(inventory) == ["something"]
+
+    assert len(Inventory.with_potions(0, 1, 1)) == 0
+    assert Inventory.with_potions(0, 1, 1).has_potion() == False
+
+
+def test_Inventory_clone():
+    potion = Potion(5, 10)
+    inventory = Inventory()
+    inventory.add(["something", potion, PotionStack(3, 1, 2)])
+
+    copy = inventory.clone()
+    assert len(copy) == len(inventory) == 5
+    assert [repr(obj) for obj in copy] == [repr(obj) for obj in inventory]
+
+    #Drinking in the copy do not change the original potions
+    for _ in range(4):
+        copy.get_a_potion().drink()
+    assert copy.has_potion() == False
+    assert len(inventory) == 5
+    assert potion.is_empty == False
+    assert inventory.get_a_potion() is potion
+
+
+class _CountStr:
+    """An object that counts how many times it is formatted"""
+    nb_str = 0
+
+    def __str__(self):
+        _CountStr.nb_str += 1
+        return "counted object"
+
+
+def test_Inventory_lazy_logging(caplog):
+    obj = _CountStr()
+    inventory = Inventory()
+
+    with caplog.at_level(logging.INFO, logger="src.inventory"):
+        inventory.add([obj])
+        inventory.add(obj)
+        inventory.get(obj)
+    assert _CountStr.nb_str == 0    #Nothing formatted when DEBUG is filtered
+
+    with caplog.at_level(logging.DEBUG, logger="src.inventory"):
+        inventory.add(obj)
+        inventory.get(obj)
+    assert "Add item counted object in Inventory" in caplog.messages
+    assert "Inventory.getcounted object." in caplog.messages
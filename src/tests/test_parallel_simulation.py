@@ -0,0 +1,43 @@
+from src.battle_engine import AttackController, PotionThresholdController
+from src.ennemy_ai import EnnemyAI
+from src.game import RoleplayGame
+from src.parallel_simulation import chunk_seed, simulate_chunk, run_parallel_simulation
+
+
+def test_chunk_seed():
+    assert chunk_seed(1, 0) == chunk_seed(1, 0)
+    assert chunk_seed(1, 0) != chunk_seed(1, 1)
+    assert chunk_seed(1, 0) != chunk_seed(2, 0)
+
+
+def test_simulate_chunk():
+    game = RoleplayGame.default_settings()
+    summary = simulate_chunk(game, AttackController(), seed=5, nb_battles=50)
+
+    assert summary.nb_battles == 50
+    assert summary == simulate_chunk(game, AttackController(), seed=5, nb_battles=50)
+    assert game.player.current_life == game.player.stats.max_life   #The game setup is not modified
+
+
+def test_simulate_chunk_ennemy_ai_factory():
+    created = []
+
+    def factory(ennemy, player):
+        created.append(ennemy)
+        return EnnemyAI(ennemy)
+
+    game = RoleplayGame.settings_with_two_weak_ennemies()
+    game.ennemy_ai_factory = factory
+    simulate_chunk(game, AttackController(), seed=5, nb_battles=10)
+    assert len(created) == 20
+
+
+def test_run_parallel_simulation_same_results_for_any_number_of_workers():
+    game = RoleplayGame.settings_with_two_weak_ennemies()
+    controller = PotionThresholdController()
+
+    summary_1_worker = run_parallel_simulation(game, controller, 1050, seed=7, nb_workers=1, chunk_size=100)
+    summary_3_workers = run_parallel_simulation(game, controller, 1050, seed=7, nb_workers=3, chunk_size=100)
+
+    assert summary_1_worker.nb_battles == 1050
+    assert summary_1_worker == summary_3_workers
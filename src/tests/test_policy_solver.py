@@ -0,0 +1,168 @@
+import io
+import json
+
+import pytest
+
+from src.battle_engine import AttackController, PotionThresholdController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+from src.renderer import PlainRenderer
+import src.policy_solver as policy_solver
+from src.policy_solver import OptimalPolicySolver, PolicyController, PolicyTable, PolicyTooLargeError, grid_life, life_grid, policy_table_for
+from src.win_solver import WinSolver
+
+
+def small_game(rng: RandomSource | None = None) -> RoleplayGame:
+    player = Character("Player", CharacterStats(14, 3, 6, True), Inventory.with_potions(2, 4, 8))
+    ennemies = [Character("Ennemy 1", CharacterStats(9, 1, 4, True), Inventory.with_potions(1, 3, 6)),
+                Character("Ennemy 2", CharacterStats(6, 2, 3, False), Inventory())]
+    return RoleplayGame(player, ennemies, rng)
+
+
+def test_OptimalPolicySolver_beats_the_threshold_policies():
+    game = small_game()
+    best = OptimalPolicySolver(game).solve().win_probability
+    for controller in (AttackController(), PotionThresholdController(), PotionThresholdController(50)):
+        assert best >= WinSolver(game, controller).solve().win_probability - 1e-12
+
+
+def drink_game(renderer=None) -> RoleplayGame:
+    #The player needs 3 attacks and dies at the next attack of the ennemy: drink (+20) first
+    player = Character("Player", CharacterStats(30, 5, 5, True), Inventory.with_potions(1, 20, 20))
+    player.current_life = 5
+    return RoleplayGame(player, [Character("Ennemy", CharacterStats(15, 5, 5, False), Inventory())], renderer=renderer)
+
+
+def test_OptimalPolicySolver_drinks():
+    game = drink_game()
+    player, ennemy = game.player, game.ennemies[0]
+
+    table = OptimalPolicySolver(game).policy_table()
+    assert table.win_probability == pytest.approx(1.0)
+    assert table.best_action(player, [ennemy]) == (Character.ACTION_DRINKPOTION, 0)
+
+
+def test_OptimalPolicySolver_chooses_the_ennemy():
+    #The second ennemy dies in one attack and kills the player at his first attack: attack him first
+    player = Character("Player", CharacterStats(30, 10, 10, True), Inventory())
+    tank = Character("Tank", CharacterStats(30, 1, 1, False), Inventory())
+    killer = Character("Killer", CharacterStats(10, 30, 30, False), Inventory())
+    table = OptimalPolicySolver(RoleplayGame(player, [tank, killer])).policy_table()
+
+    assert table.win_probability == pytest.approx(1.0)
+    assert table.best_action(player, [tank, killer]) == (Character.ACTION_ATTACK, 1)
+
+
+def test_OptimalPolicySolver_interchangeable_ennemies():
+    #The second gobelin is almost dead: the hint must point to him, not to the first one of the canonical state
+    player = Character("Player", CharacterStats(30, 5, 5, True), Inventory())
+    ennemies = [Character(f"Gobelin {i}", CharacterStats(10, 3, 3, False), Inventory()) for i in range(2)]
+    ennemies[1].current_life = 5
+    solver = OptimalPolicySolver(RoleplayGame(player, ennemies))
+    table = solver.policy_table()
+
+    assert table.groups == ((1, 2),)
+    assert table.best_action(player, ennemies) == (Character.ACTION_ATTACK, 1)
+    assert table.win_probability == pytest.approx(WinSolver(RoleplayGame(player, [ennemies[1], ennemies[0]])).solve().win_probability)
+
+
+def test_life_grid():
+    assert life_grid(35, 10) == (1, 10, 20, 30, 35)
+    assert life_grid(5, 1) == (1, 2, 3, 4, 5)
+    grid = life_grid(35, 10)
+    assert [grid_life(grid, life) for life in (-3, 0, 1, 4, 6, 16, 34, 35)] == [0, 0, 1, 1, 10, 20, 35, 35]
+
+
+def test_OptimalPolicySolver_life_grid():
+    game = small_game()
+    exact = OptimalPolicySolver(game).solve()
+    grid = OptimalPolicySolver(game, life_step=3).solve()
+    assert grid.nb_states < exact.nb_states
+    assert grid.win_probability == pytest.approx(exact.win_probability, abs=0.1)
+
+    with pytest.raises(PolicyTooLargeError):
+        OptimalPolicySolver(game, max_states=10).solve()
+
+
+def test_OptimalPolicySolver_life_step_for():
+    game = small_game()
+    assert OptimalPolicySolver.life_step_for(game, max_states=1_000_000) == 1
+    assert OptimalPolicySolver.life_step_for(game, max_states=5000) > 1
+    #Too big for the steps that give right hints: refused instead of a coarser grid
+    big = RoleplayGame(Character.default_player(), [Character.gobelin(), Character.gobelin(), Character.gobelin()])
+    assert OptimalPolicySolver.life_step_for(big, max_states=1_000_000) <= OptimalPolicySolver.LIFE_STEPS[-1] <= 10
+    with pytest.raises(PolicyTooLargeError):
+        OptimalPolicySolver.life_step_for(big)
+    with pytest.raises(PolicyTooLargeError):
+        policy_table_for(big)
+
+
+def test_PolicyController_win_rate():
+    table = OptimalPolicySolver(small_game()).policy_table()
+    rng = RandomSource(7)
+    nb_games = 2000
+    nb_wins = sum(small_game(rng).simulate(PolicyController(table)) for _ in range(nb_games))
+
+    sigma = (table.win_probability * (1 - table.win_probability) / nb_games) ** 0.5
+    assert abs(nb_wins / nb_games - table.win_probability) < 4 * sigma
+
+
+def test_policy_table_for_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(policy_solver, "_tables", {})
+    table = policy_table_for(small_game(), tmp_path)
+    assert policy_table_for(small_game(), tmp_path) is table
+
+    files = list(tmp_path.iterdir())
+    assert [file.name for file in files] == [f"policy-{table.setup_hash}.json"]
+    assert PolicyTable.from_dict(json.loads(json.dumps(table.to_dict()))).exceptions == table.exceptions
+
+    #A new process: the table is read from the directory
+    monkeypatch.setattr(policy_solver, "_tables", {})
+    loaded = policy_table_for(small_game(), tmp_path)
+    assert loaded is not table
+    assert loaded.exceptions == table.exceptions and loaded.win_probability == table.win_probability
+
+    #The names do not change the setup, the stats do
+    renamed = small_game()
+    renamed.player.name = "Other"
+    assert policy_table_for(renamed, tmp_path) is loaded
+    other = RoleplayGame(Character("Player", CharacterStats(15, 3, 6, True), Inventory()), [Character.default_ennemy()])
+    assert OptimalPolicySolver(other).setup_hash != table.setup_hash
+
+
+def test_policy_table_for_invalid_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(policy_solver, "_tables", {})
+    table = policy_table_for(small_game(), tmp_path)
+
+    #A memory cache hit does not build a solver
+    monkeypatch.setattr(OptimalPolicySolver, "life_step_for", None)
+    assert policy_table_for(small_game(), tmp_path) is table
+    monkeypatch.undo()
+
+    #File cut during its write: solved and written again
+    monkeypatch.setattr(policy_solver, "_tables", {})
+    path = tmp_path / f"policy-{table.setup_hash}.json"
+    path.write_text(path.read_text(encoding="utf-8")[:50], encoding="utf-8")
+    assert policy_table_for(small_game(), tmp_path).exceptions == table.exceptions
+    assert PolicyTable.from_dict(json.loads(path.read_text(encoding="utf-8"))).exceptions == table.exceptions
+    assert [file.name for file in tmp_path.iterdir()] == [path.name]
+
+    #A cache that cannot be written is ignored
+    monkeypatch.setattr(policy_solver, "_tables", {})
+    (tmp_path / "file").write_text("")
+    assert policy_table_for(small_game(), tmp_path / "file" / "policies").exceptions == table.exceptions
+
+
+def test_RoleplayGame_hints(monkeypatch):
+    game = drink_game(PlainRenderer(io.StringIO()))
+    game.hints = OptimalPolicySolver(game).policy_table()
+    assert game.clone().hints is game.hints
+
+    monkeypatch.setattr('builtins.input', lambda question: str(game.hints.best_action(game.player, game.ennemies)[0]))
+    game.play(print_settings=False)
+
+    out = game.renderer.stream.getvalue()
+    assert out.index("Conseil: boire une potion.") < out.index("Conseil: attaquer.")
+    assert not game.player.is_dead
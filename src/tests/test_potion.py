@@ -1,6 +1,6 @@
 import pytest
 
-from src.potion import Potion
+from src.potion import Potion, PotionStack
 from src.exceptions import PoisonPotionError, EmptyPotionError
 import src.constants as c
 
@@ -35,4 +35,29 @@ def test_Potion_drink():
     assert potion.is_empty == True
 
     with pytest.raises(EmptyPotionError):
-        potion.drink()  #call another time
\ No newline at end of file
+        potion.drink()  #call another time
+
+def test_PotionStack():
+    with pytest.raises(PoisonPotionError):
+        PotionStack(3, 10, 5)
+
+    stack = PotionStack(3, 5, 10)
+    assert len(stack) == 3
+    assert repr(stack) == '3 × Potion(5, 10)'
+
+    next_potion = Potion(1, 2)
+    bottles = list(stack)
+    assert [bottle.id for bottle in bottles] == [next_potion.id - 3, next_potion.id - 2, next_potion.id - 1]
+    assert f'Potion {bottles[0].id}' in str(bottles[0])
+    assert repr(bottles[0]) == 'Potion(5, 10)'
+
+    potion = stack.take()
+    assert potion.id == bottles[0].id
+    assert 5 <= potion.drink() <= 10
+    assert len(stack) == 2
+    assert [bottle.id for bottle in stack] == [bottles[1].id, bottles[2].id]
+
+    stack.take()
+    stack.take()
+    with pytest.raises(EmptyPotionError):
+        stack.take()
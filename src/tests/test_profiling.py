@@ -0,0 +1,78 @@
+import io
+
+from src.battle_engine import AttackController
+from src.game import RoleplayGame
+from src.profiling import CountingRandomSource, NULL_PROFILER, PHASE_AI_DECISION, PHASE_ENNEMY_TURN, PHASE_GAMEOVER_CHECK, \
+                          PHASE_PLAYER_DECISION, PHASE_PLAYER_TURN, PHASE_RECAP_RENDER, TurnProfiler
+from src.random_source import RandomSource
+from src.renderer import PlainRenderer
+
+
+def test_TurnProfiler_nested_phases():
+    now = [0.0]
+    profiler = TurnProfiler(clock=lambda: now[0])
+
+    with profiler.phase("outer"):
+        now[0] += 1.0
+        profiler.draws += 1
+        with profiler.phase("inner"):
+            now[0] += 2.0
+            profiler.draws += 3
+        now[0] += 0.5
+    with profiler.phase("outer"):
+        now[0] += 4.0
+    profiler.count("turns")
+    profiler.count("turns", 2)
+
+    outer, inner = profiler.stats["outer"], profiler.stats["inner"]
+    assert (outer.calls, outer.seconds, outer.self_seconds, outer.max_seconds) == (2, 7.5, 5.5, 4.0)
+    assert (inner.calls, inner.seconds, inner.self_seconds) == (1, 2.0, 2.0)
+    #The draws of the inner phase are not counted again in the outer phase
+    assert (outer.draws, inner.draws) == (1, 3)
+    assert profiler.counters == {"turns": 3}
+    assert "turns: 3" in profiler.report()
+
+
+def profiled_game(seed: int, profiler=None) -> RoleplayGame:
+    game = RoleplayGame.settings_with_two_weak_ennemies(rng=RandomSource(seed))
+    game.renderer = PlainRenderer(io.StringIO())
+    game.profiler = profiler
+    game.play(print_settings=False, player_controller=AttackController())
+    return game
+
+
+def test_RoleplayGame_profiler():
+    game = profiled_game(5, TurnProfiler())
+    profiler = game.profiler
+    nb_turns = profiler.counters["turns"]
+
+    assert isinstance(game.rng, CountingRandomSource) and game.rng.seed == 5
+    assert profiler.stats[PHASE_PLAYER_TURN].calls == nb_turns
+    assert profiler.stats[PHASE_AI_DECISION].calls == nb_turns
+    assert profiler.stats[PHASE_RECAP_RENDER].calls == nb_turns
+    assert profiler.stats[PHASE_GAMEOVER_CHECK].calls == nb_turns + 1
+    assert profiler.stats[PHASE_ENNEMY_TURN].calls >= nb_turns
+    assert PHASE_PLAYER_DECISION not in profiler.stats     #Only the command line controller asks the user
+    #Every draw is counted in a phase: one damage by attack, one recovery by potion, the coin flips of the AIs
+    assert profiler.draws == sum(stats.draws for stats in profiler.stats.values()) > 0
+
+    #Same game without profiler: same draws, same output
+    unprofiled = profiled_game(5)
+    assert unprofiled.profiler is NULL_PROFILER and type(unprofiled.rng) is RandomSource
+    assert unprofiled.renderer.stream.getvalue() == game.renderer.stream.getvalue()
+
+    game.profiler = None
+    assert game.profiler is NULL_PROFILER and type(game.rng) is RandomSource and game.player.rng is game.rng
+
+
+def test_CliPlayerController_player_decision(monkeypatch):
+    monkeypatch.setattr('builtins.input', lambda question: "1")
+    game = RoleplayGame.default_settings(rng=RandomSource(1))
+    game.renderer = PlainRenderer(io.StringIO())
+    game.profiler = TurnProfiler()
+    game.play(print_settings=False)
+
+    stats = game.profiler.stats
+    assert stats[PHASE_PLAYER_DECISION].calls > 0
+    assert stats[PHASE_PLAYER_TURN].seconds >= stats[PHASE_PLAYER_DECISION].seconds
+    assert stats[PHASE_PLAYER_TURN].self_seconds <= stats[PHASE_PLAYER_TURN].seconds - stats[PHASE_PLAYER_DECISION].seconds + 1e-9
@@ -0,0 +1,65 @@
+import copy
+import pickle
+
+from src.battle_engine import PotionThresholdController
+from src.character import Character
+from src.ennemy_ai import EnnemyAI
+from src.game import RoleplayGame
+from src.potion import Potion
+from src.random_source import RandomSource, BufferedRandomSource, GLOBAL_RANDOM_SOURCE
+
+
+def test_RandomSource_seed():
+    assert RandomSource().seed != RandomSource().seed
+
+    rng1 = RandomSource(12)
+    rng2 = RandomSource(12)
+    assert [rng1.randint(0, 100) for _ in range(50)] == [rng2.randint(0, 100) for _ in range(50)]
+
+
+def test_BufferedRandomSource_randint():
+    rng = BufferedRandomSource(3, buffer_size=10)
+    values = [rng.randint(5, 8) for _ in range(1000)]
+    assert min(values) == 5 and max(values) == 8
+    assert rng.randint(7, 7) == 7
+
+    rng1 = BufferedRandomSource(12)
+    rng2 = BufferedRandomSource(12)
+    assert [rng1.randint(0, 100) for _ in range(500)] == [rng2.randint(0, 100) for _ in range(500)]
+
+
+def test_GLOBAL_RANDOM_SOURCE_is_unique():
+    assert copy.deepcopy(GLOBAL_RANDOM_SOURCE) is GLOBAL_RANDOM_SOURCE
+    assert pickle.loads(pickle.dumps(GLOBAL_RANDOM_SOURCE)) is GLOBAL_RANDOM_SOURCE
+    assert 0 <= GLOBAL_RANDOM_SOURCE.randint(0, 3) <= 3
+
+
+def test_injected_RandomSource():
+    assert Character.default_player().rng is GLOBAL_RANDOM_SOURCE
+
+    rng = RandomSource(1)
+    game = RoleplayGame.settings_with_two_weak_ennemies(rng=rng)
+    assert game.rng is rng
+    assert game.player.rng is rng
+    assert all(ennemy.rng is rng for ennemy in game.ennemies)
+    assert EnnemyAI(game.ennemies[0]).rng is rng
+
+    assert Potion(0, 1000).drink(RandomSource(5)) == Potion(0, 1000).drink(RandomSource(5))
+
+
+def test_same_seed_same_game():
+    results = []
+    for _ in range(2):
+        game = RoleplayGame.settings_with_two_weak_ennemies(rng=RandomSource(2024))
+        player_won = game.simulate(PotionThresholdController())
+        results.append((player_won, game._tour_nb, game.player.current_life))
+    assert results[0] == results[1]
+
+
+def test_coin_flip():
+    for rng in (RandomSource(1), BufferedRandomSource(1), GLOBAL_RANDOM_SOURCE):
+        flips = [rng.coin_flip() for _ in range(1000)]
+        assert set(flips) == {True, False}
+        assert 400 < sum(flips) < 600
+    first, second = RandomSource(5), RandomSource(5)
+    assert [first.coin_flip() for _ in range(20)] == [second.coin_flip() for _ in range(20)]
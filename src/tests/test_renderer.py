@@ -0,0 +1,87 @@
+import io
+
+from pytest import MonkeyPatch
+
+from src.battle_engine import ActionResult
+from src.character import Character
+from src.game_server import ANSI_CODE
+from src.game import RoleplayGame
+from src.random_source import RandomSource
+from src.renderer import ColorRenderer, PlainRenderer, NullRenderer
+import src.constants as c
+
+
+class CountingStream(io.StringIO):
+    """A StringIO that counts the calls to write"""
+
+    def __init__(self):
+        super().__init__()
+        self.nb_writes = 0
+
+    def write(self, text):
+        self.nb_writes += 1
+        return super().write(text)
+
+
+def test_ColorRenderer():
+    stream = CountingStream()
+    renderer = ColorRenderer(stream)
+    renderer.write(f"{c.RED}one{c.RESET}", "two")
+    renderer.write("three")
+    assert stream.getvalue() == ""
+
+    renderer.flush()
+    renderer.flush()
+    assert stream.getvalue() == f"{c.RED}one{c.RESET}\ntwo\nthree\n"
+    assert stream.nb_writes == 1
+
+
+def test_renderers_format_the_events():
+    player = Character.default_player()
+    ennemy = Character.default_ennemy()
+    player.current_life = 7
+    attack = ActionResult(player, Character.ACTION_ATTACK, ennemy, 12)
+
+    plain = PlainRenderer(io.StringIO())
+    plain.player_action(attack)
+    plain.turn_recap(player, [ennemy])
+    plain.flush()
+    assert plain.stream.getvalue() == (f"Vous attaquez {ennemy._name} et lui faites 12 points de dommage. ⚔️\n"
+                                       f"Récapitulatif du tour:\n\t{player._name} a 7/{player.stats.max_life} pts de vie\n"
+                                       f"\t{ennemy._name} a {ennemy.current_life}/{ennemy.stats.max_life} pts de vie\n")
+
+    color = ColorRenderer(io.StringIO())
+    color.player_action(attack)
+    color.turn_recap(player, [ennemy])
+    color.flush()
+    assert f"{c.RED}12{c.RESET}" in color.stream.getvalue()
+    assert f"{c.YELLOW}{player._name}{c.RESET} a {c.GREEN}7{c.RESET}" in color.stream.getvalue()
+    assert ANSI_CODE.sub("", color.stream.getvalue()) == plain.stream.getvalue()
+
+
+def test_NullRenderer(capsys):
+    renderer = NullRenderer()
+    renderer.write("one")
+    #Nothing is formatted: the events are not even read
+    renderer.turn_start(None)
+    renderer.player_action(None)
+    renderer.ennemy_action(None)
+    renderer.turn_recap(None, None)
+    renderer.flush()
+    assert capsys.readouterr().out == ""
+
+
+def test_RoleplayGame_renderer(monkeypatch: MonkeyPatch):
+    stream = CountingStream()
+    game = RoleplayGame(Character.default_player(), [Character.default_ennemy()], RandomSource(2), PlainRenderer(stream))
+    monkeypatch.setattr('builtins.input', lambda _: str(Character.ACTION_ATTACK))
+    game.play()
+
+    out = stream.getvalue()
+    assert "DÉBUT DE LA PARTIE" in out and "Fin de partie" in out
+    assert "\033" not in out
+    assert stream.nb_writes <= 2 * game._tour_nb + 1   #Before the question and at the end of each turn
+
+    quiet_game = RoleplayGame(Character.default_player(), [Character.default_ennemy()], RandomSource(2), NullRenderer())
+    quiet_game.play()
+    assert quiet_game.player.current_life == game.player.current_life
@@ -0,0 +1,101 @@
+import pytest
+from pytest import MonkeyPatch
+
+import main
+
+from src.battle_engine import RandomController, ReplayController
+from src.character import Character
+from src.game import RoleplayGame
+from src.random_source import RandomSource
+from src.replay import GameRecording
+
+
+def lives_of(game: RoleplayGame) -> list[int]:
+    return [game.player.current_life] + [ennemy.current_life for ennemy in game.ennemies]
+
+
+def recorded_game(seed: int) -> tuple[RoleplayGame, GameRecording]:
+    game = RoleplayGame.settings_with_two_weak_ennemies(rng=RandomSource(seed))
+    recording = GameRecording.of(game)
+    game.simulate(recording.recording_controller(RandomController(RandomSource(seed + 1))))
+    return game, recording
+
+
+def test_RoleplayGame_to_dict():
+    game = RoleplayGame.default_settings()
+    game.player.current_life = 20
+    game.player.inventory.add(["a string", 5])
+    game.player.inventory.get_a_potion()
+
+    copy = RoleplayGame.from_dict(game.to_dict())
+    assert copy.to_dict() == game.to_dict()
+    assert copy.player.current_life == 20
+    assert len(copy.player.inventory) == len(game.player.inventory)
+    assert copy.ennemies[0].stats == game.ennemies[0].stats
+
+
+def test_GameRecording_replay(tmp_path):
+    for seed in range(10):
+        game, recording = recorded_game(seed)
+        recording.save(tmp_path / "game.json")
+
+        replayed, nb_replayed = GameRecording.load(tmp_path / "game.json").replay()
+        assert nb_replayed == len(recording.decisions)
+        assert replayed.gameover
+        assert replayed._tour_nb == game._tour_nb
+        assert lives_of(replayed) == lives_of(game)
+
+
+def test_GameRecording_fast_forward():
+    game, recording = recorded_game(4)
+    assert game._tour_nb > 2
+
+    replayed, _ = recording.replay(turn_nb=2)
+    assert replayed._tour_nb == 2
+    assert not replayed.gameover
+
+    #The rest of the game is the same
+    controller = ReplayController(recording.decisions)
+    replayed = recording.create_game()
+    replayed.fast_forward(controller, 2)
+    replayed.simulate(controller)   #simulate starts a new battle engine: the characters keep their state
+    assert lives_of(replayed) == lives_of(game)
+
+
+def test_GameRecording_invalid():
+    with pytest.raises(ValueError):
+        GameRecording.from_dict({"version": 0})
+    with pytest.raises(ValueError):
+        ReplayController([]).choose_action(None)
+
+
+def test_RoleplayGame_play_after_fast_forward(monkeypatch: MonkeyPatch, capsys):
+    game = RoleplayGame(Character.default_player(), [Character.default_ennemy()], RandomSource(7))
+    recording = GameRecording.of(game)
+    recording.decisions.append((Character.ACTION_ATTACK, 0))
+
+    replayed, _ = recording.replay()
+    assert replayed._tour_nb == 1
+
+    monkeypatch.setattr('builtins.input', lambda _: str(Character.ACTION_ATTACK))
+    replayed.play(print_settings=False)
+    out = capsys.readouterr().out
+    assert "REPRISE DE LA PARTIE APRÈS LE TOUR 1" in out
+    assert "Tour 1 " not in out and "Tour 2 " in out
+    assert replayed.gameover
+
+
+def test_hard_games_are_not_recorded(capsys):
+    for args in (["--hard", "--record", "partie.json"], ["--hard", "--replay", "partie.json"]):
+        with pytest.raises(SystemExit):
+            main.parse_args(args)
+    assert "--hard" in capsys.readouterr().err
+    assert main.parse_args(["--hard"]).hard and main.parse_args(["--record", "partie.json"]).record == "partie.json"
+
+
+def test_options_ignored_without_replay_are_refused(capsys):
+    for args in (["--turn", "2"], ["--replay", "partie.json", "--hints"], ["--replay", "partie.json", "--profile", "stats.prof"]):
+        with pytest.raises(SystemExit):
+            main.parse_args(args)
+    assert "--turn" in capsys.readouterr().err
+    assert main.parse_args(["--replay", "partie.json", "--turn", "2"]).turn == 2
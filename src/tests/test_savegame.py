@@ -0,0 +1,116 @@
+import json
+import struct
+
+import pytest
+
+from src.battle_engine import AttackController, PotionThresholdController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.potion import Potion
+from src.random_source import RandomSource
+from src.renderer import NullRenderer
+from src.savegame import GameArchive, dumps, loads
+
+
+def game_in_progress(seed: int = 1) -> RoleplayGame:
+    inventory = Inventory.with_potions(3, 10, 20)
+    inventory.add("Épée rouillée")
+    empty = Potion(1, 2)
+    empty.is_empty = True
+    inventory.add(empty)
+    player = Character("Héros", CharacterStats(300, 4, 9, True), inventory)
+    game = RoleplayGame(player, [Character.gobelin(), Character.thief("Voleur 🗡"), Character.dragon()], RandomSource(seed))
+    game.simulate(PotionThresholdController(50), max_turns=2)
+    return game
+
+
+def test_dumps_loads():
+    game = game_in_progress()
+    data = dumps(game)
+    loaded = loads(data, RandomSource(7))
+
+    assert loaded.to_dict() == game.to_dict()
+    assert loaded._tour_nb == 2 and loaded.rng.seed == 7 and loaded.player.rng is loaded.rng
+    assert len(data) * 3 < len(json.dumps(game.to_dict()))
+    assert loads(dumps(RoleplayGame.default_settings()))._tour_nb == 0
+
+    #The battle continues after the saved turn
+    loaded.renderer = NullRenderer()
+    loaded.play(print_settings=False, player_controller=AttackController())
+    assert loaded._tour_nb > 2 and loaded.gameover
+
+
+def test_loads_invalid_data():
+    data = dumps(game_in_progress())
+    with pytest.raises(ValueError, match="not a saved game"):
+        loads(b"JSON" + data[4:])
+    with pytest.raises(ValueError, match="version"):
+        loads(data[:4] + b"\x09\x00" + data[6:])
+    with pytest.raises(ValueError, match="Truncated"):
+        loads(data[:-3])
+
+    #Values that cannot create a character or a potion
+    stats = struct.pack("<iiiB", 300, 4, 9, 1)
+    with pytest.raises(ValueError, match="corrupted"):
+        loads(data.replace(stats, struct.pack("<iiiB", 0, 4, 9, 1), 1))
+    with pytest.raises(ValueError, match="corrupted"):
+        loads(data.replace(struct.pack("<ii", 10, 20), struct.pack("<ii", -10, 20), 1))
+
+
+def test_GameArchive(tmp_path):
+    path = tmp_path / "games.rpg"
+    games = [game_in_progress(seed) for seed in range(20)]
+    with GameArchive(path) as archive:
+        assert len(archive) == 0
+        assert archive.append(games[0]) == 0
+        assert archive.extend(games[1:]) == range(1, 20)
+        assert archive[3].to_dict() == games[3].to_dict()     #Read after the writes: the maps are recreated
+
+    with GameArchive(path) as archive:
+        assert len(archive) == 20
+        assert archive[-1].to_dict() == games[19].to_dict()
+        assert archive.read_bytes(5) == dumps(games[5])
+        assert [game.to_dict() for game in archive] == [game.to_dict() for game in games]
+        with pytest.raises(IndexError):
+            archive[20]
+
+    #Corrupted entry before the last one (only the last one is checked at opening)
+    index = bytearray((tmp_path / "games.rpg.idx").read_bytes())
+    index[8:16] = struct.pack("<Q", 1 << 40)
+    (tmp_path / "games.rpg.idx").write_bytes(index)
+    with GameArchive(path) as archive:
+        assert len(archive) == 20 and archive[2].to_dict() == games[2].to_dict()
+        with pytest.raises(ValueError, match="Corrupted index"):
+            archive[1]
+
+    (tmp_path / "other.rpg").write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        GameArchive(tmp_path / "other.rpg")
+
+
+def test_GameArchive_rebuilds_the_index(tmp_path):
+    path = tmp_path / "games.rpg"
+    games = [game_in_progress(seed) for seed in range(5)]
+    with GameArchive(path) as archive:
+        archive.extend(games)
+
+    #Missing index
+    (tmp_path / "games.rpg.idx").unlink()
+    with GameArchive(path) as archive:
+        assert len(archive) == 5 and archive[4].to_dict() == games[4].to_dict()
+
+    #Stopped after the write of a record, before the write of its offset
+    index = (tmp_path / "games.rpg.idx").read_bytes()
+    (tmp_path / "games.rpg.idx").write_bytes(index[:-8])
+    with GameArchive(path) as archive:
+        assert len(archive) == 5
+
+    #Stopped during the write of a record: the incomplete record is dropped
+    with open(path, "ab") as file:
+        file.write(dumps(games[0])[:10])
+    with GameArchive(path) as archive:
+        assert len(archive) == 5
+        archive.append(games[1])
+    with GameArchive(path) as archive:
+        assert len(archive) == 6 and archive[5].to_dict() == games[1].to_dict()
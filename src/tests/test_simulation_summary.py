@@ -0,0 +1,34 @@
+from src.simulation_summary import SimulationSummary
+
+
+def test_SimulationSummary_add_battle():
+    summary = SimulationSummary()
+    assert summary.win_rate == 0
+    assert summary.mean_turns == 0
+
+    summary.add_battle(True, 4)
+    summary.add_battle(False, 6, count=3)
+    summary.add_battle(None, 100)
+
+    assert summary.nb_battles == 5
+    assert summary.nb_wins == 1
+    assert summary.nb_losses == 3
+    assert summary.nb_unfinished == 1
+    assert summary.win_rate == 0.2
+    assert summary.mean_turns == 5.5
+    assert summary.min_turns == 4
+    assert summary.max_turns == 6
+
+
+def test_SimulationSummary_merge():
+    summary1 = SimulationSummary()
+    summary1.add_battle(True, 4)
+    summary2 = SimulationSummary()
+    summary2.add_battle(True, 4)
+    summary2.add_battle(False, 8)
+
+    merged = SimulationSummary().merge(summary1).merge(summary2)
+    assert merged.nb_battles == 3
+    assert merged.nb_wins == 2
+    assert merged.turn_counts == {4: 2, 8: 1}
+    assert summary1.nb_battles == 1    #Merged summaries are not modified
@@ -0,0 +1,9 @@
+from src.tests import bench_startup
+
+
+def test_deferred_modules_are_not_imported_at_startup():
+    modules = bench_startup.imported_modules()
+
+    assert "src.setup_game" in modules and "src.game" in modules
+    assert sorted(set(bench_startup.DEFERRED_MODULES) & modules) == []
+
@@ -1,7 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import io
+import os
+import pathlib
+import subprocess
+import sys
+
 import pytest
 from pytest import MonkeyPatch
 
-from src.utils import get_nonempty_string_input, get_valid_int_input, get_valid_user_input
+import main
+from src.catalog import load_catalog
+from src.utils import InteractiveInputProvider, ScriptedInputProvider, StdinBatchInputProvider, get_input_provider, get_int_in_range_input, \
+                      get_nonempty_string_input, get_valid_int_input, get_valid_user_input, read_input, use_input_provider
 
 def test_get_valid_user_input(monkeypatch: MonkeyPatch, capsys):
 
@@ -91,4 +102,69 @@ def test_get_valid_int_input_validentry_as_third_try_True_True(monkeypatch: Monk
     captures = capsys.readouterr()
 
     assert result == [3, 12, 26]
-    assert len(captures.out.split('\n')) == 3
\ No newline at end of file
+    assert len(captures.out.split('\n')) == 3
+
+def test_ScriptedInputProvider(capsys):
+    provider = ScriptedInputProvider(iter(["", "Two", "One"]))
+    with use_input_provider(provider):
+        assert get_valid_user_input("Choice: ", ("One", "Two")) == "Two"
+        assert read_input("Name: ") == "One"
+        with pytest.raises(EOFError):
+            read_input("Again: ")
+
+    assert provider.nb_answers == 3
+    assert capsys.readouterr().out == "Choice: Choix invalide\nChoice: Name: Again: "
+    assert isinstance(get_input_provider(), InteractiveInputProvider)
+
+
+def test_StdinBatchInputProvider(monkeypatch: MonkeyPatch, capsys):
+    monkeypatch.setattr(StdinBatchInputProvider, "BLOCK_SIZE", 4)     #Lines split between blocks
+    provider = StdinBatchInputProvider(io.StringIO("1 2\r\n\nlong answer\nlast"), write_questions=False)
+    with use_input_provider(provider):
+        assert get_valid_int_input("Ints: ", 2) == [1, 2]
+        assert get_nonempty_string_input("Name: ") == "long answer"
+        assert read_input("Last: ") == "last"
+        with pytest.raises(EOFError):
+            read_input("Again: ")
+    assert capsys.readouterr().out == "Réponse invalide (chaîne de caractère vide)\n"
+
+
+def test_input_provider_context():
+    #Each thread started with a copy of the context keeps its own provider
+    def answer(provider):
+        with use_input_provider(provider):
+            return read_input("")
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, answer, ScriptedInputProvider([str(i)], write_questions=False)) for i in range(2)]
+        assert [future.result() for future in futures] == ["0", "1"]
+
+
+#A full session in the real menus: a manual setup (a player who kills the ennemy in one attack), two games, then quit
+SESSION = ["3", "1", "Héros", "100", "50 50", "0", "3", "Cible", "10", "1 1", "n", "7", "n", "o", "1", "o", "o", "1", "n"]
+
+def test_scripted_sessions(capsys, monkeypatch):
+    #The menus read the default catalog without its compiled cache: the tests write nothing in the home directory
+    monkeypatch.setattr("src.setup_game.load_catalog", lambda: load_catalog(cache_dir=None))
+    for _ in range(20):
+        with use_input_provider(ScriptedInputProvider(SESSION)) as provider:
+            main.main()
+        assert provider.nb_answers == len(SESSION)
+
+    out = capsys.readouterr().out
+    assert out.count("Vous avez GAGNÉ") == 40 and out.count("Aurevoir!") == 20
+
+
+def test_main_batch_input(tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path), "USERPROFILE": str(tmp_path)}     #The caches of the session go in tmp_path
+    process = subprocess.run([sys.executable, "main.py", "--batch-input"], input="\n".join(SESSION) + "\n", capture_output=True,
+                             text=True, encoding="utf-8", cwd=pathlib.Path(__file__).parents[2], env=env, timeout=60)
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.count("Vous avez GAGNÉ") == 2 and "Aurevoir!" in process.stdout
+
+
+def test_get_int_in_range_input(capsys):
+    with use_input_provider(ScriptedInputProvider(["", "0", "abc", "+3", "10001", "10000"], write_questions=False)) as provider:
+        assert get_int_in_range_input("Ennemi (1-10000)? ", 1, 10_000) == 10_000
+    assert provider.nb_answers == 6
+    assert capsys.readouterr().out == "Choix invalide\n" * 5
@@ -0,0 +1,74 @@
+import math
+
+import pytest
+
+from src.battle_engine import AttackController, PotionThresholdController, RandomController
+from src.character import Character, CharacterStats
+from src.game import RoleplayGame
+from src.inventory import Inventory
+from src.random_source import RandomSource
+from src.win_solver import WinSolver
+
+
+def test_WinSolver_controller():
+    with pytest.raises(ValueError):
+        WinSolver(RoleplayGame.default_settings(), RandomController())
+
+
+def test_WinSolver_simple_probabilities():
+    #Turn 1: the ennemy survives and kills the player half of the time (damage >= 5). Turn 2: the player kills the ennemy.
+    player = Character("Player", CharacterStats(5, 10, 10, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(15, 0, 9, False), Inventory())
+    result = WinSolver(RoleplayGame(player, [ennemy])).solve()
+
+    assert result.win_probability == pytest.approx(0.5)
+    assert result.expected_turns == pytest.approx(1.5)
+
+
+def test_WinSolver_potion_policy():
+    #The player drinks the potion (+10: life 15) at turn 1, skips turn 2, survives the 2 attacks of 5 and kills the ennemy at turn 3
+    player = Character("Player", CharacterStats(20, 50, 50, True), Inventory.with_potions(1, 10, 10))
+    player.current_life = 5
+    ennemy = Character("Ennemy", CharacterStats(15, 5, 5, False), Inventory())
+
+    assert WinSolver(RoleplayGame(player, [ennemy]), AttackController()).solve().win_probability == pytest.approx(1.0)
+    result = WinSolver(RoleplayGame(player, [ennemy]), PotionThresholdController(50)).solve()
+    assert result.win_probability == pytest.approx(1.0)
+    assert result.expected_turns == pytest.approx(3.0)
+
+
+def test_WinSolver_cycles():
+    #The same state can come back: the player makes 0 or 1 damage
+    player = Character("Player", CharacterStats(10, 0, 1, True), Inventory())
+    ennemy = Character("Ennemy", CharacterStats(1, 0, 0, False), Inventory())
+    result = WinSolver(RoleplayGame(player, [ennemy])).solve()
+    assert result.win_probability == pytest.approx(1.0)
+    assert result.expected_turns == pytest.approx(2.0)
+
+    #The ennemy (<5% life) searches his bag every 2 turns: a cycle of 2 states
+    ennemy = Character("Ennemy", CharacterStats(100, 0, 0, True), Inventory())
+    ennemy.current_life = 1
+    result = WinSolver(RoleplayGame(player, [ennemy])).solve()
+    assert result.win_probability == pytest.approx(1.0)
+    assert result.expected_turns == pytest.approx(2.0)
+
+    #Nobody can make damage: the game never ends
+    player = Character("Player", CharacterStats(10, 0, 0, True), Inventory())
+    result = WinSolver(RoleplayGame(player, [ennemy])).solve()
+    assert result.win_probability == 0
+    assert math.isinf(result.expected_turns)
+
+
+def test_WinSolver_same_results_as_BattleEngine():
+    game = RoleplayGame.default_settings()
+    result = WinSolver(game, AttackController()).solve()
+
+    nb_wins = 0
+    nb_turns = 0
+    for seed in range(4000):
+        battle = game.clone(RandomSource(seed))
+        nb_wins += battle.simulate(AttackController())
+        nb_turns += battle._tour_nb
+
+    assert abs(nb_wins / 4000 - result.win_probability) < 0.02
+    assert abs(nb_turns / 4000 - result.expected_turns) < 0.1
@@ -1,5 +1,134 @@
 """Utils methods
+- The questions to the user are read from the input provider of the current context (read_input): the interactive
+  InteractiveInputProvider by default, a ScriptedInputProvider or a StdinBatchInputProvider to drive the menus and
+  the games without a terminal (tests, load tests of thousands of sessions). Select it with use_input_provider.
 """
+from contextlib import contextmanager
+from contextvars import ContextVar
+import sys
+from typing import Iterable, TextIO
+
+
+class InputProvider:
+    """Source of the answers of the user. Subclasses must override read_line."""
+
+    def read_line(self, question: str) -> str:
+        """Ask question and return the answer, like input()
+
+        Args:
+            question (str): The question, written before the answer is read
+
+        Raises:
+            EOFError: there is no answer left
+
+        Returns:
+            str: The answer, without the end of line
+        """
+        raise NotImplementedError
+
+
+class InteractiveInputProvider(InputProvider):
+    """The user in the terminal: input()"""
+
+    def read_line(self, question: str) -> str:
+        return input(question)     #Looked up at each call: the tests replace builtins.input
+
+
+class ScriptedInputProvider(InputProvider):
+    """Answers given in advance (a list, a generator...). The questions are written to sys.stdout, as input() does."""
+
+    def __init__(self, answers: Iterable[str], write_questions: bool = True):
+        """Create the provider
+
+        Args:
+            answers (Iterable[str]): The answers, in order
+            write_questions (bool, optional): If False, the questions are not written. Defaults to True.
+        """
+        self._answers = iter(answers)
+        self.write_questions = write_questions
+        self.nb_answers = 0
+
+
+    def read_line(self, question: str) -> str:
+        if self.write_questions:
+            sys.stdout.write(question)
+        try:
+            answer = next(self._answers)
+        except StopIteration:
+            raise EOFError("No scripted answer left.") from None
+        self.nb_answers += 1
+        return answer
+
+
+class StdinBatchInputProvider(InputProvider):
+    """Answers read line by line from a stream (sys.stdin by default) opened on a file or a pipe.
+    Faster than input() on a pipe: the stream is read by large blocks and the output is not flushed at each question.
+    """
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, stream: TextIO | None = None, write_questions: bool = True):
+        """Create the provider
+
+        Args:
+            stream (TextIO, optional): Where the answers are read. Defaults to None: sys.stdin at the first question.
+            write_questions (bool, optional): If False, the questions are not written. Defaults to True.
+        """
+        self.stream = stream
+        self.write_questions = write_questions
+        self._lines: list[str] = []     #Reversed: the next answer is the last one
+        self._partial = ""              #Start of a line whose end is not read yet
+        self._eof = False
+
+
+    def read_line(self, question: str) -> str:
+        if self.write_questions:
+            sys.stdout.write(question)
+        while not self._lines and not self._eof:
+            self._read_block()
+        if not self._lines:
+            raise EOFError("No answer left in the stream.")
+        return self._lines.pop()
+
+
+    def _read_block(self):
+        stream = self.stream if self.stream is not None else sys.stdin
+        block = stream.read(StdinBatchInputProvider.BLOCK_SIZE)
+        if not block:
+            self._eof = True
+            lines = [self._partial] if self._partial else []
+            self._partial = ""
+        else:
+            lines = (self._partial + block).split("\n")
+            self._partial = lines.pop()
+        self._lines = [line.removesuffix("\r") for line in reversed(lines)]
+
+
+_input_provider: ContextVar[InputProvider] = ContextVar("input_provider", default=InteractiveInputProvider())
+
+
+def get_input_provider() -> InputProvider:
+    """The input provider of the current context"""
+    return _input_provider.get()
+
+
+@contextmanager
+def use_input_provider(provider: InputProvider):
+    """Read the answers from provider in the block (and in the tasks and threads started with a copy of this context).
+
+    Args:
+        provider (InputProvider): The source of the answers
+    """
+    token = _input_provider.set(provider)
+    try:
+        yield provider
+    finally:
+        _input_provider.reset(token)
+
+
+def read_input(question: str) -> str:
+    """Ask question with the input provider of the current context and return the answer, like input()"""
+    return _input_provider.get().read_line(question)
+
 
 def get_valid_user_input(question: str, valid_answers: tuple, invalid_msg: str = "Choix invalide" ) -> str:
     """Ask question to user and loop until the answer is in valid_answers.
@@ -23,7 +152,7 @@ def get_valid_user_input(question: str, valid_answers: tuple, invalid_msg: str =
     #Main loop
     ask_again = True
     while ask_again:
-        answer = input(question)
+        answer = read_input(question)
 
         if answer not in valid_str_answers:
             print(invalid_msg)
@@ -47,7 +176,7 @@ def get_nonempty_string_input(question: str, invalid_msg: str = "Réponse invali
     """
     ask_again = True
     while ask_again:
-        answer = input(question)
+        answer = read_input(question)
 
         if not answer:
             print(invalid_msg)
@@ -56,6 +185,26 @@ def get_nonempty_string_input(question: str, invalid_msg: str = "Réponse invali
     return answer
 
 
+def get_int_in_range_input(question: str, minimum: int, maximum: int, invalid_msg: str = "Choix invalide") -> int:
+    """Ask question to user and loop until the answer is an integer between minimum and maximum (included).
+    The answer is checked by a comparison: the valid answers are never listed (ex: the choice of an ennemy among 10 000).
+
+    Args:
+        question (str): The str give to the input method
+        minimum (int): Lowest valid answer
+        maximum (int): Highest valid answer
+        invalid_msg (str): The feedback to print to user if answer is invalid
+
+    Returns:
+        int: The answer of the user
+    """
+    while True:
+        answer = read_input(question)
+        if answer.isdecimal() and minimum <= int(answer) <= maximum:
+            return int(answer)
+        print(invalid_msg)
+
+
 def get_valid_int_input(question: str, nb_of_int: int = 1, valid_higher_than_0: bool = True, valid_ascending_order: bool = False) -> list[int]:
     """Ask question to user and loop until the answer is not valid.
     Print feedback in French if invalid entry
@@ -73,7 +222,7 @@ def get_valid_int_input(question: str, nb_of_int: int = 1, valid_higher_than_0:
     is_valid = False
 
     while not is_valid:
-        answer = input(question)
+        answer = read_input(question)
 
         #Validations
         split_answer_on_space = answer.split(" ")
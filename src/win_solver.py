@@ -0,0 +1,391 @@
+"""Exact probability that the player wins a RoleplayGame setup, and exact expected number of turns.
+No sampling: every random draw is uniform (damage, potion recovery, EnnemyAI 50/50 choice), so the outcomes of a turn
+are enumerated with their probabilities and the values of the game states are computed by memoized recursion.
+
+A state is the situation at the beginning of a turn: for each character (player first), his life, the number of
+potions drunk and the took_a_potion flag. A sequence of turns can come back to the same state only if every damage
+is 0 (ex: attack_min = 0): these cycles are found with Tarjan's algorithm and solved by iteration.
+"""
+from dataclasses import dataclass
+from typing import Iterator
+
+from src.battle_engine import PlayerController, AttackController, PotionThresholdController, drink_threshold_of
+from src.character import Character
+from src.game import RoleplayGame
+from src.potion import Potion
+
+#A character state: (life, nb of potions drunk, took_a_potion). A game state: one character state by character, player first.
+CharacterState = tuple[int, int, bool]
+GameState = tuple[CharacterState, ...]
+
+
+@dataclass
+class SolverResult:
+    """Exact results of a setup. expected_turns is infinite if the game can last forever."""
+    win_probability: float
+    expected_turns: float
+    nb_states: int
+
+
+class WinSolver:
+    """Solve a RoleplayGame setup for a threshold player policy (see PotionThresholdController)
+
+    Raises:
+        ValueError: the player controller is not a threshold policy
+    """
+    TOLERANCE = 1e-13               #Convergence of the iterations on the cycles of states
+    MAX_ITERATIONS = 1_000_000
+
+    def __init__(self, game: RoleplayGame, player_controller: PlayerController | None = None):
+        """Read the setup of the game. The game itself is not modified.
+
+        Args:
+            game (RoleplayGame): The setup to solve, from its current state
+            player_controller (PlayerController, optional): AttackController or PotionThresholdController. Defaults to AttackController.
+        """
+        self.drink_below_pct = drink_threshold_of(player_controller if player_controller is not None else AttackController())
+
+        characters = [game.player] + list(game.ennemies)
+        self._max_life = tuple(character.stats.max_life for character in characters)
+        self._attack_range = tuple((character.stats.attack_min, character.stats.attack_max) for character in characters)
+        self._can_drink = tuple(character.stats.can_drink_potion for character in characters)
+        self._potions = tuple(tuple((obj.min_recup, obj.max_recup) for obj in character.inventory if isinstance(obj, Potion) and not obj.is_empty)
+                              for character in characters)
+        self.initial_state: GameState = tuple((character.current_life, 0, character.took_a_potion) for character in characters)
+
+        self._values: dict[GameState, tuple[float, float]] = {}
+        self._policy: dict[GameState, tuple[int, int]] = {}    #Action chosen in each solved state
+        self._moves_cache: dict[tuple[int, CharacterState], list] = {}
+        self._phase_cache: dict[tuple[CharacterState, ...], list] = {}
+
+
+    def solve(self) -> SolverResult:
+        """Compute the win probability and the expected number of turns from the initial state
+
+        Returns:
+            SolverResult: The exact results
+        """
+        terminal = self._terminal_value(self.initial_state)
+        if terminal is not None:
+            return SolverResult(terminal, 0.0, 0)
+
+        initial_state = self._canonical(self.initial_state)
+        self._solve_from(initial_state)
+        win_probability, expected_turns = self._values[initial_state]
+        return SolverResult(win_probability, expected_turns, len(self._values))
+
+
+    def value(self, state: GameState) -> tuple[float, float]:
+        """(win probability, expected turns) of a state. Solve it if needed."""
+        state = self._canonical(state)
+        if state not in self._values:
+            self._solve_from(state)
+        return self._values[state]
+
+
+    def player_action(self, state: GameState) -> tuple[int, int]:
+        """The action of the player policy at the beginning of a turn (same rule as PotionThresholdController)
+
+        Returns:
+            tuple[int, int]: (action, index of the ennemy to attack: 1 is the first ennemy)
+        """
+        life, drunk, took = state[0]
+        has_potion = drunk < len(self._potions[0])
+        if has_potion and life / self._max_life[0] * 100 < self.drink_below_pct:
+            return Character.ACTION_DRINKPOTION, 0
+
+        for index in range(1, len(state)):
+            if state[index][0] > 0:
+                return Character.ACTION_ATTACK, index
+        return Character.ACTION_ATTACK, 1
+
+
+    def player_choices(self, state: GameState) -> list[tuple[int, int]]:
+        """The player actions compared in a state. The threshold policy has only one: player_action(state)"""
+        return [self.player_action(state)]
+
+
+    def turn_outcomes(self, state: GameState, player_action: tuple[int, int]) -> dict[GameState, float]:
+        """Every possible state at the end of the turn, with its probability
+
+        Args:
+            state (GameState): State at the beginning of the turn (not a gameover state)
+            player_action (tuple[int, int]): Action of the player if he does not skip his turn
+
+        Returns:
+            dict[GameState, float]: {state at the end of the turn: probability}
+        """
+        outcomes = {}
+        for after_player, probability in self._player_outcomes(state, player_action):
+            player_life, player_drunk, player_took = after_player[0]
+            for ennemy_states, damage, ennemies_probability in self._ennemies_phase(after_player[1:]):
+                outcome = ((max(player_life - damage, 0), player_drunk, player_took),) + ennemy_states
+                outcomes[outcome] = outcomes.get(outcome, 0.0) + probability * ennemies_probability
+        return outcomes
+
+
+    def _ennemies_phase(self, ennemy_states: tuple[CharacterState, ...]) -> list[tuple[tuple[CharacterState, ...], int, float]]:
+        """Every possible result of the ennemies turns. Each ennemy only changes his own state and the life of the player,
+        and the damages add up (the life of the player cannot go under 0), so the result does not depend on the player state.
+
+        Returns:
+            list[tuple[tuple[CharacterState, ...], int, float]]: [(ennemy states after their turn, total damage to the player, probability)]
+        """
+        phase = self._phase_cache.get(ennemy_states)
+        if phase is not None:
+            return phase
+
+        partial = {((), 0): 1.0}
+        for index, ennemy_state in enumerate(ennemy_states, start=1):
+            next_partial = {}
+            for (states, damage), probability in partial.items():
+                for next_state, ennemy_damage, move_probability in self._ennemy_moves(index, ennemy_state):
+                    key = (states + (next_state,), damage + ennemy_damage)
+                    next_partial[key] = next_partial.get(key, 0.0) + probability * move_probability
+            partial = next_partial
+
+        phase = [(states, damage, probability) for (states, damage), probability in partial.items()]
+        self._phase_cache[ennemy_states] = phase
+        return phase
+
+
+    def _player_outcomes(self, state: GameState, player_action: tuple[int, int]) -> list[tuple[GameState, float]]:
+        life, drunk, took = state[0]
+        if took:
+            return [(self._replace(state, 0, (life, drunk, False)), 1.0)]
+
+        action, target = player_action
+        if action == Character.ACTION_DRINKPOTION:
+            return self._drink_outcomes(state, 0)
+        return self._attack_outcomes(state, 0, target)
+
+
+    def _ennemy_moves(self, index: int, ennemy_state: CharacterState) -> list[tuple[CharacterState, int, float]]:
+        """What an ennemy can do during his turn. Same rules as BattleEngine.ennemy_turn and EnnemyAI.decide_action.
+
+        Returns:
+            list[tuple[CharacterState, int, float]]: [(ennemy state after his turn, damage made to the player, probability)]
+        """
+        key = (index, ennemy_state)
+        moves = self._moves_cache.get(key)
+        if moves is not None:
+            return moves
+
+        life, drunk, took = ennemy_state
+        if life <= 0:
+            moves = [(ennemy_state, 0, 1.0)]
+        elif took:
+            moves = [((life, drunk, False), 0, 1.0)]
+        elif not self._can_drink[index]:
+            moves = self._attack_moves(index, ennemy_state)
+        else:
+            pourcent_life_remains = life / self._max_life[index] * 100
+            if pourcent_life_remains < 5:
+                moves = self._drink_moves(index, ennemy_state)
+            elif pourcent_life_remains < 25 and drunk < len(self._potions[index]):
+                moves = ([(outcome, damage, probability / 2) for outcome, damage, probability in self._drink_moves(index, ennemy_state)] +
+                         [(outcome, damage, probability / 2) for outcome, damage, probability in self._attack_moves(index, ennemy_state)])
+            else:
+                moves = self._attack_moves(index, ennemy_state)
+
+        self._moves_cache[key] = moves
+        return moves
+
+
+    def _attack_moves(self, index: int, ennemy_state: CharacterState) -> list[tuple[CharacterState, int, float]]:
+        attack_min, attack_max = self._attack_range[index]
+        probability = 1 / (attack_max - attack_min + 1)
+        return [(ennemy_state, damage, probability) for damage in range(attack_min, attack_max + 1)]
+
+
+    def _drink_moves(self, index: int, ennemy_state: CharacterState) -> list[tuple[CharacterState, int, float]]:
+        state = ((1, 0, False), ennemy_state)   #_drink_outcomes works on game states: a fake player at index 0
+        return [(outcome[1], 0, probability) for outcome, probability in self._drink_outcomes(state, 1)]
+
+
+    def _attack_outcomes(self, state: GameState, attacker: int, target: int) -> list[tuple[GameState, float]]:
+        attack_min, attack_max = self._attack_range[attacker]
+        probability = 1 / (attack_max - attack_min + 1)
+        life, drunk, took = state[target]
+
+        outcomes = {}
+        for damage in range(attack_min, attack_max + 1):
+            outcome = self._replace(state, target, (max(life - damage, 0), drunk, took))
+            outcomes[outcome] = outcomes.get(outcome, 0.0) + probability
+        return list(outcomes.items())
+
+
+    def _drink_outcomes(self, state: GameState, index: int) -> list[tuple[GameState, float]]:
+        life, drunk, took = state[index]
+        if drunk >= len(self._potions[index]):
+            return [(self._replace(state, index, (life, drunk, True)), 1.0)]  #The bag has been searched for nothing
+
+        min_recup, max_recup = self._potions[index][drunk]
+        probability = 1 / (max_recup - min_recup + 1)
+        max_life = self._max_life[index]
+
+        outcomes = {}
+        for recup in range(min_recup, max_recup + 1):
+            outcome = self._replace(state, index, (min(life + recup, max_life), drunk + 1, True))
+            outcomes[outcome] = outcomes.get(outcome, 0.0) + probability
+        return list(outcomes.items())
+
+
+    @staticmethod
+    def _replace(state: GameState, index: int, character_state: CharacterState) -> GameState:
+        return state[:index] + (character_state,) + state[index + 1:]
+
+
+    @staticmethod
+    def _terminal_value(state: GameState) -> float | None:
+        """1.0 if the player won, 0.0 if he lost, None if the game is not over"""
+        if state[0][0] <= 0:
+            return 0.0
+        for index in range(1, len(state)):
+            if state[index][0] > 0:
+                return None
+        return 1.0
+
+
+    def _canonical(self, state: GameState) -> GameState:
+        """The representative of the states equivalent to state. Subclasses can merge equivalent states."""
+        return state
+
+
+    def _expand(self, state: GameState) -> list[tuple[tuple[int, int], float, list[tuple[GameState, float]]]]:
+        """Outcomes of the turn for each player choice:
+        [(player action, probability to win at the end of the turn, [(state not over, probability)])]"""
+        if state[0][2]:     #The player skips his turn: the action does not matter
+            choices = [(Character.ACTION_ATTACK, 1)]
+        else:
+            choices = self.player_choices(state)
+
+        expanded = []
+        for player_action in choices:
+            win_now = 0.0
+            successors = {}
+            for outcome, probability in self.turn_outcomes(state, player_action).items():
+                terminal = self._terminal_value(outcome)
+                if terminal is None:
+                    outcome = self._canonical(outcome)
+                    successors[outcome] = successors.get(outcome, 0.0) + probability
+                else:
+                    win_now += terminal * probability
+            expanded.append((player_action, win_now, list(successors.items())))
+        return expanded
+
+
+    @staticmethod
+    def _is_better(value: tuple[float, float], best: tuple[float, float] | None) -> bool:
+        """A better (win probability, expected turns): more wins, then less turns"""
+        if best is None:
+            return True
+        if abs(value[0] - best[0]) > WinSolver.TOLERANCE:
+            return value[0] > best[0]
+        return value[1] < best[1] - WinSolver.TOLERANCE
+
+
+    def _choice_value(self, choice, values: dict[GameState, tuple[float, float]]) -> tuple[float, float]:
+        """(win probability, expected turns) of a choice, with the values of its successors (values first, then the solved states)"""
+        _, win, successors = choice
+        turns = 1.0
+        for successor, probability in successors:
+            successor_win, successor_turns = values[successor] if successor in values else self._values[successor]
+            win += probability * successor_win
+            turns += probability * successor_turns
+        return win, turns
+
+
+    def _solve_from(self, root: GameState):
+        """Tarjan's strongly connected components, iterative. A component is solved when it is complete:
+        all the states it leads to are already solved."""
+        index_of: dict[GameState, int] = {root: 0}
+        lowlink: dict[GameState, int] = {root: 0}
+        expanded = {root: self._expand(root)}
+        component_stack = [root]
+        call_stack = [(root, self._successors_of(expanded[root]))]
+
+        while call_stack:
+            state, successors = call_stack[-1]
+            for successor, _ in successors:
+                if successor in self._values:
+                    continue
+                if successor not in index_of:
+                    index_of[successor] = lowlink[successor] = len(index_of)
+                    expanded[successor] = self._expand(successor)
+                    component_stack.append(successor)
+                    call_stack.append((successor, self._successors_of(expanded[successor])))
+                    break
+                lowlink[state] = min(lowlink[state], index_of[successor])   #successor is in the current component stack
+            else:
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[state])
+
+                if lowlink[state] == index_of[state]:
+                    component = []
+                    while True:
+                        member = component_stack.pop()
+                        component.append(member)
+                        if member == state:
+                            break
+                    self._solve_component(component, {member: expanded.pop(member) for member in component})
+
+
+    @staticmethod
+    def _successors_of(choices) -> Iterator[tuple[GameState, float]]:
+        for _, _, successors in choices:
+            yield from successors
+
+
+    def _solve_component(self, component: list[GameState], expanded: dict):
+        if len(component) == 1:
+            state = component[0]
+            best, best_action = None, None
+            for choice in expanded[state]:
+                player_action, win_now, successors = choice
+                loop_probability = sum(probability for successor, probability in successors if successor == state)
+                if loop_probability >= 1.0 - WinSolver.TOLERANCE:
+                    value = (0.0, float('inf'))
+                else:
+                    win, turns = self._choice_value((player_action, win_now, [(successor, probability) for successor, probability in successors if successor != state]), {})
+                    value = (win / (1 - loop_probability), turns / (1 - loop_probability))
+                if self._is_better(value, best):
+                    best, best_action = value, player_action
+            self._values[state] = best
+            self._policy[state] = best_action
+            return
+
+        #A cycle of states (only possible with damages of 0): value iteration until the values are stable
+        members = set(component)
+        can_exit = any(sum(probability for successor, probability in successors if successor in members) < 1.0 - WinSolver.TOLERANCE
+                       for choices in expanded.values() for _, _, successors in choices)
+        if not can_exit:
+            for state in component:
+                self._values[state] = (0.0, float('inf'))
+                self._policy[state] = expanded[state][0][0]
+            return
+
+        values = {state: (0.0, 0.0) for state in component}
+        for _ in range(WinSolver.MAX_ITERATIONS):
+            max_change = 0.0
+            for state in component:
+                best, best_action = None, None
+                for choice in expanded[state]:
+                    value = self._choice_value(choice, values)
+                    if self._is_better(value, best):
+                        best, best_action = value, choice[0]
+                max_change = max(max_change, abs(best[0] - values[state][0]), abs(best[1] - values[state][1]))
+                values[state] = best
+                self._policy[state] = best_action
+            if max_change < WinSolver.TOLERANCE:
+                break
+        self._values.update(values)
+
+
+if __name__ == "__main__":
+    for game in (RoleplayGame.default_settings(), RoleplayGame.settings_with_two_weak_ennemies()):
+        for controller in (AttackController(), PotionThresholdController()):
+            result = WinSolver(game, controller).solve()
+            print(f"{type(controller).__name__}: victoire {result.win_probability:.4%}, tours {result.expected_turns:.3f} ({result.nb_states} états)")